@@ -3,33 +3,56 @@ from dotenv import load_dotenv
 
 from config import Config
 from app.extensions import register_extensions
-from app.blueprints import register_blueprints
-from app.context_processors import register_context_processors
-from app.hooks import register_request_hooks
-from app.routes import register_routes
 from app.cli import register_cli
-from app.middleware import init_rbac, register_audit_listeners, init_error_handlers
+from app.middleware import init_rbac, register_audit_listeners, init_error_handlers, init_instrumentation
 
 load_dotenv()
 
-def create_app():
+def create_app(lightweight=False):
+    """Build the application.
+
+    ``lightweight=True`` is meant for cron scripts and other jobs that only
+    need models, services and the database listeners: blueprints, routes,
+    request hooks, error pages and request instrumentation are skipped, so the
+    view modules are not imported.
+    """
     app = Flask(__name__, instance_relative_config=True)
     app.config.from_object(Config)
     Config.init_app(app)
 
     register_extensions(app)
+    if not lightweight:
+        init_instrumentation(app)
     
     with app.app_context():
+        from app.inventory.services.costing import register_costing_listeners
+        register_costing_listeners()
+        from app.inventory.services.inventory_stats import register_inventory_stats_listeners
+        register_inventory_stats_listeners()
+        from app.contacts.services.contact_stats import register_contact_stats_listeners
+        register_contact_stats_listeners()
+        from app.dashboard.services.dashboard_cache import register_dashboard_cache_listeners
+        register_dashboard_cache_listeners()
+        from app.companies.services.company_stats import register_company_stats_listeners
+        register_company_stats_listeners()
         register_audit_listeners()
         from app.services.approval_service import init_action_handlers
         init_action_handlers()
+        from app.services.job_service import init_job_handlers
+        init_job_handlers()
+
+    if not lightweight:
+        from app.blueprints import register_blueprints
+        from app.context_processors import register_context_processors
+        from app.hooks import register_request_hooks
+        from app.routes import register_routes
 
-    register_blueprints(app)
-    register_context_processors(app)
-    register_request_hooks(app)
-    register_routes(app)
-    init_error_handlers(app)
-    init_rbac(app)
+        register_blueprints(app)
+        register_context_processors(app)
+        register_request_hooks(app)
+        register_routes(app)
+        init_error_handlers(app)
+        init_rbac(app)
     register_cli(app)
 
     return app
@@ -16,12 +16,15 @@ from ._balance_assets import (
 from ._balance_compute import _compute_account_balance, _compute_balances_bulk
 from ._balance_predicates import _active_expense_conditions, _active_ledger_conditions
 from ._balance_queries import (
+    _expense_tag_totals,
     _expenses_by_account,
     _ledger_manual_expenses_by_account,
     _ledger_revenue_by_account,
     _merge_account_amounts,
     _period_expense_total,
     _period_revenue_total,
+    _period_totals,
+    _project_pnl_totals,
     _registered_expenses_by_account,
 )
 from ._balance_transactions import _create_balanced_transaction
@@ -1,11 +1,11 @@
-from datetime import datetime
+from datetime import UTC, datetime
 
 from flask_login import current_user
 from sqlalchemy import func, or_, select
 from sqlalchemy.orm import joinedload
 
 from app.models import Account, Document, Expense, LedgerEntry, Payment, Transaction, db
-from app.models.enums import AccountType, DocumentStatus, DocumentType, TransactionType
+from app.models.enums import AccountRole, AccountType, DocumentStatus, DocumentType, TransactionType
 
 from ._helpers import _make_naive
 
@@ -13,22 +13,13 @@ from ._balance_predicates import _active_expense_conditions
 
 
 def _is_receivable_account(account: Account) -> bool:
-    if not account or account.type != AccountType.asset:
-        return False
-    name = (account.name or '').lower()
-    return 'cobrar' in name or 'receivable' in name
+    return bool(account) and account.type == AccountType.asset and account.role == AccountRole.receivable
 
 
 def _receivable_accounts(company_id: int) -> list[Account]:
     return (
         Account.query
-        .filter_by(company_id=company_id, is_active=True, type=AccountType.asset)
-        .filter(
-            or_(
-                Account.name.ilike('%cobrar%'),
-                Account.name.ilike('%receivable%'),
-            )
-        )
+        .filter_by(company_id=company_id, is_active=True, type=AccountType.asset, role=AccountRole.receivable)
         .order_by(Account.is_default.desc(), Account.code, Account.name)
         .all()
     )
@@ -117,7 +108,11 @@ def _replace_receivable_asset_balance(
     return result
 
 
-def _inventory_balance(company_id: int) -> float:
+def _inventory_balance(company_id: int, as_of: datetime | None = None) -> float:
+    if as_of is not None and _make_naive(as_of) < _make_naive(datetime.now(UTC)):
+        from app.inventory.services.stock_snapshots import inventory_value_as_of
+        return inventory_value_as_of(company_id, _make_naive(as_of))
+
     from app.models.inventory_item import InventoryItem
     q = db.session.query(
         func.coalesce(func.sum(InventoryItem.quantity * InventoryItem.cost_price), 0)
@@ -131,6 +126,7 @@ def _inventory_balance(company_id: int) -> float:
 def _replace_inventory_asset_balance(
     company_id: int,
     asset_balances_by_name: dict[str, float],
+    as_of: datetime | None = None,
 ) -> dict[str, float]:
     """Return asset balances with Inventory replaced by calculated inventory value."""
     result = dict(asset_balances_by_name or {})
@@ -146,7 +142,7 @@ def _replace_inventory_asset_balance(
     for account in inventory_accounts:
         result.pop(account.name, None)
 
-    inventory_val = _inventory_balance(company_id)
+    inventory_val = _inventory_balance(company_id, as_of=as_of)
     result[inventory_accounts[0].name] = inventory_val
     return result
 
@@ -37,7 +37,7 @@ def _compute_account_balance(account: Account, as_of: datetime = None) -> float:
         if inventory_accounts and inventory_accounts[0].id != account.id:
             return 0.0
         if account.type == AccountType.asset:
-            return _inventory_balance(account.company_id)
+            return _inventory_balance(account.company_id, as_of=as_of)
 
     q = (
         db.session.query(
@@ -128,7 +128,7 @@ def _compute_balances_bulk(
         or account_type_filter == AccountType.asset
         or (isinstance(account_type_filter, (list, tuple)) and AccountType.asset in account_type_filter)
     ):
-        inventory_val = _inventory_balance(company_id)
+        inventory_val = _inventory_balance(company_id, as_of=as_of)
         preferred_inv = inventory_accounts[0]
         result[preferred_inv.id] = inventory_val
         for account in inventory_accounts[1:]:
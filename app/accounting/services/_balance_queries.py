@@ -1,10 +1,10 @@
 from datetime import datetime
 
 from flask_login import current_user
-from sqlalchemy import func, or_, select
+from sqlalchemy import and_, case, false, func, or_, select
 from sqlalchemy.orm import joinedload
 
-from app.models import Account, Document, Expense, LedgerEntry, Payment, Transaction, db
+from app.models import Account, Document, Expense, LedgerEntry, Payment, Tag, Transaction, db, expense_tags
 from app.models.enums import AccountType, DocumentStatus, DocumentType, TransactionType
 
 from ._helpers import _make_naive
@@ -160,3 +160,178 @@ def _period_revenue_total(
         sum(_ledger_revenue_by_account(company_id, start_dt, end_dt, project_id).values()),
         2,
     )
+
+
+def _sum_if(condition, amount):
+    return func.coalesce(func.sum(case((condition, amount), else_=0)), 0)
+
+
+def _manual_expense_entry():
+    """Ledger lines on expense accounts not posted by a registered expense, as in _ledger_manual_expenses_by_account."""
+    return and_(
+        Account.type == AccountType.expense,
+        or_(
+            LedgerEntry.reference_type.is_(None),
+            LedgerEntry.reference_type != 'Expense',
+        ),
+    )
+
+
+def _expense_account_label():
+    """Per-account key of registered expense sums; non-positive accounts are skipped by the caller."""
+    return func.coalesce(Account.name, 'Sin cuenta')
+
+
+def _period_totals(company_id: int, start_dt: datetime, end_dt: datetime) -> dict[str, float]:
+    """
+    All-time and ``start_dt``..``end_dt`` revenue and expense totals.
+
+    Same figures as ``_period_revenue_total``/``_period_expense_total`` for both
+    ranges, from one pass over the ledger and one over registered expenses.
+    """
+    start_dt, end_dt = _make_naive(start_dt), _make_naive(end_dt)
+    is_revenue = Account.type == AccountType.revenue
+    is_manual_expense = _manual_expense_entry()
+    entry_in_period = and_(LedgerEntry.date >= start_dt, LedgerEntry.date <= end_dt)
+    revenue_net = LedgerEntry.credit - LedgerEntry.debit
+    expense_net = LedgerEntry.debit - LedgerEntry.credit
+
+    revenue_all, revenue_period, ledger_expense_all, ledger_expense_period = (
+        db.session.query(
+            _sum_if(is_revenue, revenue_net),
+            _sum_if(and_(is_revenue, entry_in_period), revenue_net),
+            _sum_if(is_manual_expense, expense_net),
+            _sum_if(and_(is_manual_expense, entry_in_period), expense_net),
+        )
+        .select_from(LedgerEntry)
+        .join(Account, LedgerEntry.account_id == Account.id)
+        .outerjoin(Transaction, LedgerEntry.transaction_id == Transaction.id)
+        .filter(
+            LedgerEntry.company_id == company_id,
+            Account.type.in_((AccountType.revenue, AccountType.expense)),
+            _active_ledger_conditions(),
+        )
+        .one()
+    )
+
+    account_label = _expense_account_label()
+    expense_in_period = and_(Expense.date >= start_dt, Expense.date <= end_dt)
+    registered_all = registered_period = 0.0
+    for amount_all, amount_period in (
+        db.session.query(
+            func.coalesce(func.sum(Expense.amount), 0),
+            _sum_if(expense_in_period, Expense.amount),
+        )
+        .select_from(Expense)
+        .outerjoin(Account, Expense.account_id == Account.id)
+        .outerjoin(Transaction, Expense.transaction_id == Transaction.id)
+        .filter(
+            Expense.company_id == company_id,
+            _active_expense_conditions(),
+        )
+        .group_by(account_label)
+        .all()
+    ):
+        registered_all += max(float(amount_all), 0.0)
+        registered_period += max(float(amount_period), 0.0)
+
+    return {
+        'revenue_total': round(float(revenue_all), 2),
+        'revenue_period': round(float(revenue_period), 2),
+        'expense_total': round(registered_all + float(ledger_expense_all), 2),
+        'expense_period': round(registered_period + float(ledger_expense_period), 2),
+    }
+
+
+def _project_pnl_totals(company_id: int) -> dict[int, tuple[float, float]]:
+    """
+    ``{project_id: (revenue, expense)}`` for every project with activity.
+
+    Per project, the same figures as ``_period_revenue_total``/``_period_expense_total``
+    with ``project_id``, from one grouped ledger query and one grouped expense query.
+    """
+    is_revenue = Account.type == AccountType.revenue
+    is_manual_expense = _manual_expense_entry()
+    revenue: dict[int, float] = {}
+    expense: dict[int, float] = {}
+
+    ledger_rows = (
+        db.session.query(
+            LedgerEntry.project_id,
+            _sum_if(is_revenue, LedgerEntry.credit - LedgerEntry.debit),
+            _sum_if(is_manual_expense, LedgerEntry.debit - LedgerEntry.credit),
+        )
+        .join(Account, LedgerEntry.account_id == Account.id)
+        .outerjoin(Transaction, LedgerEntry.transaction_id == Transaction.id)
+        .filter(
+            LedgerEntry.company_id == company_id,
+            LedgerEntry.project_id.isnot(None),
+            Account.type.in_((AccountType.revenue, AccountType.expense)),
+            _active_ledger_conditions(),
+        )
+        .group_by(LedgerEntry.project_id)
+        .all()
+    )
+    for project_id, revenue_amount, expense_amount in ledger_rows:
+        revenue[project_id] = float(revenue_amount)
+        expense[project_id] = float(expense_amount)
+
+    account_label = _expense_account_label()
+    registered_rows = (
+        db.session.query(Expense.project_id, func.coalesce(func.sum(Expense.amount), 0))
+        .select_from(Expense)
+        .outerjoin(Account, Expense.account_id == Account.id)
+        .outerjoin(Transaction, Expense.transaction_id == Transaction.id)
+        .filter(
+            Expense.company_id == company_id,
+            Expense.project_id.isnot(None),
+            _active_expense_conditions(),
+        )
+        .group_by(Expense.project_id, account_label)
+        .all()
+    )
+    for project_id, amount in registered_rows:
+        expense[project_id] = expense.get(project_id, 0.0) + max(float(amount), 0.0)
+
+    return {
+        project_id: (round(revenue.get(project_id, 0.0), 2), round(expense.get(project_id, 0.0), 2))
+        for project_id in revenue.keys() | expense.keys()
+    }
+
+
+def _expense_tag_totals(company_id: int) -> dict[str, float]:
+    """Active expense amounts per tag name, largest first; untagged ones under 'Sin Etiqueta'."""
+    active_expenses = (
+        Expense.company_id == company_id,
+        _active_expense_conditions(),
+    )
+    tag_total = func.sum(Expense.amount)
+    rows = (
+        db.session.query(Tag.name, tag_total)
+        .select_from(Expense)
+        .join(expense_tags, expense_tags.c.expense_id == Expense.id)
+        .join(Tag, Tag.id == expense_tags.c.tag_id)
+        .outerjoin(Transaction, Expense.transaction_id == Transaction.id)
+        .filter(*active_expenses)
+        .group_by(Tag.name)
+        .order_by(tag_total.desc())
+        .all()
+    )
+    has_live_tag = (
+        select(expense_tags.c.expense_id)
+        .join(Tag, Tag.id == expense_tags.c.tag_id)
+        .where(expense_tags.c.expense_id == Expense.id, Tag.is_deleted == false())
+        .exists()
+    )
+    untagged = (
+        db.session.query(func.sum(Expense.amount))
+        .select_from(Expense)
+        .outerjoin(Transaction, Expense.transaction_id == Transaction.id)
+        .filter(*active_expenses, ~has_live_tag)
+        .scalar()
+    )
+
+    totals = {name: float(amount) for name, amount in rows}
+    if untagged:
+        totals['Sin Etiqueta'] = float(untagged)
+    return totals
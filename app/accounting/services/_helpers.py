@@ -7,6 +7,9 @@ import mimetypes
 from datetime import datetime, UTC
 
 from flask import current_app
+from sqlalchemy import func
+
+from app.extensions import db
 
 
 def _allowed_file(filename: str) -> bool:
@@ -118,3 +121,10 @@ def _get_period_bounds(start_date: str, end_date: str):
     raw_end = _parse_date(end_date) if end_date else now
     end_dt = raw_end.replace(hour=23, minute=59, second=59)
     return _make_naive(start_dt), _make_naive(end_dt)
+
+
+def _month_bucket(column):
+    """SQL expression for the ``YYYY-MM`` month of a datetime column, per dialect."""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return func.to_char(func.date_trunc('month', column), 'YYYY-MM')
+    return func.strftime('%Y-%m', column)
@@ -2,7 +2,7 @@
 from datetime import UTC, datetime
 
 from app.models import db, Account, LedgerEntry, Transaction
-from app.models.enums import AccountType
+from app.models.enums import AccountRole, AccountType
 
 from ._balance import _active_ledger_conditions
 
@@ -11,6 +11,38 @@ class AccountService:
     INVOICE_PAYMENT_REVENUE_PURPOSE = 'invoice_payment_revenue'
     INVENTORY_ASSET_PURPOSE = 'inventory_asset'
 
+    # Role -> (required account type, name keywords used to infer it), in priority order.
+    ROLE_RULES = {
+        AccountRole.receivable: (AccountType.asset, ('cobrar', 'receivable')),
+        AccountRole.payable: (AccountType.liability, ('pagar', 'payable')),
+        AccountRole.cash: (AccountType.asset, ('caja', 'banco', 'cash')),
+    }
+
+    @staticmethod
+    def infer_role(account_type: AccountType, name: str) -> AccountRole | None:
+        lowered = (name or '').lower()
+        for role, (required_type, keywords) in AccountService.ROLE_RULES.items():
+            if account_type == required_type and any(keyword in lowered for keyword in keywords):
+                return role
+        return None
+
+    @staticmethod
+    def _clean_role(account_type: AccountType, name: str, data) -> AccountRole | None:
+        # A missing role or 'auto' infers it from the name; '' ("Sin rol") clears it.
+        raw_role = data.get('role')
+        raw_role = 'auto' if raw_role is None else raw_role.strip()
+        if raw_role == 'auto':
+            return AccountService.infer_role(account_type, name)
+        if not raw_role:
+            return None
+        try:
+            role = AccountRole(raw_role)
+        except ValueError:
+            raise ValueError('Rol contable inválido.')
+        if AccountService.ROLE_RULES[role][0] != account_type:
+            raise ValueError(f'El rol {role.label_es} no corresponde al tipo de cuenta {account_type.label_es}.')
+        return role
+
     @staticmethod
     def _clean_default_purpose(account_type: AccountType, data) -> str | None:
         default_purpose = data.get('default_purpose', '').strip() or None
@@ -56,6 +88,7 @@ class AccountService:
             type=act_type_enum,
             description=description,
             default_purpose=default_purpose,
+            role=AccountService._clean_role(act_type_enum, name, data),
         )
         db.session.add(account)
         db.session.commit()
@@ -80,6 +113,8 @@ class AccountService:
         account.code = data.get('code', '').strip() or account.code
         account.description = data.get('description', '').strip()
         account.default_purpose = default_purpose
+        if 'role' in data:
+            account.role = AccountService._clean_role(account.type, name, data)
         account.is_active = data.get('is_active', 'true').lower() == 'true'
         db.session.commit()
         return account
@@ -147,6 +182,7 @@ class AccountService:
                     type=def_acc['type'],
                     description=def_acc['description'],
                     default_purpose=def_acc.get('default_purpose'),
+                    role=AccountService.infer_role(def_acc['type'], def_acc['name']),
                     is_default=True,
                     is_active=True,
                 ))
@@ -154,6 +190,8 @@ class AccountService:
             elif def_acc.get('default_purpose') and exists.default_purpose != def_acc['default_purpose']:
                 AccountService._clear_default_purpose(company_id, def_acc['default_purpose'], except_account_id=exists.id)
                 exists.default_purpose = def_acc['default_purpose']
+            if exists and exists.role is None:
+                exists.role = AccountService.infer_role(def_acc['type'], def_acc['name'])
 
         if created_count > 0 or db.session.dirty:
             db.session.commit()
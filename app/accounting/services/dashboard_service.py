@@ -1,18 +1,14 @@
 """Dashboard aggregation service."""
 from datetime import UTC, datetime
 
-from sqlalchemy import select
-from sqlalchemy.orm import joinedload
-
-from app.models import db, Account, Company, Expense, Transaction
-from app.models.enums import AccountType
+from app.models import Account, Company, Transaction
+from app.models.enums import AccountRole, AccountType
 
 from ._helpers import _make_naive
 from ._balance import (
-    _active_expense_conditions,
     _compute_balances_bulk,
-    _period_expense_total,
-    _period_revenue_total,
+    _expense_tag_totals,
+    _period_totals,
     _recent_active_expenses,
 )
 
@@ -43,12 +39,13 @@ class DashboardService:
         now = _make_naive(datetime.now(UTC))
         month_start = now.replace(day=1, hour=0, minute=0, second=0)
 
-        revenue_month = _period_revenue_total(company_id, month_start, now)
-        expenses_month = _period_expense_total(company_id, start_dt=month_start, end_dt=now)
+        totals = _period_totals(company_id, month_start, now)
+        revenue_month = totals['revenue_period']
+        expenses_month = totals['expense_period']
         net_income_month = round(revenue_month - expenses_month, 2)
 
-        total_revenue = _period_revenue_total(company_id)
-        total_expenses = _period_expense_total(company_id)
+        total_revenue = totals['revenue_total']
+        total_expenses = totals['expense_total']
         net_income_all = round(total_revenue - total_expenses, 2)
 
         account_map = {acc.id: acc for acc in accounts}
@@ -65,39 +62,15 @@ class DashboardService:
             if abs(float(balances.get(account.id, 0.0))) > 0
         ][:10]
 
-        cash_balance = sum(
-            balances.get(acc.id, 0.0) for acc in accounts
-            if 'caja' in acc.name.lower() or 'banco' in acc.name.lower() or 'cash' in acc.name.lower()
-        )
-        ar_balance = sum(
-            balances.get(acc.id, 0.0) for acc in accounts
-            if 'cobrar' in acc.name.lower() or 'receivable' in acc.name.lower()
-        )
-        ap_balance = sum(
-            balances.get(acc.id, 0.0) for acc in accounts
-            if 'pagar' in acc.name.lower() or 'payable' in acc.name.lower()
-        )
+        role_balances = {role: 0.0 for role in AccountRole}
+        for acc in accounts:
+            if acc.role is not None:
+                role_balances[acc.role] += balances.get(acc.id, 0.0)
+        cash_balance = role_balances[AccountRole.cash]
+        ar_balance = role_balances[AccountRole.receivable]
+        ap_balance = role_balances[AccountRole.payable]
 
-        tag_totals: dict[str, float] = {}
-        active_expense_rows = (
-            db.session.execute(
-                select(Expense)
-                .options(joinedload(Expense.tags))
-                .outerjoin(Transaction, Expense.transaction_id == Transaction.id)
-                .where(
-                    Expense.company_id == company_id,
-                    _active_expense_conditions(),
-                )
-            )
-            .unique()
-            .scalars()
-            .all()
-        )
-        for e in active_expense_rows:
-            if not e.tags:
-                tag_totals['Sin Etiqueta'] = tag_totals.get('Sin Etiqueta', 0.0) + float(e.amount)
-            for t in e.tags:
-                tag_totals[t.name] = tag_totals.get(t.name, 0.0) + float(e.amount)
+        tag_totals = _expense_tag_totals(company_id)
 
         return {
             'company': company,
@@ -1,6 +1,7 @@
 """Journal entries, ledger, and trial balance service."""
 from datetime import UTC, datetime
 
+from app.extensions import reads_from_replica
 from app.models import db, Account, LedgerEntry, Transaction
 from app.models.enums import TransactionType
 
@@ -334,10 +335,14 @@ class JournalService:
     @staticmethod
     def get_ledger_page(company_id: int, account_id: int = None,
                         start_date: str = '', end_date: str = '',
-                        page: int = 1, per_page: int = 40) -> dict:
-        """Return a full ledger page dict ready to pass to the template."""
-        from sqlalchemy import func
+                        cursor: str = '', per_page: int = 40) -> dict:
+        """Return a full ledger page dict ready to pass to the template.
+
+        Entries are paged by a ``(date, id)`` cursor and carry their running balance.
+        """
+        from sqlalchemy import func, tuple_
         from app.models.enums import AccountType
+        from app.services.pagination import keyset_paginate
 
         all_accounts = (
             Account.query
@@ -351,6 +356,7 @@ class JournalService:
                 'account': None,
                 'all_accounts': all_accounts,
                 'opening_balance': 0.0,
+                'page_opening_balance': 0.0,
                 'ending_balance': 0.0,
                 'pagination': None,
                 'start_date': start_date,
@@ -392,50 +398,59 @@ class JournalService:
         else:
             opening_balance = round(open_c - open_d, 2)
 
+        debit_normal = account.type in (AccountType.asset, AccountType.expense)
+        period_filters = (
+            LedgerEntry.account_id == account_id,
+            LedgerEntry.company_id == company_id,
+            LedgerEntry.date >= start_dt,
+            LedgerEntry.date <= end_dt,
+            _active_ledger_conditions(),
+        )
+
+        def period_totals(*extra_filters):
+            row = (
+                db.session.query(
+                    func.coalesce(func.sum(LedgerEntry.debit), 0),
+                    func.coalesce(func.sum(LedgerEntry.credit), 0),
+                )
+                .select_from(LedgerEntry)
+                .outerjoin(Transaction, LedgerEntry.transaction_id == Transaction.id)
+                .filter(*period_filters, *extra_filters)
+                .one()
+            )
+            debit, credit = float(row[0]), float(row[1])
+            return debit - credit if debit_normal else credit - debit
+
         q = (
             LedgerEntry.query
             .outerjoin(Transaction, LedgerEntry.transaction_id == Transaction.id)
-            .filter(
-                LedgerEntry.account_id == account_id,
-                LedgerEntry.company_id == company_id,
-                LedgerEntry.date >= start_dt,
-                LedgerEntry.date <= end_dt,
-                _active_ledger_conditions(),
-            )
-            .order_by(LedgerEntry.date.asc(), LedgerEntry.id.asc())
+            .filter(*period_filters)
+        )
+        pagination = keyset_paginate(
+            q, [LedgerEntry.date, LedgerEntry.id], cursor=cursor, per_page=per_page, total='estimate'
         )
-        pagination = q.paginate(page=page, per_page=per_page, error_out=False)
 
-        period_all_q = (
-            db.session.query(
-                func.coalesce(func.sum(LedgerEntry.debit), 0),
-                func.coalesce(func.sum(LedgerEntry.credit), 0),
-            )
-            .select_from(LedgerEntry)
-            .outerjoin(Transaction, LedgerEntry.transaction_id == Transaction.id)
-            .filter(
-                LedgerEntry.account_id == account_id,
-                LedgerEntry.company_id == company_id,
-                LedgerEntry.date >= start_dt,
-                LedgerEntry.date <= end_dt,
-                _active_ledger_conditions(),
+        ending_balance = round(opening_balance + period_totals(), 2)
+
+        # Later pages start from the balance of every period entry before their first row.
+        running = opening_balance
+        if pagination.items and pagination.has_prev:
+            first = pagination.items[0]
+            running += period_totals(
+                tuple_(LedgerEntry.date, LedgerEntry.id) < tuple_(first.date, first.id)
             )
-            .one()
-        )
-        per_d, per_c = float(period_all_q[0]), float(period_all_q[1])
-        if account.type in (AccountType.asset, AccountType.expense):
-            ending_balance = round(opening_balance + per_d - per_c, 2)
-        else:
-            ending_balance = round(opening_balance + per_c - per_d, 2)
+        page_opening_balance = round(running, 2)
 
         for entry in pagination.items:
-            entry.debit = float(entry.debit)
-            entry.credit = float(entry.credit)
+            debit, credit = float(entry.debit), float(entry.credit)
+            running += debit - credit if debit_normal else credit - debit
+            entry.running_balance = round(running, 2)
 
         return {
             'account': account,
             'all_accounts': all_accounts,
             'opening_balance': opening_balance,
+            'page_opening_balance': page_opening_balance,
             'ending_balance': ending_balance,
             'pagination': pagination,
             'entries': pagination.items,
@@ -446,6 +461,7 @@ class JournalService:
     # ── Trial Balance ──────────────────────────────────────────────────────
 
     @staticmethod
+    @reads_from_replica
     def get_trial_balance(company_id: int, as_of_date: str = '') -> dict:
         """Returns a trial balance as of a given date."""
         as_of = _parse_date(as_of_date, default_now=True) if as_of_date else None
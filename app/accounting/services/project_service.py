@@ -10,14 +10,15 @@ from flask import current_app, render_template
 from flask_login import current_user
 from sqlalchemy import func, select
 from sqlalchemy.orm import joinedload
-from xhtml2pdf import pisa
 
+from app.extensions import reads_from_replica
+from app.lazy_backends import pisa
 from app.models import db, Account, Company, Expense, LedgerEntry, Project, Tag, Transaction
 from app.models.document import Document
 from app.models.enums import AccountType, DocumentType
 from app.models.report import Report
 
-from ._helpers import _get_period_bounds
+from ._helpers import _get_period_bounds, _month_bucket
 from ._balance import (
     _active_expense_conditions,
     _active_ledger_conditions,
@@ -26,6 +27,7 @@ from ._balance import (
     _ledger_revenue_by_account,
     _period_expense_total,
     _period_revenue_total,
+    _project_pnl_totals,
     _replace_receivable_asset_balance,
     _replace_inventory_asset_balance,
 )
@@ -124,24 +126,27 @@ class ProjectService:
     @staticmethod
     def get_projects_list(company_id: int) -> list:
         projects = Project.query.filter_by(company_id=company_id).order_by(Project.name).all()
-        
+        pnl = _project_pnl_totals(company_id)
+
+        invoice_counts = db.session.query(
+            Document.project_id,
+            Document.status,
+            func.count(Document.id)
+        ).filter(
+            Document.project_id.isnot(None),
+            Document.company_id == company_id,
+            Document.type == DocumentType.invoice
+        ).group_by(Document.project_id, Document.status).all()
+        invoices_by_project: dict[int, dict[str, int]] = {}
+        for project_id, status, count in invoice_counts:
+            invoices_by_project.setdefault(project_id, {})[status.value] = count
+
         result = []
         for p in projects:
-            expense_total = _period_expense_total(company_id, project_id=p.id)
-            income_total = _period_revenue_total(company_id, project_id=p.id)
-            
-            invoice_counts = db.session.query(
-                Document.status,
-                func.count(Document.id)
-            ).filter(
-                Document.project_id == p.id,
-                Document.company_id == company_id,
-                Document.type == DocumentType.invoice
-            ).group_by(Document.status).all()
-            
-            invoices_by_status = {status.value: count for status, count in invoice_counts}
+            income_total, expense_total = pnl.get(p.id, (0.0, 0.0))
+            invoices_by_status = invoices_by_project.get(p.id, {})
             total_invoices = sum(invoices_by_status.values())
-            
+
             result.append({
                 'project': p,
                 'expense_total': expense_total,
@@ -182,12 +187,17 @@ class ProjectService:
             per_page=per_page,
             error_out=False,
         )
-        expenses = (
-            db.session.execute(
-                expense_stmt
+        expense_month = func.coalesce(_month_bucket(Expense.date), 'N/A')
+        expense_by_month = (
+            db.session.query(expense_month, func.sum(Expense.amount))
+            .select_from(Expense)
+            .outerjoin(Transaction, Expense.transaction_id == Transaction.id)
+            .filter(
+                Expense.company_id == company_id,
+                Expense.project_id == project_id,
+                _active_expense_conditions(),
             )
-            .unique()
-            .scalars()
+            .group_by(expense_month)
             .all()
         )
 
@@ -208,28 +218,27 @@ class ProjectService:
             per_page=per_page,
             error_out=False,
         )
-        income_entries = income_query.all()
-
-        total_expenses = round(sum(float(e.amount) for e in expenses), 2)
-        total_income = round(
-            sum(float(e.credit) - float(e.debit) for e in income_entries),
-            2,
+        income_month = func.coalesce(_month_bucket(LedgerEntry.date), 'N/A')
+        income_by_month = (
+            income_query
+            .with_entities(income_month, func.sum(LedgerEntry.credit - LedgerEntry.debit))
+            .order_by(None)
+            .group_by(income_month)
+            .all()
         )
+
+        total_expenses = round(sum(float(amount) for _, amount in expense_by_month), 2)
+        total_income = round(sum(float(amount) for _, amount in income_by_month), 2)
         net = round(total_income - total_expenses, 2)
         budget = float(project.budget or 0)
         budget_remaining = round(budget - total_expenses, 2)
 
         monthly: dict = {}
-        for e in expenses:
-            key = e.date.strftime('%Y-%m') if e.date else 'N/A'
-            monthly.setdefault(key, {'expense': 0.0, 'income': 0.0})
-            monthly[key]['expense'] = round(monthly[key]['expense'] + float(e.amount), 2)
-        for e in income_entries:
-            key = e.date.strftime('%Y-%m') if e.date else 'N/A'
-            monthly.setdefault(key, {'expense': 0.0, 'income': 0.0})
-            monthly[key]['income'] = round(
-                monthly[key]['income'] + float(e.credit) - float(e.debit), 2
-            )
+        for field, rows in (('expense', expense_by_month), ('income', income_by_month)):
+            for key, amount in rows:
+                monthly.setdefault(key, {'expense': 0.0, 'income': 0.0})[field] = round(float(amount), 2)
+        # Newest month first, undated activity last.
+        monthly = dict(sorted(monthly.items(), key=lambda item: (item[0] != 'N/A', item[0]), reverse=True))
 
         all_ledger = (
             LedgerEntry.query
@@ -254,7 +263,6 @@ class ProjectService:
             per_page=per_page,
             error_out=False,
         )
-        invoices = invoice_query.all()
 
         invoice_counts = db.session.query(
             Document.status,
@@ -312,6 +320,7 @@ class ProjectService:
     # ── Reports ────────────────────────────────────────────────────────────
 
     @staticmethod
+    @reads_from_replica
     def compute_report(company_id: int, report_type: str,
                        start_date: str, end_date: str) -> tuple[dict, object]:
         start_dt, end_dt = _get_period_bounds(start_date, end_date)
@@ -361,6 +370,7 @@ class ProjectService:
             report_data['asset'] = _replace_inventory_asset_balance(
                 company_id,
                 report_data['asset'],
+                as_of=end_dt,
             )
 
             net_income = round(
@@ -1,10 +1,11 @@
 from datetime import UTC, datetime
 
 from flask import flash, jsonify, make_response, redirect, render_template, request, url_for
-from flask_login import login_required
+from flask_login import current_user, login_required
 
 from app.models import Account, Project, Tag, Transaction
-from app.models.enums import AccountType, TransactionType
+from app.models.enums import AccountRole, AccountType, TransactionType
+from app.services.job_service import enqueue, job_accepted_response, wants_background
 from app.utils import resolve_company
 
 from .. import accounting
@@ -23,21 +24,21 @@ def ledger(company_id):
     account_id_str = request.args.get('account_id', '').strip()
     start_date = request.args.get('start_date', '').strip()
     end_date = request.args.get('end_date', '').strip()
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor', '').strip()
 
     ledger_data = AccountingService.get_ledger_page(
         company_id,
         account_id=int(account_id_str) if account_id_str else None,
         start_date=start_date,
         end_date=end_date,
-        page=page,
+        cursor=cursor,
     )
 
     export = request.args.get('export', '').strip()
     if export == 'excel':
         export_data = AccountingService.get_ledger_page(
             company_id, account_id=int(account_id_str) if account_id_str else None,
-            start_date=start_date, end_date=end_date, page=1, per_page=100000
+            start_date=start_date, end_date=end_date, per_page=100000
         )
         headers = ['Fecha', 'Cuenta', 'Transacción', 'Referencia', 'Débito', 'Crédito', 'Saldo Móvil']
         rows = []
@@ -118,8 +119,8 @@ def create_account(company_id):
             flash(str(e), 'error')
 
     if _is_ajax():
-        return render_template('accounting/partials/account_form.html', company=company, account=None, AccountType=AccountType)
-    return render_template('accounting/account_form.html', company=company, account=None, AccountType=AccountType)
+        return render_template('accounting/partials/account_form.html', company=company, account=None, AccountType=AccountType, AccountRole=AccountRole)
+    return render_template('accounting/account_form.html', company=company, account=None, AccountType=AccountType, AccountRole=AccountRole)
 
 
 @accounting.route('/<string:company_id>/accounting/accounts/<int:account_id>/edit', methods=['GET', 'POST'])
@@ -145,8 +146,8 @@ def edit_account(company_id, account_id):
             flash(str(e), 'error')
 
     if _is_ajax():
-        return render_template('accounting/partials/account_form.html', company=company, account=account, AccountType=AccountType)
-    return render_template('accounting/account_form.html', company=company, account=account, AccountType=AccountType)
+        return render_template('accounting/partials/account_form.html', company=company, account=account, AccountType=AccountType, AccountRole=AccountRole)
+    return render_template('accounting/account_form.html', company=company, account=account, AccountType=AccountType, AccountRole=AccountRole)
 
 
 @accounting.route('/<string:company_id>/accounting/accounts/<int:account_id>/delete', methods=['POST'])
@@ -230,6 +231,12 @@ def reports(company_id):
     report_type = request.args.get('report_type', 'income_statement').strip()
     export = request.args.get('export', '').strip()
 
+    if wants_background() and not export:
+        job = enqueue('reports.compute', payload={
+            'company_id': company_id, 'report_type': report_type, 'start_date': start_date, 'end_date': end_date,
+        }, company_id=company_id, user_id=current_user.id)
+        return job_accepted_response(job)
+
     try:
         report_data, total = AccountingService.compute_report(company_id, report_type, start_date, end_date)
     except ValueError:
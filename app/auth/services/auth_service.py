@@ -8,6 +8,7 @@ from flask_login import login_user
 from app.extensions import bcrypt
 from app.models import User, Token, db
 from app.services.email_service import EmailService
+from app.state_storage import regenerate_session
 
 
 class AuthService:
@@ -34,6 +35,8 @@ class AuthService:
         if not user.is_active:
             return None, 'invalid_credentials'
 
+        # New session id on login so an id planted before it is never authenticated
+        regenerate_session()
         login_user(user, remember=remember)
         user.last_login = datetime.now(UTC)
         db.session.commit()
@@ -148,81 +148,13 @@ def register_cli(app: Flask):
         
         Run with: flask update-expired-documents
         """
-        from app.models import Document, Notification
-        from app.models.enums import DocumentStatus, DocumentType
-        from datetime import datetime, UTC
-        
+        from app.invoices.services import mark_overdue_documents
+
         with app.app_context():
-            now = datetime.now(UTC)
-            
-            # Find documents that are due and not already in a terminal/paid state
-            # Eligible statuses for expiration: draft, sent, issued, partial, pending
-            eligible_statuses = [
-                DocumentStatus.draft,
-                DocumentStatus.sent,
-                DocumentStatus.issued,
-                DocumentStatus.partial,
-                DocumentStatus.pending
-            ]
-            
-            expired_docs = Document.query.filter(
-                Document.due_date < now,
-                Document.status.in_(eligible_statuses)
-            ).all()
-
-            def invoice_link(document):
-                return f'/{document.company_id}/invoices/{document.id}'
-
-            def notification_exists(document, link_url):
-                return Notification.query.filter(
-                    Notification.user_id == document.user_id,
-                    Notification.company_id == document.company_id,
-                    Notification.type == 'warning',
-                    Notification.link_url == link_url,
-                ).first() is not None
-
-            def create_expired_invoice_notification(document):
-                if document.type != DocumentType.invoice or not document.user_id:
-                    return False
-
-                link_url = invoice_link(document)
-                if notification_exists(document, link_url):
-                    return False
-
-                invoice_number = document.document_number or f'#{document.id}'
-                due_date = document.due_date.strftime('%d/%m/%Y') if document.due_date else 'sin fecha'
-                balance_due = document.calculate_balance_due()
-                body = (
-                    f'La factura {invoice_number} vencio el {due_date}. '
-                    f'Saldo pendiente: {balance_due:,.2f}.'
-                )
+            result = mark_overdue_documents()
 
-                db.session.add(Notification(
-                    user_id=document.user_id,
-                    company_id=document.company_id,
-                    type='warning',
-                    title=f'Factura vencida {invoice_number}',
-                    message=body,
-                    body=body,
-                    link_url=link_url,
-                    priority='high',
-                    channel='in_app',
-                    status='unread',
-                    is_popup=True,
-                    sent_at=now,
-                ))
-                return True
-            
-            count = 0
-            notification_count = 0
-            for doc in expired_docs:
-                notification_count += 1 if create_expired_invoice_notification(doc) else 0
-                doc.status = DocumentStatus.overdue
-                count += 1
-                
-            db.session.commit()
-            print(f'[OK] Updated {count} expired document(s) to overdue status.')
-            print(f'[OK] Created {notification_count} expired invoice notification(s).')
+        print(f"[OK] Updated {result['updated_documents']} expired document(s) to overdue status.")
+        print(f"[OK] Created {result['created_notifications']} expired invoice notification(s).")
 
     @app.cli.command('send-low-stock-notifications')
     @click.option('--threshold', default=5, show_default=True, help='Quantity at or below this value is low stock')
@@ -238,3 +170,171 @@ def register_cli(app: Flask):
 
         print(f"[OK] Checked {result['checked_items']} low-stock item(s).")
         print(f"[OK] Created {result['created_notifications']} low-stock notification(s).")
+
+    @app.cli.command('reconcile-stock')
+    @click.option('--company-id', 'company_ids', type=int, multiple=True, help='Limit to these companies (repeatable)')
+    @click.option('--repair', is_flag=True, help='Reset stored quantities to the movement ledger')
+    @click.option('--chunk-size', default=500, show_default=True, help='Items processed per batch')
+    @click.option('--verbose', is_flag=True, help='Print every discrepancy')
+    def reconcile_stock_command(company_ids, repair, chunk_size, verbose):
+        """Compare item and warehouse stock against the stock movement history.
+
+        Run with: flask reconcile-stock [--repair]
+        """
+        from app.inventory.services import reconcile_all_companies
+
+        with app.app_context():
+            for result in reconcile_all_companies(repair=repair, chunk_size=chunk_size, company_ids=company_ids):
+                item_count = len(result['item_discrepancies'])
+                warehouse_count = len(result['warehouse_discrepancies'])
+                print(
+                    f"[{'FIXED' if repair and (item_count or warehouse_count) else 'OK'}] "
+                    f"Company {result['company_id']}: checked {result['checked_items']} item(s), "
+                    f"{item_count} item and {warehouse_count} warehouse discrepancy(ies)."
+                )
+                if verbose:
+                    for d in result['item_discrepancies']:
+                        print(f"    item {d['inventory_item_id']}: recorded={d['recorded']} expected={d['expected']}")
+                    for d in result['warehouse_discrepancies']:
+                        print(
+                            f"    item {d['inventory_item_id']} @ warehouse {d['warehouse_id']}: "
+                            f"recorded={d['recorded']} expected={d['expected']}"
+                        )
+
+    @app.cli.command('snapshot-stock')
+    @click.option('--date', 'snapshot_date', default=None, help='Snapshot at the end of this day (YYYY-MM-DD); defaults to the last month end')
+    @click.option('--company-id', 'company_ids', type=int, multiple=True, help='Limit to these companies (repeatable)')
+    def snapshot_stock_command(snapshot_date, company_ids):
+        """Store point-in-time stock quantities and costs for historical valuation.
+
+        Run with: flask snapshot-stock [--date YYYY-MM-DD]
+        """
+        from datetime import datetime, timedelta
+        from app.inventory.services import month_end_before, snapshot_all_companies
+
+        if snapshot_date:
+            try:
+                as_of = datetime.strptime(snapshot_date, '%Y-%m-%d') + timedelta(days=1) - timedelta(microseconds=1)
+            except ValueError:
+                raise click.BadParameter('Use the YYYY-MM-DD format.', param_hint='--date')
+        else:
+            as_of = month_end_before()
+
+        with app.app_context():
+            for result in snapshot_all_companies(as_of=as_of, company_ids=company_ids):
+                print(
+                    f"[OK] Company {result['company_id']}: {result['rows']} snapshot row(s) "
+                    f"as of {result['snapshot_date']:%Y-%m-%d %H:%M:%S}."
+                )
+
+    @app.cli.command('explain-hot-queries')
+    @click.option('--company-id', default=1, show_default=True, help='Company used for the query parameters')
+    @click.option('--user-id', default=1, show_default=True, help='User used for the query parameters')
+    @click.option('--query', 'names', multiple=True, help='Only explain these catalog entries (repeatable)')
+    @click.option('--verbose', is_flag=True, help='Print the full plan of every query')
+    @click.option('--strict', is_flag=True, help='Exit with status 1 when a query misses its expected index')
+    def explain_hot_queries_command(company_id, user_id, names, verbose, strict):
+        """Run EXPLAIN on the hot service queries and check they use their indexes.
+
+        Run with: flask explain-hot-queries [--strict]
+        """
+        from app.services.query_plans import explain_hot_queries
+
+        with app.app_context():
+            results = explain_hot_queries(company_id=company_id, user_id=user_id, names=names)
+
+        regressions = 0
+        for result in results:
+            ok = result['uses_expected_index'] and not result['full_scans']
+            regressions += not ok
+            print(f"[{'OK' if ok else 'WARN'}] {result['name']} ({result['source']}): expects {result['expected_index']}")
+            for line in result['full_scans']:
+                print(f"    full scan: {line}")
+            if verbose or not ok:
+                for line in result['plan']:
+                    print(f"    {line}")
+
+        if strict and regressions:
+            raise SystemExit(1)
+
+    @app.cli.command('release-number-blocks')
+    @click.option('--holder', default=None, help='Only release blocks reserved by this holder')
+    @click.option('--company-id', default=None, type=int, help='Only release blocks of this company')
+    @click.option('--idle-minutes', default=60, show_default=True, help='Only release blocks unused for this long (0 releases all)')
+    def release_number_blocks_command(holder, company_id, idle_minutes):
+        """Return unused invoice numbers reserved by stopped workers or registers.
+
+        Run with: flask release-number-blocks [--idle-minutes N]
+        """
+        from datetime import timedelta
+        from app.services.document_numbers import release_blocks
+
+        with app.app_context():
+            released = release_blocks(
+                holder=holder,
+                company_id=company_id,
+                idle_for=timedelta(minutes=idle_minutes) if idle_minutes else None,
+            )
+            db.session.commit()
+        print(f"[OK] Released {released} document number block(s).")
+
+    @app.cli.command('recompute-costs')
+    @click.option('--company-id', 'company_ids', type=int, multiple=True, help='Limit to these companies (repeatable)')
+    @click.option('--chunk-size', default=500, show_default=True, help='Items processed per batch')
+    def recompute_costs_command(company_ids, chunk_size):
+        """Rebuild item costs (weighted average or FIFO layers) from the stock movement history.
+
+        Run with: flask recompute-costs
+        """
+        from app.inventory.services import recompute_all_companies
+
+        with app.app_context():
+            for result in recompute_all_companies(chunk_size=chunk_size, company_ids=company_ids):
+                print(
+                    f"[OK] Company {result['company_id']} ({result['method']}): checked {result['checked_items']} item(s), "
+                    f"{result['changed_items']} cost(s) updated."
+                )
+
+    @app.cli.command('worker')
+    @click.option('--threads', default=None, type=int, help='Jobs run concurrently per process (default: JOB_WORKER_THREADS)')
+    @click.option('--processes', default=1, show_default=True, help='Worker processes to fork')
+    @click.option('--poll-interval', default=None, type=float, help='Seconds between queue polls when idle')
+    @click.option('--schedule/--no-schedule', default=None, help='Enqueue periodic tasks (default: JOB_SCHEDULER_ENABLED)')
+    @click.option('--burst', is_flag=True, help='Exit once the queue is empty')
+    def worker_command(threads, processes, poll_interval, schedule, burst):
+        """Run queued background jobs (exports, reports, notification sweeps).
+
+        Run with: flask worker [--threads 4] [--processes 2]
+        """
+        from app.services.job_service import run_worker_pool
+
+        print(f"[OK] Worker started ({processes} process(es)).")
+        processed = run_worker_pool(
+            app, processes=processes, threads=threads, poll_interval=poll_interval, schedule=schedule, burst=burst,
+        )
+        if processed is not None:
+            print(f"[OK] Worker stopped after {processed} job(s).")
+
+    @app.cli.command('enqueue-job')
+    @click.argument('name')
+    @click.option('--payload', default='{}', help='Job arguments as a JSON object')
+    @click.option('--company-id', default=None, type=int, help='Company the job belongs to')
+    def enqueue_job_command(name, payload, company_id):
+        """Queue a registered background job.
+
+        Run with: flask enqueue-job invoices.mark_overdue
+        """
+        import json
+        from app.services.job_service import enqueue
+
+        try:
+            arguments = json.loads(payload)
+        except ValueError:
+            raise click.BadParameter('Use a JSON object.', param_hint='--payload')
+
+        with app.app_context():
+            try:
+                job = enqueue(name, payload=arguments, company_id=company_id)
+            except ValueError as exc:
+                raise click.ClickException(str(exc))
+            print(f"[OK] Queued job {job.id} ({name}).")
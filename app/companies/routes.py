@@ -4,6 +4,7 @@ from flask import render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
 
 from app.models import User
+from app.models.enums import CostingMethod
 from . import companies
 from .services import CompanyService
 
@@ -17,6 +18,7 @@ def index():
     
     return render_template('companies/index.html', 
                            companies=pagination.items, 
+                           company_stats=CompanyService.get_companies_stats(pagination.items),
                            pagination=pagination, 
                            search=search)
 
@@ -24,7 +26,7 @@ def index():
 @login_required
 def create():
     users = User.query.all()
-    return render_template('companies/form.html', comp=None, users=users, timezones=CompanyService.TIMEZONE_CHOICES)
+    return render_template('companies/form.html', comp=None, users=users, timezones=CompanyService.TIMEZONE_CHOICES, costing_methods=list(CostingMethod))
 
 @companies.route('/companies/store', methods=['POST'])
 @login_required
@@ -56,7 +58,7 @@ def view(id):
 def edit(id):
     company = CompanyService.get_company_for_user(id, current_user)
     users = User.query.all()
-    return render_template('companies/form.html', comp=company, users=users, timezones=CompanyService.TIMEZONE_CHOICES)
+    return render_template('companies/form.html', comp=company, users=users, timezones=CompanyService.TIMEZONE_CHOICES, costing_methods=list(CostingMethod))
 
 @companies.route('/companies/<int:id>/update', methods=['POST'])
 @login_required
@@ -1,3 +1,4 @@
 from .company_service import CompanyService
+from .company_stats import get_companies_stats, get_company_stats, invalidate_company_stats
 
-__all__ = ['CompanyService']
+__all__ = ['CompanyService', 'get_companies_stats', 'get_company_stats', 'invalidate_company_stats']
@@ -7,7 +7,9 @@ from flask import abort
 from flask import current_app
 
 from app.models import db, Company, User, Contact, InventoryItem, Document, Payment, Report, DocumentSequence, Account
-from app.models.enums import ContactType, AccountType
+from app.models.enums import AccountRole, AccountType, CostingMethod
+from app.models.document_sequence import SEQUENCE_KIND_INVOICE
+from .company_stats import get_companies_stats, get_company_stats
 
 
 COMMON_TIMEZONES = [
@@ -40,6 +42,15 @@ class CompanyService:
             raise ValueError("Zona horaria inválida.") from exc
         return timezone_name
 
+    @staticmethod
+    def _parse_costing_method(value, default=CostingMethod.average):
+        if not value:
+            return default
+        try:
+            return CostingMethod(value)
+        except ValueError as exc:
+            raise ValueError("Método de costeo inválido.") from exc
+
     @staticmethod
     def _save_logo(file):
         if not file or not file.filename:
@@ -84,6 +95,11 @@ class CompanyService:
             page=page, per_page=per_page, error_out=False
         )
 
+    @staticmethod
+    def get_companies_stats(companies):
+        """Record counts of a page of companies, keyed by company id."""
+        return get_companies_stats([company.id for company in companies])
+
     @staticmethod
     def create_company(data, current_user, files=None):
         name = data.get('name', '').strip()
@@ -98,6 +114,7 @@ class CompanyService:
             name=name,
             currency=data.get('currency', 'USD'),
             tax_rate=float(data.get('tax_rate', 0.0)),
+            costing_method=CompanyService._parse_costing_method(data.get('costing_method')),
             address=data.get('address', '').strip(),
             phone=data.get('phone', '').strip(),
             email=data.get('email', '').strip(),
@@ -135,10 +152,10 @@ class CompanyService:
         db.session.flush() # Flush to get company.id
 
         default_accounts = [
-            Account(company_id=company.id, name='Cash/Bank', type=AccountType.asset, is_default=True),
-            Account(company_id=company.id, name='Accounts Receivable', type=AccountType.asset, is_default=True),
+            Account(company_id=company.id, name='Cash/Bank', type=AccountType.asset, is_default=True, role=AccountRole.cash),
+            Account(company_id=company.id, name='Accounts Receivable', type=AccountType.asset, is_default=True, role=AccountRole.receivable),
             Account(company_id=company.id, name='Inventory', type=AccountType.asset, is_default=True, default_purpose='inventory_asset'),
-            Account(company_id=company.id, name='Accounts Payable', type=AccountType.liability, is_default=True),
+            Account(company_id=company.id, name='Accounts Payable', type=AccountType.liability, is_default=True, role=AccountRole.payable),
             Account(company_id=company.id, name='Sales Revenue', type=AccountType.revenue, is_default=True, default_purpose='invoice_payment_revenue'),
             Account(company_id=company.id, name='Cost of Goods Sold (COGS)', type=AccountType.expense, is_default=True),
             Account(company_id=company.id, name='General Expenses', type=AccountType.expense, is_default=True)
@@ -151,16 +168,8 @@ class CompanyService:
     def get_company_with_stats(company_id, current_user):
         company = CompanyService.get_company_for_user(company_id, current_user)
 
-        stats = {
-            'users_count': len(company.users),
-            'clients_count': Contact.query.filter_by(company_id=company.id, type=ContactType.customer).count(),
-            'suppliers_count': Contact.query.filter_by(company_id=company.id, type=ContactType.supplier).count(),
-            'inventory_count': InventoryItem.query.filter_by(company_id=company.id).count(),
-            'documents_count': Document.query.filter_by(company_id=company.id).count(),
-            'payments_count': Payment.query.filter_by(company_id=company.id).count(),
-            'reports_count': Report.query.filter_by(company_id=company.id).count()
-        }
-        
+        stats = get_company_stats(company.id)
+
         recent_documents = Document.query.filter_by(company_id=company.id).order_by(Document.issued_date.desc()).limit(5).all()
         recent_payments = Payment.query.filter_by(company_id=company.id).order_by(Payment.payment_date.desc()).limit(5).all()
 
@@ -181,6 +190,9 @@ class CompanyService:
         company.name = name
         company.currency = data.get('currency', 'USD')
         company.tax_rate = float(data.get('tax_rate', 0.0))
+        costing_method = CompanyService._parse_costing_method(data.get('costing_method'), company.costing_method)
+        costing_method_changed = costing_method != company.costing_method
+        company.costing_method = costing_method
         company.address = data.get('address', '').strip()
         company.phone = data.get('phone', '').strip()
         company.email = data.get('email', '').strip()
@@ -216,6 +228,10 @@ class CompanyService:
             company.users.extend(users)
         
         db.session.commit()
+
+        if costing_method_changed:
+            from app.inventory.services.costing import recompute_company_costs
+            recompute_company_costs(company.id)
         return company
 
     @staticmethod
@@ -252,11 +268,11 @@ class CompanyService:
 
     @staticmethod
     def get_sequences(company_id):
-        return DocumentSequence.query.filter_by(company_id=company_id).order_by(DocumentSequence.expiration_date.desc()).all()
+        return DocumentSequence.query.filter_by(company_id=company_id, kind=SEQUENCE_KIND_INVOICE).order_by(DocumentSequence.expiration_date.desc()).all()
 
     @staticmethod
     def get_sequence(company_id, seq_id):
-        return DocumentSequence.query.filter_by(id=seq_id, company_id=company_id).first_or_404()
+        return DocumentSequence.query.filter_by(id=seq_id, company_id=company_id, kind=SEQUENCE_KIND_INVOICE).first_or_404()
 
     @staticmethod
     def create_sequence(company_id, data):
@@ -0,0 +1,172 @@
+"""Record counts shown on the company pages.
+
+All counters of any number of companies come from one ``UNION ALL`` statement
+of grouped counts, so the company page costs one round-trip and the company
+list computes the counts for a whole page at once.
+
+Results are kept in process memory for ``COMPANY_STATS_CACHE_TTL`` seconds
+(0 disables the cache) and dropped as soon as a commit touches a contact,
+document, payment, inventory item, report, the user list of the company or
+one of its users.
+Each worker keeps its own cache, so writes made by another process show up
+once the entry expires.
+
+Writes that bypass the ORM unit of work must call :func:`invalidate_company_stats`.
+"""
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event, false, func, literal, select, union_all
+
+from app.models import Company, Contact, Document, InventoryItem, Payment, Report, User, db, user_companies
+from app.models.enums import ContactType
+
+_TRACKED_MODELS = (Contact, Document, InventoryItem, Payment, Report)
+_PENDING_KEY = 'company_stats_dirty_companies'
+_listeners_registered = False
+
+_contacts = Contact.__table__
+_users = User.__table__
+
+_entries = {}
+_generations = {}
+_lock = threading.Lock()
+
+
+def _count_by_company(name, table, *criteria):
+    return (
+        select(literal(name).label('stat'), table.c.company_id, func.count().label('total'))
+        .where(table.c.is_deleted == false(), *criteria)
+        .group_by(table.c.company_id)
+    )
+
+
+def _stats_statement(company_ids):
+    users = (
+        select(literal('users_count').label('stat'), user_companies.c.company_id, func.count().label('total'))
+        .select_from(user_companies.join(_users, _users.c.id == user_companies.c.user_id))
+        .where(_users.c.is_deleted == false(), user_companies.c.company_id.in_(company_ids))
+        .group_by(user_companies.c.company_id)
+    )
+    return union_all(
+        users,
+        _count_by_company('clients_count', _contacts, _contacts.c.company_id.in_(company_ids),
+                          _contacts.c.type == ContactType.customer),
+        _count_by_company('suppliers_count', _contacts, _contacts.c.company_id.in_(company_ids),
+                          _contacts.c.type == ContactType.supplier),
+        *(
+            _count_by_company(name, model.__table__, model.__table__.c.company_id.in_(company_ids))
+            for name, model in (
+                ('inventory_count', InventoryItem),
+                ('documents_count', Document),
+                ('payments_count', Payment),
+                ('reports_count', Report),
+            )
+        ),
+    )
+
+
+def _empty_stats():
+    return {
+        'users_count': 0, 'clients_count': 0, 'suppliers_count': 0, 'inventory_count': 0,
+        'documents_count': 0, 'payments_count': 0, 'reports_count': 0,
+    }
+
+
+def compute_company_stats(company_ids):
+    """Count the records of every company in ``company_ids`` with a single statement."""
+    stats = {company_id: _empty_stats() for company_id in company_ids}
+    if stats:
+        for name, company_id, total in db.session.execute(_stats_statement(list(stats))):
+            stats[company_id][name] = int(total)
+    return stats
+
+
+def get_companies_stats(company_ids):
+    """Counters of several companies (e.g. one page of the company list), cached per company."""
+    company_ids = list(dict.fromkeys(company_ids))
+    ttl = float(current_app.config.get('COMPANY_STATS_CACHE_TTL') or 0)
+    if ttl <= 0:
+        return compute_company_stats(company_ids)
+
+    now = time.monotonic()
+    result, generations = {}, {}
+    with _lock:
+        for company_id in company_ids:
+            entry = _entries.get(company_id)
+            if entry is not None and entry[0] > now:
+                result[company_id] = entry[1]
+            else:
+                generations[company_id] = _generations.get(company_id, 0)
+    if not generations:
+        return result
+
+    computed = compute_company_stats(generations)
+    with _lock:
+        for company_id, stats in computed.items():
+            # Skip the store if a commit invalidated the company while we were counting.
+            if _generations.get(company_id, 0) == generations[company_id]:
+                _entries[company_id] = (now + ttl, stats)
+    result.update(computed)
+    return result
+
+
+def get_company_stats(company_id):
+    return get_companies_stats([company_id])[company_id]
+
+
+def invalidate_company_stats(*company_ids):
+    with _lock:
+        for company_id in company_ids:
+            _entries.pop(company_id, None)
+            _generations[company_id] = _generations.get(company_id, 0) + 1
+
+
+def _user_companies(session, users):
+    """Companies whose ``users_count`` a flushed change of ``users`` affects, including removed memberships."""
+    company_ids = set()
+    for user in users:
+        removed = db.inspect(user).attrs.companies.history.deleted or ()
+        company_ids.update(company.id for company in removed if company.id is not None)
+    user_ids = [user.id for user in users if user.id is not None]
+    if user_ids:
+        company_ids.update(session.connection().execute(
+            select(user_companies.c.company_id).where(user_companies.c.user_id.in_(user_ids))
+        ).scalars())
+    return company_ids
+
+
+def register_company_stats_listeners():
+    """Drop cached counters of every company whose tracked rows change in a committed flush.
+
+    ``db.session`` is shared by every app, so the listeners are registered once.
+    """
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    _listeners_registered = True
+
+    @event.listens_for(db.session, 'after_flush')
+    def collect_stats_companies(session, flush_context):
+        pending = session.info.setdefault(_PENDING_KEY, set())
+        users = []
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            if isinstance(obj, Company) and obj.id is not None:
+                pending.add(obj.id)
+            elif isinstance(obj, _TRACKED_MODELS) and obj.company_id is not None:
+                pending.add(obj.company_id)
+            elif isinstance(obj, User):
+                users.append(obj)
+        if users:
+            pending.update(_user_companies(session, users))
+
+    @event.listens_for(db.session, 'after_commit')
+    def invalidate_stats_companies(session):
+        pending = session.info.pop(_PENDING_KEY, None)
+        if pending:
+            invalidate_company_stats(*pending)
+
+    @event.listens_for(db.session, 'after_rollback')
+    def discard_stats_companies(session):
+        session.info.pop(_PENDING_KEY, None)
@@ -1,3 +1,4 @@
 from .contact_service import ContactService
+from .contact_stats import aggregate_contact_stats, get_contact_stats, refresh_contact_stats
 
-__all__ = ['ContactService']
+__all__ = ['ContactService', 'aggregate_contact_stats', 'get_contact_stats', 'refresh_contact_stats']
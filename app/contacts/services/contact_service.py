@@ -5,6 +5,7 @@ from sqlalchemy import exc
 
 from app.models import db, Contact, Document, InventoryItem
 from app.models.enums import ContactType
+from .contact_stats import get_contact_stats
 
 class ContactService:
     @staticmethod
@@ -69,36 +70,13 @@ class ContactService:
         if not contact:
             abort(404)
         
-        stats = {}
         items = None
-
         if contact.type.name in ['customer', 'customer_supplier', 'lead']:
             items = Document.query.filter_by(client_id=contact.id).order_by(Document.issued_date.desc()).paginate(page=page, per_page=per_page, error_out=False)
-            all_docs = Document.query.filter_by(client_id=contact.id).all()
-            
-            total_revenue = sum(doc.calculate_paid_amount() for doc in all_docs)
-            pending_payments = sum(doc.calculate_balance_due() for doc in all_docs)
-            total_invoices = len(all_docs)
-            
-            stats = {
-                'total_revenue': total_revenue,
-                'pending_payments': pending_payments,
-                'total_invoices': total_invoices
-            }
         elif contact.type.name == 'supplier':
             items = InventoryItem.query.filter_by(supplier_id=contact.id).order_by(InventoryItem.name).paginate(page=page, per_page=per_page, error_out=False)
-            all_items = InventoryItem.query.filter_by(supplier_id=contact.id).all()
-            
-            total_inventory_value = sum((item.price or 0) * (item.quantity or 0) for item in all_items)
-            total_products = len(all_items)
-            low_stock_products = sum(1 for item in all_items if (item.quantity or 0) <= 5)
-            
-            stats = {
-                'total_value': total_inventory_value,
-                'total_products': total_products,
-                'low_stock': low_stock_products
-            }
-            
+
+        stats = get_contact_stats(contact)
         return contact, items, stats
 
     @staticmethod
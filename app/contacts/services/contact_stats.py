@@ -0,0 +1,224 @@
+"""Per-contact sales and supply stats.
+
+Customer totals (documents, amount billed, amount paid) and supplier totals
+(products, stock value at sale price, low-stock products) come from grouped
+aggregate queries, one per kind for any number of contacts, instead of loading
+every document and its payments.
+
+With ``CONTACT_STATS_CACHE_ENABLED`` the results are also kept in
+``contact_stats``: rows are built on the first read and recomputed before
+every commit that touches the contact's documents, payments or supplied
+items, so the contact page is a primary-key lookup.
+
+Writes that bypass the ORM unit of work must call :func:`refresh_contact_stats`.
+"""
+from decimal import Decimal
+
+from flask import current_app
+from sqlalchemy import case, delete, event, false, func, insert, select, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.engine_profiles import session_holds_sqlite_write_lock
+from app.inventory.services.low_stock_notifications import LOW_STOCK_THRESHOLD
+from app.models import ContactStats, Document, InventoryItem, Payment, db
+from app.models.enums import ContactType
+
+_stats = ContactStats.__table__
+_documents = Document.__table__
+_payments = Payment.__table__
+_items = InventoryItem.__table__
+
+_PENDING_KEY = 'contact_stats_dirty'
+_COUNTERS = ('document_count', 'total_billed', 'total_paid', 'product_count', 'stock_value', 'low_stock_products')
+_TRACKED_ATTRS = {
+    Document: ('client_id', 'total_amount', 'is_deleted'),
+    Payment: ('document_id', 'amount', 'is_deleted'),
+    InventoryItem: ('supplier_id', 'quantity', 'price', 'is_deleted'),
+}
+CUSTOMER_TYPES = (ContactType.customer, ContactType.customer_supplier, ContactType.lead)
+_listeners_registered = False
+
+
+def _empty_counters():
+    return {
+        'document_count': 0, 'total_billed': Decimal(0), 'total_paid': Decimal(0),
+        'product_count': 0, 'stock_value': Decimal(0), 'low_stock_products': 0,
+    }
+
+
+def aggregate_contact_stats(contact_ids, executor=None):
+    """Compute the counters of ``contact_ids`` with three grouped queries, whatever their size."""
+    executor = executor or db.session
+    contact_ids = list(contact_ids)
+    stats = {contact_id: _empty_counters() for contact_id in contact_ids}
+    if not contact_ids:
+        return stats
+
+    billed = executor.execute(
+        select(_documents.c.client_id, func.count(_documents.c.id), func.coalesce(func.sum(_documents.c.total_amount), 0))
+        .where(_documents.c.client_id.in_(contact_ids), _documents.c.is_deleted == false())
+        .group_by(_documents.c.client_id)
+    )
+    for contact_id, document_count, total_billed in billed:
+        stats[contact_id].update(document_count=int(document_count), total_billed=Decimal(str(total_billed)))
+
+    paid = executor.execute(
+        select(_documents.c.client_id, func.coalesce(func.sum(_payments.c.amount), 0))
+        .select_from(_payments.join(_documents, _payments.c.document_id == _documents.c.id))
+        .where(
+            _documents.c.client_id.in_(contact_ids),
+            _documents.c.is_deleted == false(),
+            _payments.c.is_deleted == false(),
+        )
+        .group_by(_documents.c.client_id)
+    )
+    for contact_id, total_paid in paid:
+        stats[contact_id]['total_paid'] = Decimal(str(total_paid))
+
+    supplied = executor.execute(
+        select(
+            _items.c.supplier_id,
+            func.count(_items.c.id),
+            func.coalesce(func.sum(_items.c.price * _items.c.quantity), 0),
+            func.coalesce(func.sum(case((_items.c.quantity <= LOW_STOCK_THRESHOLD, 1), else_=0)), 0),
+        )
+        .where(_items.c.supplier_id.in_(contact_ids), _items.c.is_deleted == false())
+        .group_by(_items.c.supplier_id)
+    )
+    for contact_id, product_count, stock_value, low_stock in supplied:
+        stats[contact_id].update(
+            product_count=int(product_count), stock_value=Decimal(str(stock_value)), low_stock_products=int(low_stock),
+        )
+    return stats
+
+
+def _as_response(contact, row):
+    if contact.type in CUSTOMER_TYPES:
+        total_paid = float(row['total_paid'] or 0)
+        return {
+            'total_revenue': round(total_paid, 2),
+            'pending_payments': round(float(row['total_billed'] or 0) - total_paid, 2),
+            'total_invoices': int(row['document_count']),
+        }
+    if contact.type == ContactType.supplier:
+        return {
+            'total_value': round(float(row['stock_value'] or 0), 2),
+            'total_products': int(row['product_count']),
+            'low_stock': int(row['low_stock_products']),
+        }
+    return {}
+
+
+def _cache_enabled():
+    return bool(current_app.config.get('CONTACT_STATS_CACHE_ENABLED'))
+
+
+def refresh_contact_stats(contact):
+    """Rebuild the cached row of a contact from its documents and items.
+
+    Runs in a transaction of its own, so building a missing row while serving
+    a read never commits or discards the caller's session.
+    """
+    if session_holds_sqlite_write_lock(db.session()):
+        # The separate transaction would wait out the busy timeout and fail;
+        # serve the values unstored and build the row on a later read.
+        return aggregate_contact_stats([contact.id])[contact.id]
+    contact_id, company_id = contact.id, contact.company_id
+    try:
+        with db.engine.begin() as connection:
+            values = aggregate_contact_stats([contact_id], connection)[contact_id]
+            connection.execute(delete(_stats).where(_stats.c.contact_id == contact_id))
+            connection.execute(insert(_stats).values(
+                contact_id=contact_id, company_id=company_id, is_deleted=False, **values,
+            ))
+    except IntegrityError:
+        # Another request built the row concurrently; its values are just as fresh.
+        values = aggregate_contact_stats([contact_id])[contact_id]
+    except OperationalError:
+        # SQLite lock held by another writer: serve the values unstored.
+        values = aggregate_contact_stats([contact_id])[contact_id]
+    return values
+
+
+def get_contact_stats(contact):
+    """Stats shown on the contact page for its type (customer or supplier)."""
+    if contact.type not in CUSTOMER_TYPES and contact.type != ContactType.supplier:
+        return {}
+    if not _cache_enabled():
+        return _as_response(contact, aggregate_contact_stats([contact.id])[contact.id])
+
+    row = db.session.execute(
+        select(*(_stats.c[name] for name in _COUNTERS)).where(_stats.c.contact_id == contact.id)
+    ).mappings().first()
+    if row is None:
+        row = refresh_contact_stats(contact)
+    return _as_response(contact, row)
+
+
+def _touched_contacts(obj, keys, session):
+    """Contact (or, for payments, document) ids whose stats a flushed change of ``obj`` affects."""
+    state = db.inspect(obj)
+    if obj in session.dirty and not any(state.attrs[key].history.has_changes() for key in keys):
+        return set()
+    key = keys[0]
+    touched = {getattr(obj, key)}
+    touched.update(state.attrs[key].history.deleted or ())
+    touched.discard(None)
+    return touched
+
+
+def _collect_contacts(session):
+    pending = session.info.setdefault(_PENDING_KEY, {'contacts': set(), 'documents': set()})
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        keys = _TRACKED_ATTRS.get(type(obj))
+        if keys is None:
+            continue
+        # Payments name their document; its contact is looked up when the stats are recomputed.
+        pending['documents' if isinstance(obj, Payment) else 'contacts'].update(
+            _touched_contacts(obj, keys, session)
+        )
+
+
+def _recompute(session, pending):
+    connection = session.connection()
+    contact_ids = set(pending['contacts'])
+    if pending['documents']:
+        contact_ids.update(connection.execute(
+            select(_documents.c.client_id).where(
+                _documents.c.id.in_(pending['documents']), _documents.c.client_id.isnot(None),
+            )
+        ).scalars())
+    if not contact_ids:
+        return
+    cached = connection.execute(select(_stats.c.contact_id).where(_stats.c.contact_id.in_(contact_ids))).scalars().all()
+    # Contacts without a row are built on their next read.
+    for contact_id, values in aggregate_contact_stats(cached, connection).items():
+        connection.execute(update(_stats).where(_stats.c.contact_id == contact_id).values(**values))
+
+
+def register_contact_stats_listeners():
+    """Recompute cached contact stats before commits that touch documents, payments or items.
+
+    ``db.session`` is shared by every app, so the listeners are registered once.
+    """
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    _listeners_registered = True
+
+    @event.listens_for(db.session, 'after_flush')
+    def collect_stats_contacts(session, flush_context):
+        if _cache_enabled():
+            _collect_contacts(session)
+
+    @event.listens_for(db.session, 'before_commit')
+    def recompute_contact_stats(session):
+        session.flush()
+        pending = session.info.pop(_PENDING_KEY, None)
+        if pending:
+            _recompute(session, pending)
+
+    @event.listens_for(db.session, 'after_soft_rollback')
+    def discard_stats_contacts(session, previous_transaction):
+        if not previous_transaction.nested:
+            session.info.pop(_PENDING_KEY, None)
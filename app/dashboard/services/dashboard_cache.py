@@ -0,0 +1,81 @@
+"""Short-lived per-company cache of the main dashboard metrics.
+
+The counters and revenue totals shown on the landing page are kept in process
+memory for ``DASHBOARD_CACHE_TTL`` seconds (0 disables the cache) and dropped as
+soon as a commit touches a contact, document, payment or inventory item of the
+company. Each worker keeps its own cache, so writes made by another process
+show up once the entry expires.
+
+Writes that bypass the ORM unit of work must call :func:`invalidate_dashboard_metrics`.
+"""
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event
+
+from app.models import Contact, Document, InventoryItem, Payment, db
+
+_TRACKED_MODELS = (Contact, Document, InventoryItem, Payment)
+_PENDING_KEY = 'dashboard_dirty_companies'
+_listeners_registered = False
+
+_entries = {}
+_generations = {}
+_lock = threading.Lock()
+
+
+def get_cached_metrics(company_id, period_key, compute):
+    """Return the cached metrics of a company for ``period_key``, computing them on a miss."""
+    ttl = float(current_app.config.get('DASHBOARD_CACHE_TTL') or 0)
+    if ttl <= 0:
+        return compute()
+
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(company_id)
+        generation = _generations.get(company_id, 0)
+    if entry is not None and entry[0] == period_key and entry[1] > now:
+        return entry[2]
+
+    metrics = compute()
+    with _lock:
+        # Skip the store if a commit invalidated the company while we were computing.
+        if _generations.get(company_id, 0) == generation:
+            _entries[company_id] = (period_key, now + ttl, metrics)
+    return metrics
+
+
+def invalidate_dashboard_metrics(*company_ids):
+    with _lock:
+        for company_id in company_ids:
+            _entries.pop(company_id, None)
+            _generations[company_id] = _generations.get(company_id, 0) + 1
+
+
+def register_dashboard_cache_listeners():
+    """Drop cached metrics of every company whose tracked rows change in a committed flush.
+
+    ``db.session`` is shared by every app, so the listeners are registered once.
+    """
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    _listeners_registered = True
+
+    @event.listens_for(db.session, 'after_flush')
+    def collect_dashboard_companies(session, flush_context):
+        pending = session.info.setdefault(_PENDING_KEY, set())
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            if isinstance(obj, _TRACKED_MODELS) and obj.company_id is not None:
+                pending.add(obj.company_id)
+
+    @event.listens_for(db.session, 'after_commit')
+    def invalidate_dashboard_companies(session):
+        pending = session.info.pop(_PENDING_KEY, None)
+        if pending:
+            invalidate_dashboard_metrics(*pending)
+
+    @event.listens_for(db.session, 'after_rollback')
+    def discard_dashboard_companies(session):
+        session.info.pop(_PENDING_KEY, None)
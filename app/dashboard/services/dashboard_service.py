@@ -1,10 +1,20 @@
 from datetime import UTC, datetime
 
-from sqlalchemy import func
+from sqlalchemy import and_, case, func
 from sqlalchemy.orm import joinedload
 
 from app.models import Contact, Document, DocumentType, InventoryItem, Payment, db
 from app.models.enums import ContactType, DocumentStatus
+from .dashboard_cache import get_cached_metrics
+
+CUSTOMER_TYPES = (ContactType.customer, ContactType.customer_supplier)
+OPEN_STATUSES = (
+    DocumentStatus.sent,
+    DocumentStatus.issued,
+    DocumentStatus.partial,
+    DocumentStatus.overdue,
+    DocumentStatus.pending,
+)
 
 
 class DashboardService:
@@ -30,65 +40,65 @@ class DashboardService:
         return previous_start, current_start, next_start
 
     @staticmethod
-    def get_dashboard_data(company_id: int) -> dict:
-        now = datetime.now(UTC)
-        previous_start, current_start, next_start = DashboardService._month_boundaries(now)
-        customer_types = [ContactType.customer, ContactType.customer_supplier]
-        open_statuses = [
-            DocumentStatus.sent,
-            DocumentStatus.issued,
-            DocumentStatus.partial,
-            DocumentStatus.overdue,
-            DocumentStatus.pending,
-        ]
+    def _compute_metrics(company_id: int, previous_start: datetime, current_start: datetime, next_start: datetime) -> dict:
+        """Counters and revenue for the current and previous month, one aggregate query per table."""
+        def count_between(column, start, end):
+            return func.coalesce(func.sum(case((and_(column >= start, column < end), 1), else_=0)), 0)
 
-        client_count = Contact.query.filter(
+        client_count, current_clients, previous_clients = db.session.query(
+            func.count(Contact.id),
+            count_between(Contact.created_at, current_start, next_start),
+            count_between(Contact.created_at, previous_start, current_start),
+        ).filter(
             Contact.company_id == company_id,
-            Contact.type.in_(customer_types),
-        ).count()
-        outstanding_invoice_count = Document.query.filter(
+            Contact.type.in_(CUSTOMER_TYPES),
+        ).one()
+
+        outstanding_invoice_count, current_outstanding, previous_outstanding = db.session.query(
+            func.count(Document.id),
+            count_between(Document.issued_date, current_start, next_start),
+            count_between(Document.issued_date, previous_start, current_start),
+        ).filter(
             Document.company_id == company_id,
             Document.type == DocumentType.invoice,
-            Document.status.in_(open_statuses),
-        ).count()
-        inventory_count = InventoryItem.query.filter_by(company_id=company_id).count()
-        revenue = db.session.query(func.sum(Payment.amount)).filter(
-            Payment.company_id == company_id,
-            Payment.payment_date >= current_start,
-            Payment.payment_date < next_start,
-        ).scalar() or 0
+            Document.status.in_(OPEN_STATUSES),
+        ).one()
 
-        def count_created(model, start, end, *filters):
-            return model.query.filter(
-                model.company_id == company_id,
-                model.created_at >= start,
-                model.created_at < end,
-                *filters,
-            ).count()
+        inventory_count, current_inventory, previous_inventory = db.session.query(
+            func.count(InventoryItem.id),
+            count_between(InventoryItem.created_at, current_start, next_start),
+            count_between(InventoryItem.created_at, previous_start, current_start),
+        ).filter(InventoryItem.company_id == company_id).one()
 
-        current_clients = count_created(Contact, current_start, next_start, Contact.type.in_(customer_types))
-        previous_clients = count_created(Contact, previous_start, current_start, Contact.type.in_(customer_types))
-        current_inventory = count_created(InventoryItem, current_start, next_start)
-        previous_inventory = count_created(InventoryItem, previous_start, current_start)
-        current_outstanding = Document.query.filter(
-            Document.company_id == company_id,
-            Document.type == DocumentType.invoice,
-            Document.status.in_(open_statuses),
-            Document.issued_date >= current_start,
-            Document.issued_date < next_start,
-        ).count()
-        previous_outstanding = Document.query.filter(
-            Document.company_id == company_id,
-            Document.type == DocumentType.invoice,
-            Document.status.in_(open_statuses),
-            Document.issued_date >= previous_start,
-            Document.issued_date < current_start,
-        ).count()
-        previous_revenue = db.session.query(func.sum(Payment.amount)).filter(
+        revenue, previous_revenue = db.session.query(
+            func.coalesce(func.sum(case((Payment.payment_date >= current_start, Payment.amount), else_=0)), 0),
+            func.coalesce(func.sum(case((Payment.payment_date < current_start, Payment.amount), else_=0)), 0),
+        ).filter(
             Payment.company_id == company_id,
             Payment.payment_date >= previous_start,
-            Payment.payment_date < current_start,
-        ).scalar() or 0
+            Payment.payment_date < next_start,
+        ).one()
+
+        return {
+            "client_count": client_count,
+            "outstanding_invoice_count": outstanding_invoice_count,
+            "inventory_count": inventory_count,
+            "revenue": revenue,
+            "client_growth": DashboardService._calculate_growth(current_clients, previous_clients),
+            "outstanding_growth": DashboardService._calculate_growth(current_outstanding, previous_outstanding),
+            "inventory_growth": DashboardService._calculate_growth(current_inventory, previous_inventory),
+            "revenue_growth": DashboardService._calculate_growth(revenue, previous_revenue),
+        }
+
+    @staticmethod
+    def get_dashboard_data(company_id: int) -> dict:
+        now = datetime.now(UTC)
+        previous_start, current_start, next_start = DashboardService._month_boundaries(now)
+        metrics = get_cached_metrics(
+            company_id,
+            current_start,
+            lambda: DashboardService._compute_metrics(company_id, previous_start, current_start, next_start),
+        )
 
         recent_invoices = Document.query.options(joinedload(Document.client)).filter(
             Document.company_id == company_id,
@@ -100,14 +110,7 @@ class DashboardService:
         ).order_by(Document.issued_date.desc()).limit(5).all()
 
         return {
-            "client_count": client_count,
-            "outstanding_invoice_count": outstanding_invoice_count,
-            "inventory_count": inventory_count,
-            "revenue": revenue,
+            **metrics,
             "recent_invoices": recent_invoices,
             "recent_quotes": recent_quotes,
-            "client_growth": DashboardService._calculate_growth(current_clients, previous_clients),
-            "outstanding_growth": DashboardService._calculate_growth(current_outstanding, previous_outstanding),
-            "inventory_growth": DashboardService._calculate_growth(current_inventory, previous_inventory),
-            "revenue_growth": DashboardService._calculate_growth(revenue, previous_revenue),
         }
@@ -0,0 +1,113 @@
+"""Database engine tuning selected by ``DB_ENGINE_PROFILE``.
+
+* ``sqlite`` – WAL journal, ``synchronous=NORMAL``, a busy timeout so
+  concurrent writers wait for the lock instead of failing with "database is
+  locked", a larger page cache and memory-mapped reads. Applied on every new
+  connection.
+* ``server`` – connection pool sizing, pre-ping and recycling, plus a
+  per-connection statement timeout (PostgreSQL and MySQL).
+* ``auto`` (default) – ``sqlite`` or ``server`` depending on the database URL.
+* ``default`` – leave SQLAlchemy's defaults untouched.
+
+Pool options go into ``SQLALCHEMY_ENGINE_OPTIONS`` before Flask-SQLAlchemy
+builds the engine; values already set there win. Pragmas and session settings
+are applied through connect events on the engine.
+"""
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+PROFILES = ('auto', 'sqlite', 'server', 'default')
+
+
+def resolve_engine_profile(app: Flask):
+    profile = (app.config.get('DB_ENGINE_PROFILE') or 'auto').lower()
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown DB_ENGINE_PROFILE {profile!r}; expected one of {', '.join(PROFILES)}.")
+    if profile == 'auto':
+        backend = make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name()
+        return 'sqlite' if backend == 'sqlite' else 'server'
+    return profile
+
+
+def _sqlite_pragmas(config):
+    return (
+        ('journal_mode', 'WAL'),
+        ('synchronous', config.get('SQLITE_SYNCHRONOUS', 'NORMAL')),
+        ('busy_timeout', int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))),
+        # Negative sizes are KiB rather than pages.
+        ('cache_size', -int(config.get('SQLITE_CACHE_SIZE_KB', 20000))),
+        ('mmap_size', int(config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))),
+    )
+
+
+def _server_engine_options(config, backend):
+    options = {
+        'pool_size': int(config.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(config.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(config.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(config.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': True,
+    }
+    timeout_ms = int(config.get('DB_STATEMENT_TIMEOUT_MS', 0))
+    if timeout_ms and backend == 'postgresql':
+        options['connect_args'] = {'options': f'-c statement_timeout={timeout_ms}'}
+    return options
+
+
+def configure_engine_options(app: Flask):
+    """Fill ``SQLALCHEMY_ENGINE_OPTIONS`` for the selected profile; call before ``db.init_app``."""
+    profile = resolve_engine_profile(app)
+    app.config['DB_ENGINE_PROFILE_ACTIVE'] = profile
+    if profile != 'server':
+        return
+
+    backend = make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name()
+    engine_options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    for key, value in _server_engine_options(app.config, backend).items():
+        engine_options.setdefault(key, value)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options
+
+
+def register_engine_events(app: Flask, db):
+    """Attach the per-connection settings of the active profile to the app's engines."""
+    profile = app.config.get('DB_ENGINE_PROFILE_ACTIVE')
+    if profile not in ('sqlite', 'server'):
+        return
+
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    for engine in engines:
+        backend = engine.dialect.name
+        if profile == 'sqlite' and backend == 'sqlite':
+            pragmas = _sqlite_pragmas(app.config)
+            _listen_connect(engine, [f'PRAGMA {name}={value}' for name, value in pragmas])
+        elif profile == 'server' and backend == 'mysql':
+            timeout_ms = int(app.config.get('DB_STATEMENT_TIMEOUT_MS', 0))
+            if timeout_ms:
+                _listen_connect(engine, [f'SET SESSION max_execution_time={timeout_ms}'])
+
+
+def _listen_connect(engine, statements):
+    @event.listens_for(engine, 'connect')
+    def apply_connection_settings(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+def session_holds_sqlite_write_lock(session):
+    """Whether ``session`` has written to SQLite in its open transaction.
+
+    Another connection cannot write until it commits: its statements would
+    wait out ``busy_timeout`` and then fail with "database is locked". A
+    session whose flush failed has already rolled its connection back, so it
+    holds no lock (and refuses ``connection()`` until the caller rolls back).
+    """
+    if session.get_bind().dialect.name != 'sqlite' or not session.in_transaction() or not session.is_active:
+        return False
+    return bool(session.connection().connection.dbapi_connection.in_transaction)
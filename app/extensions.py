@@ -1,14 +1,79 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
 from flask_bcrypt import Bcrypt
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_wtf.csrf import CSRFProtect
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session as FlaskSQLAlchemySession
 from flask_migrate import Migrate
 from flask_login import LoginManager
 from flask_cors import CORS
 from flask_mail import Mail
 from flask import session, request
 from config import Config
+from app.engine_profiles import configure_engine_options, register_engine_events
+from app.state_storage import configure_state_storage
+from sqlalchemy import event
+
+REPLICA_BIND = 'replica'
+_WROTE_KEY = 'wrote_to_primary'
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+class RoutingSession(FlaskSQLAlchemySession):
+    """Session that sends SELECTs to the replica bind inside :func:`read_replica`.
+
+    Flushes and DML always use the primary, and so does every read once the
+    session has written, so a request always sees its own changes. Without a
+    configured replica everything stays on the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and _replica_reads.get()
+            and not self._flushing
+            and not self.info.get(_WROTE_KEY)
+            and getattr(clause, 'is_select', False)
+        ):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_flush_written(session, flush_context):
+    session.info[_WROTE_KEY] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _mark_dml_written(execute_state):
+    if execute_state.is_insert or execute_state.is_update or execute_state.is_delete:
+        execute_state.session.info[_WROTE_KEY] = True
+
+
+@contextmanager
+def read_replica():
+    """Route the reads of the enclosed block to the replica bind, when configured."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def reads_from_replica(func):
+    """Decorator form of :func:`read_replica` for read-only service calls and views."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with read_replica():
+            return func(*args, **kwargs)
+    return wrapper
+
 
 bcrypt = Bcrypt()
 limiter = Limiter(
@@ -17,7 +82,7 @@ limiter = Limiter(
     storage_options={}
 )
 csrf = CSRFProtect()
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 login_manager = LoginManager()
 cors = CORS()
@@ -29,10 +94,16 @@ def get_locale():
     return request.accept_languages.best_match(Config.LANGUAGES.keys()) or "en"
 
 def register_extensions(app):
+    replica_uri = app.config.get('SQLALCHEMY_REPLICA_URI')
+    if replica_uri:
+        app.config['SQLALCHEMY_BINDS'] = {**(app.config.get('SQLALCHEMY_BINDS') or {}), REPLICA_BIND: replica_uri}
+    configure_engine_options(app)
     db.init_app(app)
+    register_engine_events(app, db)
     migrate.init_app(app, db)
     bcrypt.init_app(app)
     login_manager.init_app(app)
+    configure_state_storage(app)
     limiter.init_app(app)
     csrf.init_app(app)
     cors.init_app(app)
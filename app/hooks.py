@@ -32,8 +32,14 @@ def register_request_hooks(app: Flask):
             session['selected_company_id'] = stored_id
 
         # Always keep slug, currency, and tax_rate in sync with the selected company.
+        # Only assign changed values so an unchanged session is not written back.
         company = company_by_id.get(stored_id)
         if company:
-            session['selected_company_slug'] = company.slug
-            session['currency'] = company.currency
-            session['tax_rate'] = float(company.tax_rate) if company.tax_rate else 0.0
+            selected = {
+                'selected_company_slug': company.slug,
+                'currency': company.currency,
+                'tax_rate': float(company.tax_rate) if company.tax_rate else 0.0,
+            }
+            for key, value in selected.items():
+                if session.get(key) != value:
+                    session[key] = value
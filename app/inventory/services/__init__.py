@@ -1,5 +1,23 @@
 from .inventory_service import InventoryService
 from .category_service import CategoryService
 from .low_stock_notifications import LOW_STOCK_THRESHOLD, send_low_stock_notifications
+from .costing import (
+    RECOMPUTE_CHUNK_SIZE, apply_receipt, company_costing_method, recompute_all_companies,
+    recompute_company_costs, recompute_item_costs, reverse_receipt,
+)
+from .inventory_stats import get_inventory_stats, refresh_inventory_stats
+from .stock_reconciliation import RECONCILE_CHUNK_SIZE, check_item_stock, reconcile_all_companies, reconcile_company_stock
+from .stock_snapshots import (
+    inventory_value_as_of, month_end_before, snapshot_all_companies, stock_movement_summary,
+    stock_on_hand_as_of, take_stock_snapshot,
+)
 
-__all__ = ['InventoryService', 'CategoryService', 'LOW_STOCK_THRESHOLD', 'send_low_stock_notifications']
+__all__ = [
+    'InventoryService', 'CategoryService', 'LOW_STOCK_THRESHOLD', 'send_low_stock_notifications',
+    'RECONCILE_CHUNK_SIZE', 'check_item_stock', 'reconcile_all_companies', 'reconcile_company_stock',
+    'inventory_value_as_of', 'month_end_before', 'snapshot_all_companies', 'stock_movement_summary',
+    'stock_on_hand_as_of', 'take_stock_snapshot',
+    'RECOMPUTE_CHUNK_SIZE', 'apply_receipt', 'company_costing_method', 'recompute_all_companies',
+    'recompute_company_costs', 'recompute_item_costs', 'reverse_receipt',
+    'get_inventory_stats', 'refresh_inventory_stats',
+]
@@ -0,0 +1,268 @@
+"""Inventory costing: moving weighted-average cost with optional FIFO layers.
+
+``InventoryItem.cost_price`` is maintained incrementally on every receipt (and
+reversed receipt when a purchase order is edited), so valuation never rescans
+the movement history at report time. :func:`recompute_company_costs` rebuilds
+costs from the ledger on request (``flask recompute-costs`` or a change of
+costing method).
+
+FIFO layers only record the receipts still on hand. The oldest units are
+consumed first, so the units on hand are always the newest receipts: layers are
+trimmed against the current quantity instead of being consumed sale by sale.
+"""
+from itertools import groupby
+
+from sqlalchemy import event
+
+from app.models import Company, InventoryItem, StockMovement, db
+from app.models.enums import CostingMethod, StockMovementType
+
+COST_PRECISION = 4
+RECOMPUTE_CHUNK_SIZE = 500
+_listeners_registered = False
+
+
+def _round_cost(value):
+    return round(float(value or 0), COST_PRECISION)
+
+
+def company_costing_method(company_id):
+    method = db.session.query(Company.costing_method).filter(Company.id == company_id).scalar()
+    return method or CostingMethod.average
+
+
+def trim_layers(layers, on_hand, fallback_cost=0):
+    """Return the newest layers covering ``on_hand`` units, oldest first.
+
+    Units not covered by any layer (e.g. manual quantity edits) are valued at
+    ``fallback_cost``.
+    """
+    remaining = max(0, int(on_hand or 0))
+    kept = []
+    for quantity, unit_cost in reversed(layers or []):
+        if remaining <= 0:
+            break
+        taken = min(int(quantity), remaining)
+        kept.append([taken, unit_cost])
+        remaining -= taken
+    if remaining > 0:
+        kept.append([remaining, _round_cost(fallback_cost)])
+    kept.reverse()
+    return kept
+
+
+def layers_unit_cost(layers, fallback_cost=0):
+    """Weighted unit cost of ``layers``, or ``fallback_cost`` when they are empty."""
+    quantity = sum(q for q, _ in layers or [])
+    if not quantity:
+        return _round_cost(fallback_cost)
+    return _round_cost(sum(q * c for q, c in layers) / quantity)
+
+
+def _receive(on_hand, cost, layers, quantity, unit_cost, method):
+    """Return ``(cost, layers)`` after receiving ``quantity`` units on top of ``on_hand``."""
+    on_hand = max(0, int(on_hand or 0))
+    unit_cost = _round_cost(unit_cost)
+
+    if method == CostingMethod.fifo:
+        layers = trim_layers(layers, on_hand, cost)
+        if layers and layers[-1][1] == unit_cost:
+            layers[-1][0] += quantity
+        else:
+            layers.append([quantity, unit_cost])
+        return layers_unit_cost(layers, unit_cost), layers
+
+    total = on_hand + quantity
+    if total <= 0:
+        return unit_cost, None
+    return _round_cost((on_hand * float(cost or 0) + quantity * unit_cost) / total), None
+
+
+def apply_receipt(item, quantity, unit_cost, method=None):
+    """Update the cost of ``item`` for ``quantity`` units received at ``unit_cost``.
+
+    Must be called before ``item.quantity`` is increased by the receipt.
+    """
+    if item.is_service or quantity <= 0:
+        return
+    method = method or company_costing_method(item.company_id)
+    item.cost_price, item.cost_layers = _receive(
+        item.quantity, item.cost_price, item.cost_layers, quantity, unit_cost, method
+    )
+
+
+def _unreceive(on_hand, cost, layers, quantity, unit_cost, method):
+    """Return ``(cost, layers)`` after taking back ``quantity`` units received at ``unit_cost``."""
+    on_hand = max(0, int(on_hand or 0))
+    remaining = max(0, on_hand - quantity)
+    unit_cost = _round_cost(unit_cost)
+
+    if method == CostingMethod.fifo:
+        layers = trim_layers(layers, on_hand, cost)
+        # Take the units back from the newest layer at that cost; units not found there were
+        # consumed already, together with everything older, and are trimmed as usual.
+        to_remove = quantity
+        for layer in reversed(layers):
+            if layer[1] == unit_cost:
+                taken = min(layer[0], to_remove)
+                layer[0] -= taken
+                to_remove -= taken
+                break
+        layers = [layer for layer in layers if layer[0] > 0]
+        layers = trim_layers(layers, remaining, cost)
+        return layers_unit_cost(layers, cost), layers
+
+    value = on_hand * float(cost or 0) - quantity * unit_cost
+    if remaining <= 0 or value < 0:
+        # The received units are (partly) gone already: their cost has been absorbed.
+        return _round_cost(cost), None
+    return _round_cost(value / remaining), None
+
+
+def reverse_receipt(item, quantity, unit_cost, method=None):
+    """Undo :func:`apply_receipt` for ``quantity`` units received at ``unit_cost``.
+
+    Used when a purchase order is edited. Must be called before ``item.quantity``
+    is decreased by the receipt. Stock without movements and manual cost edits
+    are kept, unlike a replay of the movement history.
+    """
+    if item.is_service or quantity <= 0:
+        return
+    method = method or company_costing_method(item.company_id)
+    item.cost_price, item.cost_layers = _unreceive(
+        item.quantity, item.cost_price, item.cost_layers, quantity, unit_cost, method
+    )
+
+
+def _replay(movements, method, fallback_cost, on_hand_now):
+    """Replay ``(type, quantity, destination_warehouse_id, unit_cost)`` rows in date order."""
+    on_hand = 0
+    cost = _round_cost(fallback_cost)
+    layers = [] if method == CostingMethod.fifo else None
+
+    for movement_type, quantity, destination_warehouse_id, unit_cost in movements:
+        if destination_warehouse_id is not None:
+            continue  # transfers do not change the item total
+        change = StockMovement.signed_quantity(movement_type, quantity)
+        if change > 0:
+            # Returns and positive adjustments carry no purchase cost: receive them at the running cost.
+            receipt_cost = unit_cost if movement_type == StockMovementType.incoming and unit_cost is not None else cost
+            cost, layers = _receive(on_hand, cost, layers, change, receipt_cost, method)
+            on_hand += change
+        else:
+            on_hand = max(0, on_hand + change)
+            if layers is not None:
+                layers = trim_layers(layers, on_hand, cost)
+
+    if layers is not None:
+        layers = trim_layers(layers, on_hand_now, cost)
+        cost = layers_unit_cost(layers, cost)
+    return cost, layers
+
+
+def recompute_item_costs(company_id, item_ids, method=None):
+    """Rebuild cost and layers of ``item_ids`` from their movements in one ordered query.
+
+    Changes are applied through the ORM (and therefore audited) but not committed.
+    Returns the number of items whose cost changed.
+    """
+    if not item_ids:
+        return 0
+    method = method or company_costing_method(company_id)
+    items = {
+        item.id: item
+        for item in InventoryItem.query.filter(
+            InventoryItem.company_id == company_id,
+            InventoryItem.id.in_(list(item_ids)),
+            InventoryItem.is_service.is_(False),
+        ).all()
+    }
+    if not items:
+        return 0
+
+    rows = (
+        db.session.query(
+            StockMovement.inventory_item_id,
+            StockMovement.type,
+            StockMovement.quantity,
+            StockMovement.destination_warehouse_id,
+            StockMovement.unit_cost,
+        )
+        .filter(
+            StockMovement.company_id == company_id,
+            StockMovement.inventory_item_id.in_(list(items)),
+        )
+        .order_by(StockMovement.inventory_item_id, StockMovement.date, StockMovement.id)
+        .all()
+    )
+    movements_by_item = {
+        item_id: [row[1:] for row in group]
+        for item_id, group in groupby(rows, key=lambda row: row[0])
+    }
+
+    changed = 0
+    for item_id, item in items.items():
+        cost, layers = _replay(movements_by_item.get(item_id, []), method, item.cost_price, item.quantity)
+        if cost != _round_cost(item.cost_price) or layers != item.cost_layers:
+            item.cost_price = cost
+            item.cost_layers = layers
+            changed += 1
+    return changed
+
+
+def recompute_company_costs(company_id, chunk_size=RECOMPUTE_CHUNK_SIZE):
+    """Recompute every stock-tracked item of a company, committing per chunk."""
+    method = company_costing_method(company_id)
+    result = {'company_id': company_id, 'method': method.value, 'checked_items': 0, 'changed_items': 0}
+
+    last_id = 0
+    while True:
+        item_ids = [
+            item_id for (item_id,) in db.session.query(InventoryItem.id)
+            .filter(
+                InventoryItem.company_id == company_id,
+                InventoryItem.is_service.is_(False),
+                InventoryItem.id > last_id,
+            )
+            .order_by(InventoryItem.id)
+            .limit(chunk_size)
+            .all()
+        ]
+        if not item_ids:
+            break
+        result['changed_items'] += recompute_item_costs(company_id, item_ids, method=method)
+        result['checked_items'] += len(item_ids)
+        db.session.commit()
+        last_id = item_ids[-1]
+
+    return result
+
+
+def recompute_all_companies(chunk_size=RECOMPUTE_CHUNK_SIZE, company_ids=None):
+    """Run :func:`recompute_company_costs` for each company and yield its result."""
+    query = db.session.query(Company.id).order_by(Company.id)
+    if company_ids:
+        query = query.filter(Company.id.in_(company_ids))
+    for (company_id,) in query.all():
+        yield recompute_company_costs(company_id, chunk_size=chunk_size)
+
+
+def register_costing_listeners():
+    """Trim FIFO layers whenever an item's stock goes down, so its cost follows the units on hand.
+
+    ``db.session`` is shared by every app, so the listener is registered once.
+    """
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    _listeners_registered = True
+
+    @event.listens_for(db.session, 'before_flush')
+    def trim_fifo_layers(session, flush_context, instances):
+        for obj in session.dirty:
+            if not isinstance(obj, InventoryItem) or not obj.cost_layers:
+                continue
+            on_hand = max(0, int(obj.quantity or 0))
+            if sum(q for q, _ in obj.cost_layers) > on_hand:
+                obj.cost_layers = trim_layers(obj.cost_layers, on_hand, obj.cost_price)
+                obj.cost_price = layers_unit_cost(obj.cost_layers, obj.cost_price)
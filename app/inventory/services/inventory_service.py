@@ -1,11 +1,11 @@
 from datetime import datetime, timedelta, UTC
 
-from sqlalchemy import or_, and_, desc, asc, func
+from sqlalchemy import or_, and_, desc, asc, select
 from flask_login import current_user
 
-from app.models import Contact, db, InventoryItem, StockMovement, StockMovementType
+from app.extensions import reads_from_replica
+from app.models import Contact, db, InventoryItem, StockMovement, StockMovementSource, StockMovementType
 from app.models.enums import ContactType
-from .low_stock_notifications import LOW_STOCK_THRESHOLD
 
 
 def _item_ids_from_search_tag(company_id, search):
@@ -42,9 +42,9 @@ def _validated_supplier_id(company_id, supplier_id):
 
 class InventoryService:
     @staticmethod
-    def get_inventory_items(company_id, page=1, per_page=15, search='', supplier_id=None, category_id=None, sort_by='name', sort_order='asc'):
-        query = InventoryItem.query.filter_by(company_id=company_id)
-        
+    def _filter_inventory_items(query, company_id, search='', supplier_id=None, category_id=None):
+        query = query.filter(InventoryItem.company_id == company_id)
+
         if search:
             item_id_matches = _item_ids_from_search_tag(company_id, search)
             conditions = [
@@ -60,43 +60,46 @@ class InventoryService:
             )
         
         if supplier_id and str(supplier_id).isdigit():
-            query = query.filter_by(supplier_id=int(supplier_id))
+            query = query.filter(InventoryItem.supplier_id == int(supplier_id))
             
         if category_id and str(category_id).isdigit():
-            query = query.filter_by(category_id=int(category_id))
-            
+            query = query.filter(InventoryItem.category_id == int(category_id))
+
+        return query
+
+    @staticmethod
+    def _sort_inventory_items(query, sort_by='name', sort_order='asc'):
         if sort_by == 'name':
-            query = query.order_by(asc(InventoryItem.name) if sort_order == 'asc' else desc(InventoryItem.name))
+            return query.order_by(asc(InventoryItem.name) if sort_order == 'asc' else desc(InventoryItem.name))
         elif sort_by == 'quantity':
-            query = query.order_by(asc(InventoryItem.quantity) if sort_order == 'asc' else desc(InventoryItem.quantity))
+            return query.order_by(asc(InventoryItem.quantity) if sort_order == 'asc' else desc(InventoryItem.quantity))
         elif sort_by == 'price':
-            query = query.order_by(asc(InventoryItem.price) if sort_order == 'asc' else desc(InventoryItem.price))
-        else:
-            query = query.order_by(InventoryItem.name)
-            
+            return query.order_by(asc(InventoryItem.price) if sort_order == 'asc' else desc(InventoryItem.price))
+        return query.order_by(InventoryItem.name)
+
+    @staticmethod
+    def get_inventory_items(company_id, page=1, per_page=15, search='', supplier_id=None, category_id=None, sort_by='name', sort_order='asc'):
+        query = InventoryService._filter_inventory_items(
+            InventoryItem.query, company_id, search, supplier_id, category_id
+        )
+        query = InventoryService._sort_inventory_items(query, sort_by, sort_order)
         return query.paginate(page=page, per_page=per_page, error_out=False)
 
+    @staticmethod
+    def get_inventory_items_page(company_id, cursor='', per_page=15, search='', supplier_id=None, category_id=None):
+        """Keyset page of items ordered by ``(name, id)``; see :func:`app.services.pagination.keyset_paginate`."""
+        from app.services.pagination import keyset_paginate
+        query = InventoryService._filter_inventory_items(
+            InventoryItem.query, company_id, search, supplier_id, category_id
+        )
+        return keyset_paginate(
+            query, [InventoryItem.name, InventoryItem.id], cursor=cursor, per_page=per_page, total='estimate'
+        )
+
     @staticmethod
     def get_inventory_stats(company_id):
-        total_items = InventoryItem.query.filter_by(company_id=company_id).count()
-        low_stock_items = InventoryItem.query.filter(
-            and_(InventoryItem.company_id == company_id, InventoryItem.quantity <= LOW_STOCK_THRESHOLD)
-        ).count()
-        out_of_stock_items = InventoryItem.query.filter(
-            and_(InventoryItem.company_id == company_id, InventoryItem.quantity == 0)
-        ).count()
-        total_value = db.session.query(func.sum(InventoryItem.quantity * InventoryItem.cost_price))\
-            .filter(InventoryItem.company_id == company_id, InventoryItem.is_service.is_(False))\
-            .scalar() or 0
-        
-        return {
-            'total_items': total_items,
-            'low_stock': low_stock_items,
-            'low_stock_items': low_stock_items,
-            'out_of_stock_items': out_of_stock_items,
-            'total_value': float(total_value),
-            'in_stock_items': total_items - out_of_stock_items
-        }
+        from .inventory_stats import get_inventory_stats
+        return get_inventory_stats(company_id)
 
     @staticmethod
     def adjust_stock(company_id, item_id, warehouse_id, adjustment, reference=None):
@@ -120,6 +123,7 @@ class InventoryService:
             type=StockMovementType.adjustment,
             quantity=applied_adjustment,  # signed amount actually applied
             reference=reference or 'Manual Adjustment',
+            source_type=StockMovementSource.adjustment,
             date=datetime.now(UTC)
         )
         db.session.add(movement)
@@ -161,6 +165,7 @@ class InventoryService:
             type=StockMovementType.outgoing,
             quantity=quantity,
             reference=reference or 'Stock Transfer',
+            source_type=StockMovementSource.transfer,
             date=datetime.now(UTC)
         )
         db.session.add(movement)
@@ -224,7 +229,9 @@ class InventoryService:
                     user_id=current_user.id if current_user.is_authenticated else None,
                     type=StockMovementType.incoming,
                     quantity=quantity,
+                    unit_cost=cost_price,
                     reference='Initial Stock',
+                    source_type=StockMovementSource.initial_stock,
                     date=datetime.now(UTC)
                 )
                 db.session.add(movement)
@@ -269,7 +276,10 @@ class InventoryService:
         if cost_price is not None:
             if cost_price < 0:
                 raise ValueError('Cost price cannot be negative')
-            item.cost_price = cost_price
+            if float(item.cost_price or 0) != float(cost_price):
+                item.cost_price = cost_price
+                # A manual cost overrides the FIFO layers; they are rebuilt from the next receipt.
+                item.cost_layers = None
 
         if discount is not None:
             if discount < 0 or discount > 100:
@@ -301,33 +311,44 @@ class InventoryService:
         return True
 
     @staticmethod
-    def get_stock_movements(company_id, item_id=None, movement_type=None, period='all', search='', client_id=None, supplier_id=None, page=1, per_page=20):
-        query = StockMovement.query.filter_by(company_id=company_id)
+    def _filter_stock_movements(query, company_id, item_id=None, movement_type=None, period='all', search='', client_id=None, supplier_id=None, item_joined=False):
+        query = query.filter(StockMovement.company_id == company_id)
         
         if item_id:
-            query = query.filter_by(inventory_item_id=item_id)
+            query = query.filter(StockMovement.inventory_item_id == item_id)
             
         if client_id or supplier_id:
             from app.models import PurchaseOrder, Document
-            # Use outer join to allow filtering by contact_id based on reference
-            query = query.outerjoin(
-                PurchaseOrder,
-                StockMovement.reference == ("PO " + PurchaseOrder.order_number)
-            ).outerjoin(
-                Document,
-                StockMovement.reference == ("INV " + Document.document_number)
-            )
-            
+            # Semi-joins on the indexed (source_type, source_id) key: the contact's
+            # documents are found by their own indexes, then their movements by key.
             conditions = []
             if supplier_id:
-                conditions.append(PurchaseOrder.supplier_id == supplier_id)
+                conditions.append(and_(
+                    StockMovement.source_type == StockMovementSource.purchase_order,
+                    StockMovement.source_id.in_(
+                        select(PurchaseOrder.id).where(
+                            PurchaseOrder.company_id == company_id,
+                            PurchaseOrder.supplier_id == supplier_id,
+                        )
+                    ),
+                ))
             if client_id:
-                conditions.append(Document.client_id == client_id)
+                conditions.append(and_(
+                    StockMovement.source_type == StockMovementSource.document,
+                    StockMovement.source_id.in_(
+                        select(Document.id).where(
+                            Document.company_id == company_id,
+                            Document.client_id == client_id,
+                        )
+                    ),
+                ))
             
             query = query.filter(or_(*conditions) if len(conditions) > 1 else conditions[0])
 
         if search:
-            query = query.join(InventoryItem).filter(
+            if not item_joined:
+                query = query.join(InventoryItem, StockMovement.inventory_item_id == InventoryItem.id)
+            query = query.filter(
                 or_(
                     InventoryItem.name.ilike(f'%{search}%'),
                     StockMovement.reference.ilike(f'%{search}%')
@@ -347,7 +368,14 @@ class InventoryService:
         elif period == 'month':
             start_date = today.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
             query = query.filter(StockMovement.date >= start_date)
-            
+
+        return query
+
+    @staticmethod
+    def get_stock_movements(company_id, item_id=None, movement_type=None, period='all', search='', client_id=None, supplier_id=None, page=1, per_page=20):
+        query = InventoryService._filter_stock_movements(
+            StockMovement.query, company_id, item_id, movement_type, period, search, client_id, supplier_id
+        )
         return query.order_by(StockMovement.date.desc()).paginate(page=page, per_page=per_page, error_out=False)
 
     @staticmethod
@@ -387,94 +415,84 @@ class InventoryService:
         ).limit(limit).all()
 
     @staticmethod
+    @reads_from_replica
     def export_inventory_items_xlsx(company_id, search='', supplier_id=None):
-        from openpyxl import Workbook
-        from openpyxl.styles import Font, Alignment
-        
-        pagination = InventoryService.get_inventory_items(
-            company_id=company_id,
-            page=1,
-            per_page=1000000,
-            search=search,
-            supplier_id=supplier_id
+        """Return (spooled xlsx file, filename) streaming every matching item."""
+        from openpyxl.styles import Alignment
+        from app.services.export_service import build_xlsx, stream_query
+
+        query = db.session.query(
+            InventoryItem.name,
+            InventoryItem.description,
+            InventoryItem.quantity,
+            InventoryItem.price,
+            InventoryItem.cost_price,
+            Contact.name,
+        ).select_from(InventoryItem).outerjoin(Contact, InventoryItem.supplier_id == Contact.id)
+        query = InventoryService._filter_inventory_items(query, company_id, search, supplier_id)
+        query = InventoryService._sort_inventory_items(query)
+
+        rows = (
+            [
+                name,
+                description or '',
+                quantity,
+                float(price),
+                float(cost_price),
+                supplier_name or ''
+            ]
+            for name, description, quantity, price, cost_price, supplier_name in stream_query(query)
         )
-        items = pagination.items
-        
-        wb = Workbook()
-        ws = wb.active
-        ws.title = 'Inventario'
-        
+
         headers = ['Nombre', 'Descripción', 'Cantidad', 'Precio', 'Costo', 'Proveedor']
-        ws.append(headers)
-        
-        for col in range(1, len(headers) + 1):
-            cell = ws.cell(row=1, column=col)
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center')
-        
-        for item in items:
-            ws.append([
-                item.name,
-                item.description or '',
-                item.quantity,
-                float(item.price),
-                float(item.cost_price),
-                item.supplier.name if item.supplier else ''
-            ])
+        out = build_xlsx('Inventario', headers, rows, header_alignment=Alignment(horizontal='center'))
             
         filename = f"inventario_{company_id}_{datetime.now(UTC).strftime('%Y%m%d')}.xlsx"
-        return wb, filename
+        return out, filename
 
     @staticmethod
+    @reads_from_replica
     def export_stock_movements_xlsx(company_id, movement_type=None, period='all', search='', client_id=None, supplier_id=None):
-        from openpyxl import Workbook
-        from openpyxl.styles import Font, Alignment
-        
-        # Get all movements without pagination
-        pagination = InventoryService.get_stock_movements(
-            company_id=company_id,
+        """Return (spooled xlsx file, filename) streaming every matching movement."""
+        from openpyxl.styles import Alignment
+        from app.services.export_service import build_xlsx, stream_query
+
+        query = db.session.query(
+            StockMovement.date,
+            StockMovement.type,
+            InventoryItem.name,
+            StockMovement.reference,
+            StockMovement.quantity,
+            StockMovement.notes,
+        ).select_from(StockMovement).outerjoin(InventoryItem, StockMovement.inventory_item_id == InventoryItem.id)
+        query = InventoryService._filter_stock_movements(
+            query, company_id,
             movement_type=movement_type,
             period=period,
             search=search,
             client_id=client_id,
             supplier_id=supplier_id,
-            page=1,
-            per_page=1000000
+            item_joined=True
+        ).order_by(StockMovement.date.desc())
+
+        type_labels = {
+            StockMovementType.incoming: 'Entrada',
+            StockMovementType.outgoing: 'Salida',
+        }
+        rows = (
+            [
+                date.strftime('%Y-%m-%d %H:%M') if date else '',
+                type_labels.get(m_type, 'Ajuste'),
+                prod_name or '',
+                reference or '',
+                StockMovement.signed_quantity(m_type, quantity),
+                notes or ''
+            ]
+            for date, m_type, prod_name, reference, quantity, notes in stream_query(query)
         )
-        movements = pagination.items
-        
-        wb = Workbook()
-        ws = wb.active
-        ws.title = 'Movimientos de Inventario'
-        
+
         headers = ['Fecha', 'Tipo', 'Producto', 'Referencia', 'Cantidad', 'Notas']
-        ws.append(headers)
-        
-        for col in range(1, len(headers) + 1):
-            cell = ws.cell(row=1, column=col)
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center')
-        
-        for m in movements:
-            type_str = ''
-            if m.type == StockMovementType.incoming:
-                type_str = 'Entrada'
-            elif m.type == StockMovementType.outgoing:
-                type_str = 'Salida'
-            else:
-                type_str = 'Ajuste'
-                
-            date_str = m.date.strftime('%Y-%m-%d %H:%M') if m.date else ''
-            prod_name = m.inventory_item.name if m.inventory_item else ''
-            
-            ws.append([
-                date_str,
-                type_str,
-                prod_name,
-                m.reference or '',
-                m.qty_change,
-                m.notes or ''
-            ])
+        out = build_xlsx('Movimientos de Inventario', headers, rows, header_alignment=Alignment(horizontal='center'))
             
         filename = f"movimientos_inventario_{company_id}_{datetime.now(UTC).strftime('%Y%m%d')}.xlsx"
-        return wb, filename
+        return out, filename
@@ -0,0 +1,190 @@
+"""Per-company inventory stats cache.
+
+Stats are built once per company with a single conditional-aggregate query and
+then adjusted by deltas on every flush that creates, deletes or changes an
+inventory item (stock movements, receipts, cost changes, soft deletes), so
+reading them is a primary-key lookup regardless of catalog size.
+
+Writes that bypass the ORM unit of work must call :func:`refresh_inventory_stats`
+once they are committed.
+"""
+from decimal import Decimal
+
+from sqlalchemy import case, delete, event, false, func, insert, select, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.engine_profiles import session_holds_sqlite_write_lock
+from app.models import InventoryItem, InventoryStats, db
+from .low_stock_notifications import LOW_STOCK_THRESHOLD
+
+_stats = InventoryStats.__table__
+_TRACKED_ATTRS = ('company_id', 'quantity', 'cost_price', 'is_service', 'is_deleted')
+_listeners_registered = False
+
+
+def _aggregate_stats(company_id, executor=None):
+    """Compute all counters for a company in one pass over its items."""
+    executor = executor or db.session
+    items = InventoryItem.__table__
+    total_items, low_stock, out_of_stock, total_value = executor.execute(
+        select(
+            func.count(items.c.id),
+            func.coalesce(func.sum(case((items.c.quantity <= LOW_STOCK_THRESHOLD, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((items.c.quantity == 0, 1), else_=0)), 0),
+            func.coalesce(func.sum(case(
+                (items.c.is_service.is_(False), items.c.quantity * items.c.cost_price),
+                else_=0,
+            )), 0),
+        ).where(items.c.company_id == company_id, items.c.is_deleted == false())
+    ).one()
+    return {
+        'total_items': int(total_items),
+        'low_stock_items': int(low_stock),
+        'out_of_stock_items': int(out_of_stock),
+        'total_value': Decimal(str(total_value)),
+    }
+
+
+def _as_response(row):
+    total_items = int(row['total_items'])
+    out_of_stock = int(row['out_of_stock_items'])
+    low_stock = int(row['low_stock_items'])
+    return {
+        'total_items': total_items,
+        'low_stock': low_stock,
+        'low_stock_items': low_stock,
+        'out_of_stock_items': out_of_stock,
+        'total_value': round(float(row['total_value'] or 0), 2),
+        'in_stock_items': total_items - out_of_stock,
+    }
+
+
+def refresh_inventory_stats(company_id):
+    """Rebuild the cached stats of a company from its items.
+
+    Runs in a transaction of its own, so building a missing row while serving
+    a read never commits or discards the caller's session.
+    """
+    if session_holds_sqlite_write_lock(db.session()):
+        # The separate transaction would wait out the busy timeout and fail;
+        # serve the values unstored and build the row on a later read.
+        return _as_response(_aggregate_stats(company_id))
+    try:
+        with db.engine.begin() as connection:
+            values = _aggregate_stats(company_id, connection)
+            connection.execute(delete(_stats).where(_stats.c.company_id == company_id))
+            connection.execute(insert(_stats).values(company_id=company_id, is_deleted=False, **values))
+    except IntegrityError:
+        # Another request built the row concurrently; its values are just as fresh.
+        values = _aggregate_stats(company_id)
+    except OperationalError:
+        # SQLite lock held by another writer: serve the values unstored.
+        values = _aggregate_stats(company_id)
+    return _as_response(values)
+
+
+def get_inventory_stats(company_id):
+    row = db.session.execute(
+        select(_stats.c.total_items, _stats.c.low_stock_items, _stats.c.out_of_stock_items, _stats.c.total_value)
+        .where(_stats.c.company_id == company_id)
+    ).mappings().first()
+    if row is None:
+        return refresh_inventory_stats(company_id)
+    return _as_response(row)
+
+
+def _contribution(company_id, quantity, cost_price, is_service, is_deleted):
+    if is_deleted or company_id is None:
+        return None
+    quantity = int(quantity or 0)
+    value = Decimal(0) if is_service else quantity * Decimal(str(cost_price or 0))
+    return company_id, (1, int(quantity <= LOW_STOCK_THRESHOLD), int(quantity == 0), value)
+
+
+def _previous_values(obj):
+    """Return the flushed values of the tracked attributes, or ``None`` if one is unknown."""
+    state = db.inspect(obj)
+    values = []
+    for key in _TRACKED_ATTRS:
+        history = state.attrs[key].history
+        if history.deleted:
+            values.append(history.deleted[0])
+        elif history.unchanged:
+            values.append(history.unchanged[0])
+        elif not history.added:
+            values.append(getattr(obj, key))  # expired but untouched: load the stored value
+        else:
+            return None  # overwritten without ever being loaded
+    return values
+
+
+def _collect_deltas(session):
+    deltas = {}
+    stale = set()
+
+    def add(contribution, sign):
+        if contribution is None:
+            return
+        company_id, counters = contribution
+        totals = deltas.setdefault(company_id, [0, 0, 0, Decimal(0)])
+        for idx, amount in enumerate(counters):
+            totals[idx] += sign * amount
+
+    for obj in session.new:
+        if isinstance(obj, InventoryItem):
+            add(_contribution(*(getattr(obj, key) for key in _TRACKED_ATTRS)), 1)
+
+    for obj in session.dirty:
+        if not isinstance(obj, InventoryItem) or not session.is_modified(obj):
+            continue
+        previous = _previous_values(obj)
+        if previous is None:
+            stale.add(obj.company_id)
+            continue
+        add(_contribution(*previous), -1)
+        add(_contribution(*(getattr(obj, key) for key in _TRACKED_ATTRS)), 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, InventoryItem):
+            previous = _previous_values(obj)
+            if previous is None:
+                stale.add(obj.company_id)
+            else:
+                add(_contribution(*previous), -1)
+
+    return deltas, stale
+
+
+def register_inventory_stats_listeners():
+    """Keep cached inventory stats in step with every flushed item change.
+
+    ``db.session`` is shared by every app built in the process, so the delta
+    listener is registered once; a second copy would apply each delta twice.
+    """
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    _listeners_registered = True
+
+    @event.listens_for(db.session, 'before_flush')
+    def adjust_inventory_stats(session, flush_context, instances):
+        deltas, stale = _collect_deltas(session)
+        if not deltas and not stale:
+            return
+        connection = session.connection()
+        for company_id, (total, low, out, value) in deltas.items():
+            if company_id in stale or not (total or low or out or value):
+                continue
+            connection.execute(
+                update(_stats)
+                .where(_stats.c.company_id == company_id)
+                .values(
+                    total_items=_stats.c.total_items + total,
+                    low_stock_items=_stats.c.low_stock_items + low,
+                    out_of_stock_items=_stats.c.out_of_stock_items + out,
+                    total_value=_stats.c.total_value + value,
+                )
+            )
+        if stale:
+            # Dropped rows are rebuilt from the aggregate query on the next read.
+            connection.execute(delete(_stats).where(_stats.c.company_id.in_(stale)))
@@ -0,0 +1,252 @@
+"""Reconcile stored stock quantities against the stock movement ledger.
+
+Stock lives in three places: ``InventoryItem.quantity``, ``WarehouseItem.quantity``
+and the signed ``StockMovement`` history. The movement ledger is treated as the
+source of truth; the stored quantities are compared against grouped sums of it.
+
+Transfers are a single outgoing movement with ``destination_warehouse_id`` set:
+they move stock between warehouses but leave the item total unchanged.
+
+Repairs write the ledger values back without an approval or an adjustment
+movement, so they are only offered in batch from the CLI
+(``flask reconcile-stock --repair``).
+"""
+from sqlalchemy import func
+
+from app.models import Company, InventoryItem, StockMovement, Warehouse, WarehouseItem, db
+
+RECONCILE_CHUNK_SIZE = 500
+
+
+def _item_expected_totals(company_id, item_ids):
+    """Return ``{item_id: on_hand}`` summed from movements, ignoring transfers."""
+    rows = (
+        db.session.query(
+            StockMovement.inventory_item_id,
+            func.sum(StockMovement.signed_quantity_expr()),
+        )
+        .filter(
+            StockMovement.company_id == company_id,
+            StockMovement.inventory_item_id.in_(item_ids),
+            StockMovement.destination_warehouse_id.is_(None),
+        )
+        .group_by(StockMovement.inventory_item_id)
+        .all()
+    )
+    return {item_id: int(total or 0) for item_id, total in rows}
+
+
+def _warehouse_expected_totals(company_id, item_ids):
+    """Return ``{(warehouse_id, item_id): on_hand}`` summed from movements.
+
+    The source side of every movement is signed as usual; the destination side
+    of a transfer adds the transferred quantity.
+    """
+    totals = {}
+
+    source_rows = (
+        db.session.query(
+            StockMovement.warehouse_id,
+            StockMovement.inventory_item_id,
+            func.sum(StockMovement.signed_quantity_expr()),
+        )
+        .filter(
+            StockMovement.company_id == company_id,
+            StockMovement.inventory_item_id.in_(item_ids),
+            StockMovement.warehouse_id.isnot(None),
+        )
+        .group_by(StockMovement.warehouse_id, StockMovement.inventory_item_id)
+        .all()
+    )
+    for warehouse_id, item_id, total in source_rows:
+        totals[(warehouse_id, item_id)] = int(total or 0)
+
+    destination_rows = (
+        db.session.query(
+            StockMovement.destination_warehouse_id,
+            StockMovement.inventory_item_id,
+            func.sum(func.abs(StockMovement.quantity)),
+        )
+        .filter(
+            StockMovement.company_id == company_id,
+            StockMovement.inventory_item_id.in_(item_ids),
+            StockMovement.destination_warehouse_id.isnot(None),
+        )
+        .group_by(StockMovement.destination_warehouse_id, StockMovement.inventory_item_id)
+        .all()
+    )
+    for warehouse_id, item_id, total in destination_rows:
+        key = (warehouse_id, item_id)
+        totals[key] = totals.get(key, 0) + int(total or 0)
+
+    return totals
+
+
+def _recorded_warehouse_quantities(company_id, item_ids):
+    rows = (
+        db.session.query(WarehouseItem.warehouse_id, WarehouseItem.inventory_item_id, WarehouseItem.quantity)
+        .join(Warehouse, WarehouseItem.warehouse_id == Warehouse.id)
+        .filter(
+            Warehouse.company_id == company_id,
+            WarehouseItem.inventory_item_id.in_(item_ids),
+        )
+        .all()
+    )
+    return {(warehouse_id, item_id): int(quantity or 0) for warehouse_id, item_id, quantity in rows}
+
+
+def _discrepancy(item_id, recorded, expected, warehouse_id=None):
+    entry = {
+        'inventory_item_id': item_id,
+        'recorded': recorded,
+        'expected': expected,
+        'difference': expected - recorded,
+        # Stored quantities cannot go below zero, so a negative ledger can only be clamped.
+        'negative_ledger': expected < 0,
+    }
+    if warehouse_id is not None:
+        entry['warehouse_id'] = warehouse_id
+    return entry
+
+
+def _ledger_state(company_id, item_ids):
+    """Return (expected item totals, expected warehouse totals, recorded warehouse quantities)."""
+    return (
+        _item_expected_totals(company_id, item_ids),
+        _warehouse_expected_totals(company_id, item_ids),
+        _recorded_warehouse_quantities(company_id, item_ids),
+    )
+
+
+def _compare(recorded_items, ledger_state):
+    """Compare ``{item_id: recorded_quantity}`` against a :func:`_ledger_state` result."""
+    expected_items, expected_warehouses, recorded_warehouses = ledger_state
+
+    item_discrepancies = []
+    for item_id, recorded in recorded_items.items():
+        expected = expected_items.get(item_id, 0)
+        if recorded != max(0, expected):
+            item_discrepancies.append(_discrepancy(item_id, recorded, expected))
+
+    warehouse_discrepancies = []
+    for key in sorted(set(expected_warehouses) | set(recorded_warehouses)):
+        warehouse_id, item_id = key
+        recorded = recorded_warehouses.get(key, 0)
+        expected = expected_warehouses.get(key, 0)
+        if recorded != max(0, expected):
+            warehouse_discrepancies.append(_discrepancy(item_id, recorded, expected, warehouse_id))
+
+    return item_discrepancies, warehouse_discrepancies
+
+
+def _apply_repairs(item_discrepancies, warehouse_discrepancies):
+    """Write ledger quantities back onto the stored copies for one chunk."""
+    if item_discrepancies:
+        targets = {d['inventory_item_id']: max(0, d['expected']) for d in item_discrepancies}
+        for item in InventoryItem.query.filter(InventoryItem.id.in_(list(targets))).all():
+            item.quantity = targets[item.id]
+
+    if warehouse_discrepancies:
+        targets = {
+            (d['warehouse_id'], d['inventory_item_id']): max(0, d['expected'])
+            for d in warehouse_discrepancies
+        }
+        existing = WarehouseItem.query.filter(
+            WarehouseItem.inventory_item_id.in_({item_id for _, item_id in targets}),
+            WarehouseItem.warehouse_id.in_({warehouse_id for warehouse_id, _ in targets}),
+        ).all()
+        for wh_item in existing:
+            key = (wh_item.warehouse_id, wh_item.inventory_item_id)
+            if key in targets:
+                wh_item.quantity = targets.pop(key)
+        for (warehouse_id, item_id), quantity in targets.items():
+            db.session.add(WarehouseItem(warehouse_id=warehouse_id, inventory_item_id=item_id, quantity=quantity))
+
+
+def _iter_item_chunks(company_id, chunk_size):
+    """Yield ``{item_id: quantity}`` chunks of stock-tracked items using keyset pagination."""
+    last_id = 0
+    while True:
+        rows = (
+            db.session.query(InventoryItem.id, InventoryItem.quantity)
+            .filter(
+                InventoryItem.company_id == company_id,
+                InventoryItem.is_service.is_(False),
+                InventoryItem.id > last_id,
+            )
+            .order_by(InventoryItem.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not rows:
+            return
+        yield {item_id: int(quantity or 0) for item_id, quantity in rows}
+        last_id = rows[-1][0]
+
+
+def reconcile_company_stock(company_id, repair=False, chunk_size=RECONCILE_CHUNK_SIZE):
+    """Reconcile every stock-tracked item of a company, optionally repairing drift.
+
+    Repairs are committed per chunk so large catalogs never hold one long transaction.
+    """
+    result = {
+        'company_id': company_id,
+        'checked_items': 0,
+        'item_discrepancies': [],
+        'warehouse_discrepancies': [],
+        'repaired': repair,
+    }
+
+    for recorded_items in _iter_item_chunks(company_id, chunk_size):
+        ledger_state = _ledger_state(company_id, list(recorded_items))
+        item_discrepancies, warehouse_discrepancies = _compare(recorded_items, ledger_state)
+        result['checked_items'] += len(recorded_items)
+        result['item_discrepancies'].extend(item_discrepancies)
+        result['warehouse_discrepancies'].extend(warehouse_discrepancies)
+
+        if repair and (item_discrepancies or warehouse_discrepancies):
+            _apply_repairs(item_discrepancies, warehouse_discrepancies)
+            db.session.commit()
+
+    return result
+
+
+def reconcile_all_companies(repair=False, chunk_size=RECONCILE_CHUNK_SIZE, company_ids=None):
+    """Run :func:`reconcile_company_stock` for each company and yield its result."""
+    query = db.session.query(Company.id).order_by(Company.id)
+    if company_ids:
+        query = query.filter(Company.id.in_(company_ids))
+    for (company_id,) in query.all():
+        yield reconcile_company_stock(company_id, repair=repair, chunk_size=chunk_size)
+
+
+def check_item_stock(company_id, item_id):
+    """Compare one item with its movements, read-only. Returns ``None`` if the item does not exist."""
+    item = InventoryItem.query.filter_by(id=item_id, company_id=company_id).first()
+    if not item:
+        return None
+
+    recorded = int(item.quantity or 0)
+    ledger_state = _ledger_state(company_id, [item.id])
+    expected_items, expected_warehouses, recorded_warehouses = ledger_state
+
+    item_discrepancies, warehouse_discrepancies = ([], []) if item.is_service else _compare(
+        {item.id: recorded}, ledger_state
+    )
+
+    warehouses = [
+        {
+            'warehouse_id': warehouse_id,
+            'recorded': recorded_warehouses.get((warehouse_id, item_id), 0),
+            'expected': expected_warehouses.get((warehouse_id, item_id), 0),
+        }
+        for warehouse_id, item_id in sorted(set(expected_warehouses) | set(recorded_warehouses))
+    ]
+    return {
+        'inventory_item_id': item.id,
+        'is_service': item.is_service,
+        'recorded': recorded,
+        'expected': expected_items.get(item.id, 0),
+        'warehouses': warehouses,
+        'in_sync': not (item_discrepancies or warehouse_discrepancies),
+    }
@@ -0,0 +1,266 @@
+"""Point-in-time stock snapshots and as-of inventory queries.
+
+A snapshot stores, for every item and warehouse of a company, the on-hand
+quantity and unit cost at ``snapshot_date``. Historical stock is answered by
+starting from the latest snapshot at or before the requested date and applying
+only the movements recorded after it, instead of replaying the full history.
+Before the first snapshot, the current quantities are taken back by the
+movements recorded after the requested date, so stock that never had a
+movement (manual edits, data older than the ledger) is still counted and
+historical figures meet the current ones.
+"""
+from datetime import datetime, timedelta, UTC
+
+from sqlalchemy import func, insert
+
+from app.models import Company, InventoryItem, StockMovement, StockSnapshot, WarehouseItem, db
+
+
+def _naive(dt):
+    return dt.replace(tzinfo=None) if dt is not None and dt.tzinfo else dt
+
+
+def month_end_before(dt=None):
+    """Return the last instant of the month preceding ``dt`` (default: now)."""
+    dt = _naive(dt or datetime.now(UTC))
+    first_of_month = dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return first_of_month - timedelta(microseconds=1)
+
+
+def _movement_deltas(company_id, after=None, until=None, item_ids=None):
+    """Return ``{(item_id, warehouse_id): delta}`` for movements in ``(after, until]``.
+
+    Transfers debit the source warehouse and credit the destination, so the
+    buckets of an item always sum to its total on-hand change.
+    """
+    def scoped(query):
+        query = query.filter(StockMovement.company_id == company_id)
+        if after is not None:
+            query = query.filter(StockMovement.date > after)
+        if until is not None:
+            query = query.filter(StockMovement.date <= until)
+        if item_ids is not None:
+            query = query.filter(StockMovement.inventory_item_id.in_(item_ids))
+        return query
+
+    deltas = {}
+    source_rows = scoped(
+        db.session.query(
+            StockMovement.inventory_item_id,
+            StockMovement.warehouse_id,
+            func.sum(StockMovement.signed_quantity_expr()),
+        )
+    ).group_by(StockMovement.inventory_item_id, StockMovement.warehouse_id).all()
+    for item_id, warehouse_id, total in source_rows:
+        deltas[(item_id, warehouse_id)] = int(total or 0)
+
+    destination_rows = scoped(
+        db.session.query(
+            StockMovement.inventory_item_id,
+            StockMovement.destination_warehouse_id,
+            func.sum(func.abs(StockMovement.quantity)),
+        ).filter(StockMovement.destination_warehouse_id.isnot(None))
+    ).group_by(StockMovement.inventory_item_id, StockMovement.destination_warehouse_id).all()
+    for item_id, warehouse_id, total in destination_rows:
+        key = (item_id, warehouse_id)
+        deltas[key] = deltas.get(key, 0) + int(total or 0)
+
+    return deltas
+
+
+def latest_snapshot_date(company_id, as_of=None):
+    query = db.session.query(func.max(StockSnapshot.snapshot_date)).filter(StockSnapshot.company_id == company_id)
+    if as_of is not None:
+        query = query.filter(StockSnapshot.snapshot_date <= _naive(as_of))
+    return query.scalar()
+
+
+def _current_buckets(company_id, item_ids=None):
+    """Return ``{(item_id, warehouse_id): qty}`` on hand now; stock outside any warehouse is keyed ``None``."""
+    items = db.session.query(InventoryItem.id, InventoryItem.quantity).filter(InventoryItem.company_id == company_id)
+    stored = (
+        db.session.query(WarehouseItem.inventory_item_id, WarehouseItem.warehouse_id, WarehouseItem.quantity)
+        .join(InventoryItem, InventoryItem.id == WarehouseItem.inventory_item_id)
+        .filter(InventoryItem.company_id == company_id)
+    )
+    if item_ids is not None:
+        items = items.filter(InventoryItem.id.in_(item_ids))
+        stored = stored.filter(WarehouseItem.inventory_item_id.in_(item_ids))
+
+    buckets = {}
+    unassigned = {item_id: int(quantity or 0) for item_id, quantity in items.all()}
+    for item_id, warehouse_id, quantity in stored.all():
+        buckets[(item_id, warehouse_id)] = int(quantity or 0)
+        if item_id in unassigned:
+            unassigned[item_id] -= int(quantity or 0)
+    for item_id, quantity in unassigned.items():
+        if quantity:
+            buckets[(item_id, None)] = quantity
+    return buckets
+
+
+def _stock_buckets_as_of(company_id, as_of, item_ids=None):
+    """Return (``{(item_id, warehouse_id): qty}``, ``{item_id: snapshot unit cost}``)."""
+    as_of = _naive(as_of)
+    base_date = latest_snapshot_date(company_id, as_of)
+
+    costs = {}
+    if base_date is None:
+        # No snapshot yet: work back from the current stock.
+        buckets = _current_buckets(company_id, item_ids)
+        for key, delta in _movement_deltas(company_id, after=as_of, item_ids=item_ids).items():
+            buckets[key] = buckets.get(key, 0) - delta
+        return buckets, costs
+
+    buckets = {}
+    query = db.session.query(
+        StockSnapshot.inventory_item_id,
+        StockSnapshot.warehouse_id,
+        StockSnapshot.quantity,
+        StockSnapshot.unit_cost,
+    ).filter(
+        StockSnapshot.company_id == company_id,
+        StockSnapshot.snapshot_date == base_date,
+    )
+    if item_ids is not None:
+        query = query.filter(StockSnapshot.inventory_item_id.in_(item_ids))
+    for item_id, warehouse_id, quantity, unit_cost in query.all():
+        buckets[(item_id, warehouse_id)] = int(quantity or 0)
+        costs[item_id] = unit_cost
+
+    for key, delta in _movement_deltas(company_id, after=base_date, until=as_of, item_ids=item_ids).items():
+        buckets[key] = buckets.get(key, 0) + delta
+
+    return buckets, costs
+
+
+def stock_on_hand_as_of(company_id, as_of, item_ids=None, by_warehouse=False):
+    """Return on-hand quantities as of ``as_of`` (inclusive).
+
+    Keys are item ids, or ``(item_id, warehouse_id)`` pairs when ``by_warehouse`` is set.
+    """
+    buckets, _ = _stock_buckets_as_of(company_id, as_of, item_ids)
+    if by_warehouse:
+        return buckets
+
+    totals = {}
+    for (item_id, _warehouse_id), quantity in buckets.items():
+        totals[item_id] = totals.get(item_id, 0) + quantity
+    return totals
+
+
+def inventory_value_as_of(company_id, as_of):
+    """Value stock-tracked items as of ``as_of``.
+
+    Quantities come from the nearest snapshot plus later movements (or, before
+    the first snapshot, the current stock less later movements); each item is
+    valued at its snapshot unit cost, falling back to the current cost price.
+    """
+    buckets, costs = _stock_buckets_as_of(company_id, as_of)
+
+    totals = {}
+    for (item_id, _warehouse_id), quantity in buckets.items():
+        totals[item_id] = totals.get(item_id, 0) + quantity
+
+    value = 0.0
+    items = db.session.query(InventoryItem.id, InventoryItem.cost_price).filter(
+        InventoryItem.company_id == company_id,
+        InventoryItem.is_service.is_(False),
+    )
+    for item_id, cost_price in items.all():
+        quantity = max(0, totals.get(item_id, 0))
+        if quantity:
+            value += quantity * float(costs.get(item_id, cost_price) or 0)
+    return round(value, 2)
+
+
+def take_stock_snapshot(company_id, as_of=None, commit=True):
+    """Store per-item, per-warehouse on-hand and unit cost as of ``as_of`` (default: now).
+
+    The snapshot is built incrementally from the previous one and costs are the
+    item cost prices at the time the snapshot is taken, so month-end snapshots
+    should be taken right after the period closes. Taking a snapshot twice for
+    the same instant replaces the earlier rows.
+    """
+    as_of = _naive(as_of or datetime.now(UTC))
+    buckets, _ = _stock_buckets_as_of(company_id, as_of)
+
+    current_costs = dict(
+        db.session.query(InventoryItem.id, InventoryItem.cost_price).filter(
+            InventoryItem.company_id == company_id,
+            InventoryItem.is_service.is_(False),
+        ).all()
+    )
+
+    StockSnapshot.query.filter(
+        StockSnapshot.company_id == company_id,
+        StockSnapshot.snapshot_date == as_of,
+    ).delete(synchronize_session=False)
+
+    now = datetime.now(UTC)
+    rows = [
+        {
+            'company_id': company_id,
+            'inventory_item_id': item_id,
+            'warehouse_id': warehouse_id,
+            'snapshot_date': as_of,
+            'quantity': quantity,
+            'unit_cost': current_costs[item_id] or 0,
+            'is_deleted': False,
+            'created_at': now,
+            'updated_at': now,
+        }
+        for (item_id, warehouse_id), quantity in buckets.items()
+        if quantity and item_id in current_costs
+    ]
+    if rows:
+        db.session.execute(insert(StockSnapshot), rows)
+
+    if commit:
+        db.session.commit()
+    return {'company_id': company_id, 'snapshot_date': as_of, 'rows': len(rows)}
+
+
+def snapshot_all_companies(as_of=None, company_ids=None):
+    """Take a snapshot for each company and yield its result, committing per company."""
+    query = db.session.query(Company.id).order_by(Company.id)
+    if company_ids:
+        query = query.filter(Company.id.in_(company_ids))
+    for (company_id,) in query.all():
+        yield take_stock_snapshot(company_id, as_of=as_of)
+
+
+def stock_movement_summary(company_id, start_dt, end_dt, item_ids=None):
+    """Return per-item opening, incoming, outgoing and closing quantities for a period.
+
+    Opening balances come from :func:`stock_on_hand_as_of`; only the movements
+    inside the period are aggregated. Transfers do not change item totals and
+    are left out of the incoming/outgoing columns.
+    """
+    start_dt, end_dt = _naive(start_dt), _naive(end_dt)
+    opening = stock_on_hand_as_of(company_id, start_dt - timedelta(microseconds=1), item_ids=item_ids)
+
+    signed = StockMovement.signed_quantity_expr()
+    query = db.session.query(
+        StockMovement.inventory_item_id,
+        func.sum(db.case((signed > 0, signed), else_=0)),
+        func.sum(db.case((signed < 0, -signed), else_=0)),
+    ).filter(
+        StockMovement.company_id == company_id,
+        StockMovement.date >= start_dt,
+        StockMovement.date <= end_dt,
+        StockMovement.destination_warehouse_id.is_(None),
+    )
+    if item_ids is not None:
+        query = query.filter(StockMovement.inventory_item_id.in_(item_ids))
+
+    summary = {
+        item_id: {'opening': quantity, 'incoming': 0, 'outgoing': 0, 'closing': quantity}
+        for item_id, quantity in opening.items()
+    }
+    for item_id, incoming, outgoing in query.group_by(StockMovement.inventory_item_id).all():
+        entry = summary.setdefault(item_id, {'opening': 0, 'incoming': 0, 'outgoing': 0, 'closing': 0})
+        entry['incoming'] = int(incoming or 0)
+        entry['outgoing'] = int(outgoing or 0)
+        entry['closing'] = entry['opening'] + entry['incoming'] - entry['outgoing']
+    return summary
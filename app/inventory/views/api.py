@@ -1,4 +1,5 @@
 import io
+from datetime import datetime, timedelta
 
 from flask import Response, current_app, flash, jsonify, redirect, render_template, request, send_file, session, url_for
 from flask_login import current_user, login_required
@@ -10,7 +11,7 @@ from app.models.enums import ContactType
 from app.utils import resolve_company
 
 from .. import inventory
-from ..services import InventoryService
+from ..services import InventoryService, check_item_stock, inventory_value_as_of, stock_movement_summary
 
 
 @inventory.route('/api/<string:company_id>/inventory/items', methods=['GET'])
@@ -19,21 +20,43 @@ from ..services import InventoryService
 def api_get_items(company_id):
     company = resolve_company(company_id)
     company_id = company.id
-    """Get all inventory items with optional filtering"""
-    page = request.args.get('page', 1, type=int)
+    """Get all inventory items with optional filtering.
+
+    Pass ``cursor`` (empty for the first page) for keyset pagination; without
+    it the numbered ``page`` pagination of existing clients is used.
+    """
     per_page = min(request.args.get('per_page', 20, type=int), 100)
     search = request.args.get('search', '')
     supplier_id = request.args.get('supplier_id')
-    
-    pagination = InventoryService.get_inventory_items(
-        company_id=company_id,
-        page=page,
-        per_page=per_page,
-        search=search,
-        supplier_id=supplier_id
-    )
-    items = pagination.items
-    
+
+    if 'cursor' in request.args:
+        keyset_page = InventoryService.get_inventory_items_page(
+            company_id=company_id,
+            cursor=request.args.get('cursor', ''),
+            per_page=per_page,
+            search=search,
+            supplier_id=supplier_id
+        )
+        items = keyset_page.items
+        pagination_data = keyset_page.as_dict()
+    else:
+        pagination = InventoryService.get_inventory_items(
+            company_id=company_id,
+            page=request.args.get('page', 1, type=int),
+            per_page=per_page,
+            search=search,
+            supplier_id=supplier_id
+        )
+        items = pagination.items
+        pagination_data = {
+            'page': pagination.page,
+            'pages': pagination.pages,
+            'per_page': pagination.per_page,
+            'total': pagination.total,
+            'has_next': pagination.has_next,
+            'has_prev': pagination.has_prev
+        }
+
     return jsonify({
         'items': [{
             'id': item.id,
@@ -46,14 +69,7 @@ def api_get_items(company_id):
             'supplier_id': item.supplier_id,
             'supplier_name': item.supplier.name if item.supplier else None
         } for item in items],
-        'pagination': {
-            'page': pagination.page,
-            'pages': pagination.pages,
-            'per_page': pagination.per_page,
-            'total': pagination.total,
-            'has_next': pagination.has_next,
-            'has_prev': pagination.has_prev
-        }
+        'pagination': pagination_data
     })
 
 
@@ -267,6 +283,19 @@ def api_adjust_stock(company_id, id):
         return jsonify({'error': 'Database error occurred'}), 500
 
 
+@inventory.route('/api/<string:company_id>/inventory/items/<int:id>/reconciliation', methods=['GET'])
+@login_required
+@limiter.exempt
+def api_item_reconciliation(company_id, id):
+    company = resolve_company(company_id)
+    company_id = company.id
+    """Compare an item's stored stock against its movement history"""
+    result = check_item_stock(company_id, id)
+    if result is None:
+        return jsonify({'error': 'Item not found'}), 404
+    return jsonify(result)
+
+
 @inventory.route('/api/<string:company_id>/inventory/search', methods=['GET'])
 @login_required
 @limiter.exempt
@@ -301,3 +330,27 @@ def api_stats(company_id):
     """Get inventory statistics"""
     stats = InventoryService.get_inventory_stats(company_id)
     return jsonify(stats)
+
+
+@inventory.route('/api/<string:company_id>/inventory/stock-summary', methods=['GET'])
+@login_required
+@limiter.exempt
+def api_stock_summary(company_id):
+    company = resolve_company(company_id)
+    company_id = company.id
+    """Opening, incoming, outgoing and closing stock per item for a date range"""
+    try:
+        start_dt = datetime.strptime(request.args.get('start_date', ''), '%Y-%m-%d')
+        end_dt = datetime.strptime(request.args.get('end_date', ''), '%Y-%m-%d') + timedelta(days=1) - timedelta(microseconds=1)
+    except ValueError:
+        return jsonify({'error': 'start_date and end_date are required (YYYY-MM-DD)'}), 400
+    if end_dt < start_dt:
+        return jsonify({'error': 'end_date must not be before start_date'}), 400
+
+    summary = stock_movement_summary(company_id, start_dt, end_dt)
+    return jsonify({
+        'start_date': start_dt.strftime('%Y-%m-%d'),
+        'end_date': end_dt.strftime('%Y-%m-%d'),
+        'closing_value': inventory_value_as_of(company_id, end_dt),
+        'items': [{'inventory_item_id': item_id, **entry} for item_id, entry in sorted(summary.items())],
+    })
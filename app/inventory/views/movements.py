@@ -1,12 +1,12 @@
-import io
-
-from flask import Response, current_app, flash, jsonify, redirect, render_template, request, send_file, session, url_for
+from flask import Response, current_app, flash, jsonify, redirect, render_template, request, session, url_for
 from flask_login import current_user, login_required
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.extensions import limiter
 from app.models import Contact, InventoryItem, db
 from app.models.enums import ContactType
+from app.services.export_service import xlsx_response
+from app.services.job_service import enqueue, job_accepted_response, wants_background
 from app.utils import resolve_company
 
 from .. import inventory
@@ -63,28 +63,22 @@ def movements(company_id):
 def export(company_id):
     company = resolve_company(company_id)
     company_id = company.id
-    import io
-    from flask import send_file
     
     search = request.args.get('search', '')
     supplier_id = request.args.get('supplier_id', type=int)
+
+    if wants_background():
+        job = enqueue('exports.inventory_items_xlsx',
+                      payload={'company_id': company_id, 'search': search, 'supplier_id': supplier_id},
+                      company_id=company_id, user_id=current_user.id)
+        return job_accepted_response(job)
     
-    wb, filename = InventoryService.export_inventory_items_xlsx(
+    out, filename = InventoryService.export_inventory_items_xlsx(
         company_id=company_id,
         search=search,
         supplier_id=supplier_id
     )
-    
-    out = io.BytesIO()
-    wb.save(out)
-    out.seek(0)
-    
-    return send_file(
-        out,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=filename
-    )
+    return xlsx_response(out, filename)
 
 
 @inventory.route('/<string:company_id>/inventory/movements/export')
@@ -98,8 +92,15 @@ def export_movements(company_id):
     period = request.args.get('period', 'all')
     client_id = request.args.get('client_id', type=int)
     supplier_id = request.args.get('supplier_id', type=int)
+
+    if wants_background():
+        job = enqueue('exports.stock_movements_xlsx', payload={
+            'company_id': company_id, 'movement_type': movement_type, 'period': period, 'search': search,
+            'client_id': client_id, 'supplier_id': supplier_id,
+        }, company_id=company_id, user_id=current_user.id)
+        return job_accepted_response(job)
     
-    wb, filename = InventoryService.export_stock_movements_xlsx(
+    out, filename = InventoryService.export_stock_movements_xlsx(
         company_id=company_id,
         movement_type=movement_type,
         period=period,
@@ -107,17 +108,7 @@ def export_movements(company_id):
         client_id=client_id,
         supplier_id=supplier_id
     )
-    
-    out = io.BytesIO()
-    wb.save(out)
-    out.seek(0)
-    
-    return send_file(
-        out,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=filename
-    )
+    return xlsx_response(out, filename)
 
 
 @inventory.route('/<string:company_id>/inventory/<string:sku>/drawer_adjust', methods=['GET'])
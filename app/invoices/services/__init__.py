@@ -6,6 +6,8 @@ from .invoice_update_service import update_invoice_or_quote, delete_invoice_or_q
 
 from .invoice_pdf_service import generate_invoice_pdf, generate_invoice_pdf_from_request
 
+from .overdue_documents import mark_overdue_documents
+
 __all__ = [
     "get_invoice_list",
     "export_invoice_report_xlsx",
@@ -16,4 +18,5 @@ __all__ = [
     "add_invoice_payment",
     "generate_invoice_pdf",
     "generate_invoice_pdf_from_request",
+    "mark_overdue_documents",
 ]
@@ -1,123 +1,39 @@
-from datetime import datetime, date, UTC
+from datetime import datetime, UTC
 from flask import session
 from app.models.document import calculate_document_totals
 from app.models import (
-    db, Document, DocumentItem, InventoryItem, DocumentSequence,
-    DocumentType, Payment, PaymentMethod, StockMovement, StockMovementType, Company
+    db, Document, DocumentItem, InventoryItem,
+    DocumentType, Payment, PaymentMethod, StockMovement, StockMovementSource, StockMovementType, Company
 )
+from app.services.document_numbers import next_document_number, release_invoice_number, sync_invoice_sequence
 
 
-def _generate_document_number(company_id, doc_type):
-    if doc_type == DocumentType.invoice:
-                                                
-                                                                                          
-        seq = db.session.query(DocumentSequence).filter(
-            DocumentSequence.company_id == company_id
-        ).with_for_update().first()
-
-        if not seq:
-            raise Exception("No active CAI configuration found for this company.")
-        
-        if seq.expiration_date < date.today():
-            raise Exception(f"The CAI sequence has expired (Limit date: {seq.expiration_date}).")
-
-        if seq.current >= seq.range_end:
-            raise Exception("The CAI sequence range has been exhausted.")
-
-                                                   
-        seq.current += 1
-        db.session.add(seq)
-        
-                                     
-                                                                      
-        return f"000-001-01-{seq.current:08d}"
-    
-                                                                           
-    company_id_str = str(company_id)
-    type_letter = 'Q' if doc_type == DocumentType.quote else 'X'
-    prefix = f"{type_letter}-{company_id_str}-"
-
-    last_doc = Document.query.filter(
-        Document.company_id == company_id,
-        Document.type == doc_type,
-        Document.document_number.like(f"{prefix}%")
-    ).order_by(Document.document_number.desc()).first()
-
-    try:
-        last_seq = int(last_doc.document_number.split('-')[-1]) if last_doc else 0
-    except ValueError:
-        last_seq = 0
-
-    return f"{prefix}{last_seq + 1:06d}"
+def _generate_document_number(company_id, doc_type, holder=None):
+    return next_document_number(company_id, doc_type.value, holder=holder)
 
 
 def _release_latest_invoice_number(company_id, document):
-    """Return the latest CAI number when its invoice is converted to a quote."""
+    """Give the CAI number back when its invoice is converted to a quote."""
     if document.type != DocumentType.invoice or not document.document_number:
         return False
-
-    try:
-        number = int(document.document_number.rsplit('-', 1)[-1])
-    except (TypeError, ValueError):
-        return False
-
-    seq = db.session.query(DocumentSequence).filter(
-        DocumentSequence.company_id == company_id
-    ).with_for_update().first()
-
-    if not seq or number != seq.current or seq.current <= seq.range_start:
-        return False
-
-    seq.current -= 1
-    db.session.add(seq)
-    return True
+    return release_invoice_number(company_id, document.document_number, reason='converted_to_quote')
 
 
 def sync_document_sequence(company_id):
     """
-    Recalculate the active sequence's current value based on the maximum document 
-    number matching the CAI prefix in the database.
-    This handles gaps when invoices are deleted or numbers are manually edited.
+    Recalculate the active sequence's current value from the highest invoice
+    number in use. This handles gaps when invoices are deleted or numbers are
+    manually edited.
     """
-    seq = db.session.query(DocumentSequence).filter(
-        DocumentSequence.company_id == company_id
-    ).with_for_update().first()
-
-    if not seq:
-        return
-
-    # Prefix format: 000-001-01- (assuming standard CAI format, len=11)
-    # The prefix can be inferred from the last generated document or we use the standard:
-    # Actually, the prefix depends on how it was generated, but it's typically 3-3-2 format.
-    # We can just fetch all invoice document numbers for the company that have '-'
-    docs = Document.query.filter(
-        Document.company_id == company_id,
-        Document.type == DocumentType.invoice,
-        Document.document_number.isnot(None),
-        Document.is_deleted == False
-    ).all()
-
-    max_val = seq.range_start - 1
-    for doc in docs:
-        try:
-            # Assumes format XXX-XXX-XX-00000000
-            parts = doc.document_number.split('-')
-            if len(parts) >= 4:
-                val = int(parts[-1])
-                if val > max_val:
-                    max_val = val
-        except (ValueError, TypeError):
-            continue
+    sync_invoice_sequence(company_id)
 
-    seq.current = max_val
-    db.session.add(seq)
-    db.session.flush()
-def create_invoice_or_quote(company_id, form, user_id, *, commit=True):
+
+def create_invoice_or_quote(company_id, form, user_id, *, commit=True, number_holder=None):
     doc_type = DocumentType[form.get("type", "invoice")]
 
     document_number = form.get("document_number")
     if not document_number:
-        document_number = _generate_document_number(company_id, doc_type)
+        document_number = _generate_document_number(company_id, doc_type, holder=number_holder)
 
     warehouse_id = form.get("warehouse_id")
     if warehouse_id:
@@ -193,6 +109,8 @@ def create_invoice_or_quote(company_id, form, user_id, *, commit=True):
                     type=StockMovementType.outgoing,
                     quantity=-qty,
                     reference=f"INV {document_number}",
+                    source_type=StockMovementSource.document,
+                    source_id=document.id,
                     date=document.issued_date or datetime.now(UTC)
                 )
                 db.session.add(movement)
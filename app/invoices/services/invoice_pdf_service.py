@@ -18,13 +18,7 @@ from io import BytesIO
 
 from app.extensions import get_locale
 from flask import current_app, render_template_string
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
-from PyPDF2 import PdfReader, PdfWriter
-from num2words import num2words
-from xhtml2pdf import pisa
+from app.lazy_backends import number_words, pdf_canvas, pdf_metrics, pdf_pagesizes, pdf_ttfonts, pisa, pypdf
 
 from app.models import (
     Contact,
@@ -166,7 +160,7 @@ def _generate_html_pdf(document, template, currency, tax_rate, include_tax, sell
     }
 
     def number_to_words(amount: float) -> str:
-        return num2words(round(amount, 2), lang="es")
+        return number_words.num2words(round(amount, 2), lang="es")
 
     words = number_to_words(tax_data["total_final"])
     
@@ -243,20 +237,20 @@ def _generate_overlay_pdf(document, template, currency, tax_rate, include_tax, s
     if not os.path.exists(template_path):
         raise FileNotFoundError(f"PDF template not found: {template_path!r}")
 
-    template_pdf = PdfReader(template_path)
+    template_pdf = pypdf.PdfReader(template_path)
 
     try:
         font_dir = os.path.join(current_app.static_folder, "fonts")
-        pdfmetrics.registerFont(TTFont("Arial",      os.path.join(font_dir, "arial.ttf")))
-        pdfmetrics.registerFont(TTFont("Arial-Bold", os.path.join(font_dir, "arial-bold.ttf")))
+        pdf_metrics.registerFont(pdf_ttfonts.TTFont("Arial",      os.path.join(font_dir, "arial.ttf")))
+        pdf_metrics.registerFont(pdf_ttfonts.TTFont("Arial-Bold", os.path.join(font_dir, "arial-bold.ttf")))
         font_name, font_bold = "Arial", "Arial-Bold"
     except Exception:
         font_name, font_bold = "Helvetica", "Helvetica-Bold"
 
-    _width, height = A4
+    _width, height = pdf_pagesizes.A4
     items_per_page = layout.items.items_per_page
     total_pages = math.ceil(len(document_items) / items_per_page) or 1
-    output_pdf = PdfWriter()
+    output_pdf = pypdf.PdfWriter()
 
     subtotal = round(float(document.subtotal or 0), 2)
     imp_15 = round(float(document.tax_amount or 0), 2) if include_tax else 0.0
@@ -273,7 +267,7 @@ def _generate_overlay_pdf(document, template, currency, tax_rate, include_tax, s
     }
 
     def number_to_words(amount: float) -> str:
-        return num2words(round(amount, 2), lang="es")
+        return number_words.num2words(round(amount, 2), lang="es")
 
     for page_num in range(total_pages):
         page_items = document_items[
@@ -282,7 +276,7 @@ def _generate_overlay_pdf(document, template, currency, tax_rate, include_tax, s
 
         template_page  = copy.deepcopy(template_pdf.pages[0])
         overlay_buffer = BytesIO()
-        c = canvas.Canvas(overlay_buffer, pagesize=A4)
+        c = pdf_canvas.Canvas(overlay_buffer, pagesize=pdf_pagesizes.A4)
 
         _draw_header(c, document, page_num, total_pages, height,
                      font_name, font_bold, seller_name, layout.header)
@@ -295,7 +289,7 @@ def _generate_overlay_pdf(document, template, currency, tax_rate, include_tax, s
 
         c.save()
         overlay_buffer.seek(0)
-        overlay_pdf = PdfReader(overlay_buffer)
+        overlay_pdf = pypdf.PdfReader(overlay_buffer)
         template_page.merge_page(overlay_pdf.pages[0])
         output_pdf.add_page(template_page)
         overlay_buffer.close()
@@ -1,24 +1,30 @@
-from sqlalchemy import or_
+from sqlalchemy import func, or_
 from datetime import datetime
 from flask import current_app
-from app.models import db, Document, Contact, DocumentType
+from app.extensions import reads_from_replica
+from app.models import db, Company, Document, Contact, DocumentType, Payment
 
 
-def build_invoice_query(company_id, filters):
+def _invoice_criteria(company_id, filters):
+    """Return the WHERE criteria for the invoice list filters.
+
+    When a search term is present the criteria reference ``Contact``, so the
+    caller must join it.
+    """
     search = filters.get("search", "")
     status = filters.get("status", "")
     doc_type = filters.get("type", "")
     date_from = filters.get("date_from", "")
     date_to = filters.get("date_to", "")
 
-    query = db.session.query(Document).filter(
+    criteria = [
         Document.company_id == company_id,
         or_(Document.type == DocumentType.invoice,
             Document.type == DocumentType.quote)
-    )
+    ]
 
     if search:
-        query = query.outerjoin(Contact).filter(
+        criteria.append(
             or_(
                 Document.document_number.ilike(f"%{search}%"),
                 Contact.name.ilike(f"%{search}%")
@@ -26,16 +32,16 @@ def build_invoice_query(company_id, filters):
         )
 
     if status:
-        query = query.filter(Document.status == status)
+        criteria.append(Document.status == status)
 
     if doc_type == "invoice":
-        query = query.filter(Document.type == DocumentType.invoice)
+        criteria.append(Document.type == DocumentType.invoice)
     elif doc_type == "quote":
-        query = query.filter(Document.type == DocumentType.quote)
+        criteria.append(Document.type == DocumentType.quote)
 
     if date_from:
         try:
-            query = query.filter(
+            criteria.append(
                 Document.issued_date >= datetime.strptime(date_from, "%Y-%m-%d")
             )
         except ValueError:
@@ -43,12 +49,22 @@ def build_invoice_query(company_id, filters):
 
     if date_to:
         try:
-            query = query.filter(
+            criteria.append(
                 Document.issued_date <= datetime.strptime(date_to, "%Y-%m-%d")
             )
         except ValueError:
             current_app.logger.warning(f"Invalid date_to format: {date_to}")
 
+    return criteria
+
+
+def build_invoice_query(company_id, filters):
+    query = db.session.query(Document)
+
+    if filters.get("search", ""):
+        query = query.outerjoin(Contact)
+
+    query = query.filter(*_invoice_criteria(company_id, filters))
     query = query.order_by(Document.id.desc())
     return query
 
@@ -66,19 +82,38 @@ def get_invoice_list(company_id, filters):
     return pagination
 
 
+@reads_from_replica
 def export_invoice_report_xlsx(company_id, filters):
-    """Return (workbook, filename) for all invoice rows matching the active filters."""
+    """Return (spooled xlsx file, filename) streaming every invoice row matching the active filters."""
     from datetime import UTC
-    from openpyxl import Workbook
     from openpyxl.styles import Alignment, Font, PatternFill
-    from openpyxl.utils import get_column_letter
-
-    query = build_invoice_query(company_id, filters)
-    documents = query.all()
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Facturas"
+    from app.services.export_service import build_xlsx, stream_query
+
+    paid_totals = db.session.query(
+        Payment.document_id.label("document_id"),
+        func.sum(Payment.amount).label("paid"),
+    ).filter(
+        Payment.company_id == company_id
+    ).group_by(Payment.document_id).subquery()
+
+    query = db.session.query(
+        Document.document_number,
+        Contact.name,
+        Document.type,
+        Document.status,
+        Document.issued_date,
+        Document.due_date,
+        Document.subtotal_cache,
+        Document.tax_cache,
+        Document.total_amount,
+        func.coalesce(paid_totals.c.paid, 0),
+    ).select_from(Document).outerjoin(
+        Contact, Document.client_id == Contact.id
+    ).outerjoin(
+        paid_totals, paid_totals.c.document_id == Document.id
+    ).filter(
+        *_invoice_criteria(company_id, filters)
+    ).order_by(Document.id.desc())
 
     headers = [
         "N° Documento",
@@ -93,13 +128,6 @@ def export_invoice_report_xlsx(company_id, filters):
         "Pagado",
         "Saldo",
     ]
-    ws.append(headers)
-
-    header_fill = PatternFill("solid", fgColor="E2F5EC")
-    for cell in ws[1]:
-        cell.font = Font(bold=True, color="14532D")
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal="center")
 
     type_labels = {
         "invoice": "Factura",
@@ -118,42 +146,50 @@ def export_invoice_report_xlsx(company_id, filters):
         "exchange": "Intercambio",
     }
 
-    for document in documents:
-        subtotal = float(document.subtotal or 0)
-        tax = float(document.tax_amount or 0)
-        total = float(document.total_amount or 0)
-        paid = document.calculate_paid_amount()
-        balance = document.calculate_balance_due()
-        doc_type = document.type.value if document.type else ""
-        status = document.status.value if document.status else ""
-
-        ws.append([
-            document.document_number,
-            document.client.name if document.client else "",
-            type_labels.get(doc_type, doc_type),
-            status_labels.get(status, status),
-            document.issued_date.strftime("%Y-%m-%d") if document.issued_date else "",
-            document.due_date.strftime("%Y-%m-%d") if document.due_date else "",
-            subtotal,
-            tax,
-            total,
-            paid,
-            balance,
-        ])
-
-    for row in ws.iter_rows(min_row=2, min_col=7, max_col=11):
-        for cell in row:
-            cell.number_format = '#,##0.00'
-
-    widths = [18, 28, 14, 16, 16, 18, 14, 14, 14, 14, 14]
-    for idx, width in enumerate(widths, start=1):
-        ws.column_dimensions[get_column_letter(idx)].width = width
-
-    ws.freeze_panes = "A2"
-    ws.auto_filter.ref = ws.dimensions
+    # Documents saved before the totals were cached: take the tax back out of the total.
+    tax_rate = float(db.session.query(Company.tax_rate).filter(Company.id == company_id).scalar() or 0)
+
+    def rows():
+        for (document_number, client_name, doc_type, status, issued_date, due_date,
+             subtotal, tax, total, paid) in stream_query(query):
+            total = float(total or 0)
+            if subtotal is None:
+                subtotal = total - float(tax) if tax is not None else round(total * 100 / (100 + tax_rate), 2)
+            if tax is None:
+                tax = round(total - float(subtotal), 2)
+            paid = round(float(paid or 0), 2)
+            doc_type = doc_type.value if doc_type else ""
+            status = status.value if status else ""
+
+            yield [
+                document_number,
+                client_name or "",
+                type_labels.get(doc_type, doc_type),
+                status_labels.get(status, status),
+                issued_date.strftime("%Y-%m-%d") if issued_date else "",
+                due_date.strftime("%Y-%m-%d") if due_date else "",
+                float(subtotal or 0),
+                float(tax or 0),
+                total,
+                paid,
+                round(total - paid, 2),
+            ]
+
+    out = build_xlsx(
+        "Facturas",
+        headers,
+        rows(),
+        header_font=Font(bold=True, color="14532D"),
+        header_fill=PatternFill("solid", fgColor="E2F5EC"),
+        header_alignment=Alignment(horizontal="center"),
+        column_widths=[18, 28, 14, 16, 16, 18, 14, 14, 14, 14, 14],
+        number_formats={idx: '#,##0.00' for idx in range(6, 11)},
+        freeze_header=True,
+        auto_filter=True,
+    )
 
     status = filters.get("status") or "todos"
     doc_type = filters.get("type") or "documentos"
     date_stamp = datetime.now(UTC).strftime("%Y%m%d")
     filename = f"facturas_{doc_type}_{status}_{date_stamp}.xlsx"
-    return wb, filename
+    return out, filename
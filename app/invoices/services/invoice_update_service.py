@@ -1,5 +1,5 @@
 from app.models.document import calculate_document_totals
-from app.models import db, DocumentItem, InventoryItem, DocumentType, StockMovement, StockMovementType
+from app.models import db, DocumentItem, InventoryItem, DocumentType, StockMovement, StockMovementSource, StockMovementType
 from datetime import datetime, UTC
 
 
@@ -79,7 +79,8 @@ def update_invoice_or_quote(document, form):
     # Get current stock deductions from StockMovements
     movements = StockMovement.query.filter_by(
         company_id=document.company_id,
-        reference=f"INV {document.document_number}",
+        source_type=StockMovementSource.document,
+        source_id=document.id,
         type=StockMovementType.outgoing
     ).all()
     
@@ -134,6 +135,8 @@ def update_invoice_or_quote(document, form):
                         type=StockMovementType.outgoing,
                         quantity=-target_qty,
                         reference=f"INV {document.document_number}",
+                        source_type=StockMovementSource.document,
+                        source_id=document.id,
                         date=document.issued_date or datetime.now(UTC)
                     )
                     db.session.add(m)
@@ -169,6 +172,7 @@ def delete_invoice_or_quote(document):
     
     if document.type == DocumentType.invoice:
         sync_document_sequence(document.company_id)
+        db.session.commit()
 
 
 def add_invoice_payment(document, form, files=None):
@@ -0,0 +1,81 @@
+from datetime import datetime, UTC
+
+from app.models import Document, Notification, db
+from app.models.enums import DocumentStatus, DocumentType
+
+# Statuses that expire once the due date has passed.
+EXPIRABLE_STATUSES = (
+    DocumentStatus.draft,
+    DocumentStatus.sent,
+    DocumentStatus.issued,
+    DocumentStatus.partial,
+    DocumentStatus.pending,
+)
+
+
+def _invoice_link(document):
+    return f'/{document.company_id}/invoices/{document.id}'
+
+
+def _notification_exists(document, link_url):
+    return Notification.query.filter(
+        Notification.user_id == document.user_id,
+        Notification.company_id == document.company_id,
+        Notification.type == 'warning',
+        Notification.link_url == link_url,
+    ).first() is not None
+
+
+def _create_expired_invoice_notification(document, now):
+    if document.type != DocumentType.invoice or not document.user_id:
+        return False
+
+    link_url = _invoice_link(document)
+    if _notification_exists(document, link_url):
+        return False
+
+    invoice_number = document.document_number or f'#{document.id}'
+    due_date = document.due_date.strftime('%d/%m/%Y') if document.due_date else 'sin fecha'
+    balance_due = document.calculate_balance_due()
+    body = (
+        f'La factura {invoice_number} vencio el {due_date}. '
+        f'Saldo pendiente: {balance_due:,.2f}.'
+    )
+
+    db.session.add(Notification(
+        user_id=document.user_id,
+        company_id=document.company_id,
+        type='warning',
+        title=f'Factura vencida {invoice_number}',
+        message=body,
+        body=body,
+        link_url=link_url,
+        priority='high',
+        channel='in_app',
+        status='unread',
+        is_popup=True,
+        sent_at=now,
+    ))
+    return True
+
+
+def mark_overdue_documents(commit=True):
+    """Move documents past their due date to overdue and notify the invoice owner once."""
+    now = datetime.now(UTC)
+    expired_docs = Document.query.filter(
+        Document.due_date < now,
+        Document.status.in_(EXPIRABLE_STATUSES),
+    ).all()
+
+    notification_count = 0
+    for doc in expired_docs:
+        notification_count += 1 if _create_expired_invoice_notification(doc, now) else 0
+        doc.status = DocumentStatus.overdue
+
+    if commit:
+        db.session.commit()
+
+    return {
+        'updated_documents': len(expired_docs),
+        'created_notifications': notification_count,
+    }
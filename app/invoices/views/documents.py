@@ -1,6 +1,6 @@
 from datetime import UTC, datetime
 
-from flask import flash, jsonify, make_response, redirect, render_template, request, send_file, session, url_for
+from flask import flash, jsonify, make_response, redirect, render_template, request, session, url_for
 from flask_login import current_user, login_required
 from flask_wtf.csrf import validate_csrf
 from sqlalchemy import or_
@@ -9,6 +9,8 @@ from wtforms import ValidationError
 from app.extensions import limiter
 from app.models import Contact, Document, DocumentItem, DocumentType, InventoryItem, Payment, PaymentMethod, Project, db
 from app.models.enums import ContactType, DocumentStatus
+from app.services.export_service import xlsx_response
+from app.services.job_service import enqueue, job_accepted_response, wants_background
 from app.utils import resolve_company
 
 from .. import invoices
@@ -59,19 +61,14 @@ def index(company_id):
 def export(company_id):
     company = resolve_company(company_id)
     company_id = company.id
-    import io
-
-    wb, filename = export_invoice_report_xlsx(company_id, request.args)
-    out = io.BytesIO()
-    wb.save(out)
-    out.seek(0)
-
-    return send_file(
-        out,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=filename
-    )
+
+    if wants_background():
+        job = enqueue('exports.invoices_xlsx', payload={'company_id': company_id, 'filters': request.args.to_dict()},
+                      company_id=company_id, user_id=current_user.id)
+        return job_accepted_response(job)
+
+    out, filename = export_invoice_report_xlsx(company_id, request.args)
+    return xlsx_response(out, filename)
 
 
 @invoices.route('/invoices/item-row', methods=['POST'])
@@ -359,6 +356,7 @@ def update(company_id, id):
         if number_changed and document.type == DocumentType.invoice:
             from app.invoices.services import sync_document_sequence
             sync_document_sequence(company_id)
+            db.session.commit()
 
         doc_type_name = (
             'Invoice'
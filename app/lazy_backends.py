@@ -0,0 +1,58 @@
+"""Deferred imports of the heavy PDF, barcode and spreadsheet libraries.
+
+xhtml2pdf alone pulls in pyHanko, cryptography and lxml, which adds about a
+second to every worker boot and cron job although only PDF downloads need it.
+Code that renders documents imports the proxies below instead of the
+libraries; each one imports its module on first attribute access::
+
+    from app.lazy_backends import pisa
+    pisa.CreatePDF(...)
+"""
+import importlib
+import threading
+
+HEAVY_MODULES = ('xhtml2pdf', 'reportlab', 'PyPDF2', 'num2words', 'openpyxl', 'barcode')
+
+_import_lock = threading.Lock()
+
+
+class LazyModule:
+    """Stand-in for a module that is imported the first time one of its attributes is used."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            with _import_lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f'<LazyModule {self._name!r} ({state})>'
+
+
+# PDF
+pisa = LazyModule('xhtml2pdf.pisa')
+pdf_canvas = LazyModule('reportlab.pdfgen.canvas')
+pdf_pagesizes = LazyModule('reportlab.lib.pagesizes')
+pdf_metrics = LazyModule('reportlab.pdfbase.pdfmetrics')
+pdf_ttfonts = LazyModule('reportlab.pdfbase.ttfonts')
+pypdf = LazyModule('PyPDF2')
+number_words = LazyModule('num2words')
+
+# Barcodes
+barcode = LazyModule('barcode')
+barcode_writer = LazyModule('barcode.writer')
+
+# Spreadsheets
+openpyxl = LazyModule('openpyxl')
+openpyxl_cell = LazyModule('openpyxl.cell')
+openpyxl_styles = LazyModule('openpyxl.styles')
+openpyxl_utils = LazyModule('openpyxl.utils')
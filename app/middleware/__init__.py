@@ -1,5 +1,6 @@
 from .rbac import init_rbac
 from .audit import register_audit_listeners
 from .error_handler import init_error_handlers
+from .instrumentation import init_instrumentation
 
-__all__ = ['init_rbac', 'register_audit_listeners', 'init_error_handlers']
+__all__ = ['init_rbac', 'register_audit_listeners', 'init_error_handlers', 'init_instrumentation']
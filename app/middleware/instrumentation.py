@@ -0,0 +1,218 @@
+"""
+Request instrumentation
+=======================
+Plugged into the app via ``init_instrumentation(app)`` in ``app/__init__.py``.
+
+Every request records its latency, SQL statement count, total SQL time, its
+slowest statements and its most repeated statement (the usual N+1 signature).
+Records go to an in-memory ring buffer and to a rolling per-endpoint sample
+window, both shown in the support portal (``support.performance``). Data is
+per process: each worker reports its own traffic.
+
+Configuration
+-------------
+* ``INSTRUMENTATION_ENABLED``      – turn the hooks on (default ``True``).
+* ``INSTRUMENTATION_BUFFER_SIZE``  – requests kept in the ring buffer.
+* ``INSTRUMENTATION_ENDPOINT_SAMPLES`` – samples kept per endpoint.
+* ``INSTRUMENTATION_SERVER_TIMING`` – add a ``Server-Timing`` response header.
+* ``SLOW_REQUEST_MS``              – log requests slower than this (0 disables).
+"""
+
+import heapq
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, UTC
+
+from flask import Flask, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open.
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500)
+SLOWEST_STATEMENTS = 5
+STATEMENT_PREVIEW_CHARS = 300
+
+_engine_listeners_registered = False
+
+
+class RequestMetrics:
+    """Thread-safe store of recent request records and per-endpoint samples."""
+
+    def __init__(self, buffer_size=200, endpoint_samples=500):
+        self.endpoint_samples = endpoint_samples
+        self.recent = deque(maxlen=buffer_size)
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def record(self, entry):
+        with self._lock:
+            self.recent.append(entry)
+            samples = self._endpoints.get(entry['endpoint'])
+            if samples is None:
+                samples = self._endpoints[entry['endpoint']] = deque(maxlen=self.endpoint_samples)
+            samples.append((entry['duration_ms'], entry['query_count'], entry['sql_ms']))
+
+    def reset(self):
+        with self._lock:
+            self.recent.clear()
+            self._endpoints.clear()
+
+    def recent_requests(self, limit=None, min_duration_ms=0):
+        with self._lock:
+            entries = [e for e in reversed(self.recent) if e['duration_ms'] >= min_duration_ms]
+        return entries[:limit] if limit else entries
+
+    def endpoint_summary(self):
+        """Per-endpoint percentiles, query averages and histogram, slowest p95 first."""
+        with self._lock:
+            snapshot = {endpoint: list(samples) for endpoint, samples in self._endpoints.items()}
+
+        summary = []
+        for endpoint, samples in snapshot.items():
+            durations = sorted(s[0] for s in samples)
+            count = len(durations)
+            histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+            for duration in durations:
+                histogram[_bucket_index(duration)] += 1
+            summary.append({
+                'endpoint': endpoint,
+                'count': count,
+                'p50_ms': _percentile(durations, 50),
+                'p95_ms': _percentile(durations, 95),
+                'p99_ms': _percentile(durations, 99),
+                'max_ms': durations[-1],
+                'avg_queries': round(sum(s[1] for s in samples) / count, 1),
+                'max_queries': max(s[1] for s in samples),
+                'avg_sql_ms': round(sum(s[2] for s in samples) / count, 1),
+                'histogram': histogram,
+            })
+        summary.sort(key=lambda row: row['p95_ms'], reverse=True)
+        return summary
+
+
+def _bucket_index(duration_ms):
+    for idx, bound in enumerate(LATENCY_BUCKETS_MS):
+        if duration_ms <= bound:
+            return idx
+    return len(LATENCY_BUCKETS_MS)
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+def bucket_labels():
+    labels = [f'≤{bound}' for bound in LATENCY_BUCKETS_MS]
+    labels.append(f'>{LATENCY_BUCKETS_MS[-1]}')
+    return labels
+
+
+def get_request_metrics():
+    return current_app.extensions['request_metrics']
+
+
+def _register_engine_listeners():
+    global _engine_listeners_registered
+    if _engine_listeners_registered:
+        return
+    _engine_listeners_registered = True
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def _record_query(conn, cursor, statement, parameters, context, executemany):
+        timers = conn.info.get('query_start_time')
+        if not timers:
+            return
+        started = timers.pop()
+        if not has_request_context():
+            return
+        stats = g.get('_query_stats')
+        if stats is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        stats['count'] += 1
+        stats['sql_ms'] += elapsed_ms
+        stats['statements'][statement] += 1
+        # Min-heap of the slowest statements seen so far.
+        heapq.heappush(stats['slowest'], (elapsed_ms, stats['count'], statement))
+        if len(stats['slowest']) > SLOWEST_STATEMENTS:
+            heapq.heappop(stats['slowest'])
+
+    @event.listens_for(Engine, 'handle_error')
+    def _discard_query_timer(exception_context):
+        # after_cursor_execute does not run for a failed statement; drop its timer
+        # so pooled connections do not collect one entry per error.
+        conn = exception_context.connection
+        if conn is None or conn.invalidated:
+            return
+        timers = conn.info.get('query_start_time')
+        if timers:
+            timers.pop()
+
+
+def init_instrumentation(app: Flask):
+    if not app.config.get('INSTRUMENTATION_ENABLED', True):
+        return
+
+    metrics = RequestMetrics(
+        buffer_size=int(app.config.get('INSTRUMENTATION_BUFFER_SIZE', 200)),
+        endpoint_samples=int(app.config.get('INSTRUMENTATION_ENDPOINT_SAMPLES', 500)),
+    )
+    app.extensions['request_metrics'] = metrics
+    _register_engine_listeners()
+
+    @app.before_request
+    def start_request_timer():
+        g._request_started = time.perf_counter()
+        g._query_stats = {'count': 0, 'sql_ms': 0.0, 'statements': Counter(), 'slowest': []}
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.get('_request_started')
+        stats = g.pop('_query_stats', None)
+        if started is None or stats is None or request.endpoint == 'static':
+            return response
+
+        duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        sql_ms = round(stats['sql_ms'], 2)
+        repeated_statement, repeated_count = (stats['statements'].most_common(1) or [(None, 0)])[0]
+        entry = {
+            'timestamp': datetime.now(UTC),
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint or '<unmatched>',
+            'status': response.status_code,
+            'duration_ms': duration_ms,
+            'query_count': stats['count'],
+            'sql_ms': sql_ms,
+            'slowest_statements': [
+                {'duration_ms': round(ms, 2), 'statement': statement[:STATEMENT_PREVIEW_CHARS]}
+                for ms, _seq, statement in sorted(stats['slowest'], reverse=True)
+            ],
+            'most_repeated': {
+                'count': repeated_count,
+                'statement': (repeated_statement or '')[:STATEMENT_PREVIEW_CHARS],
+            } if repeated_count > 1 else None,
+        }
+        metrics.record(entry)
+
+        if app.config.get('INSTRUMENTATION_SERVER_TIMING'):
+            response.headers.add(
+                'Server-Timing',
+                f'db;dur={sql_ms};desc="{stats["count"]} queries", app;dur={duration_ms}',
+            )
+
+        slow_ms = float(app.config.get('SLOW_REQUEST_MS') or 0)
+        if slow_ms and duration_ms >= slow_ms:
+            app.logger.warning(
+                "Slow request %s %s (%s): %.1f ms, %d queries, %.1f ms SQL",
+                request.method, request.path, entry['endpoint'], duration_ms, stats['count'], sql_ms,
+            )
+        return response
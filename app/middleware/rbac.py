@@ -66,6 +66,8 @@ ROUTE_PERMISSIONS: dict[str, str] = {
     'inventory.api_delete_item':  'inventory.delete',
     'inventory.api_get_item':     'inventory.view',
     'inventory.api_get_items':    'inventory.view',
+    'inventory.api_item_reconciliation': 'inventory.view',
+    'inventory.api_stock_summary':       'inventory.view',
     'inventory.api_search':       'inventory.view',
     'inventory.api_stats':        'inventory.view',
     'inventory.api_update_item':  'inventory.manage',
@@ -1,5 +1,5 @@
 from app.extensions import db, migrate
-from .enums import DocumentType, DocumentStatus, InvoiceType, StockMovementType, PaymentMethod, AccountType, UserStatus, ContactType, EmployeeClass, PayPeriod, LeaveType, LeaveStatus, PTOAccrualPeriod, ExpenseStatus, TransactionType, ApprovalStatus
+from .enums import DocumentType, DocumentStatus, InvoiceType, StockMovementType, PaymentMethod, AccountType, AccountRole, UserStatus, ContactType, EmployeeClass, PayPeriod, LeaveType, LeaveStatus, PTOAccrualPeriod, ExpenseStatus, TransactionType, ApprovalStatus, CostingMethod, StockMovementSource
 from .associations import role_permissions, user_companies, expense_tags, ledger_entry_tags
 from .company import Company
 from .role import Role
@@ -16,7 +16,10 @@ from .payment import Payment
 from .report import Report
 from .notification import Notification
 from .stock_movement import StockMovement
-from .document_sequence import DocumentSequence
+from .stock_snapshot import StockSnapshot
+from .inventory_stats import InventoryStats
+from .contact_stats import ContactStats
+from .document_sequence import DocumentSequence, DocumentNumberBlock, DocumentNumberGap
 from .account import Account
 from .project import Project
 from .expense import Expense
@@ -36,17 +39,20 @@ from .work_schedule import WorkSchedule
 from .token import Token
 from .accounting_attachment import AccountingAttachment
 from .approval_request import ApprovalRequest
+from .background_job import BackgroundJob
+from .outbound_email import OutboundEmail
 
 __all__ = [
     'db', 'migrate',
-    'DocumentType', 'DocumentStatus', 'InvoiceType', 'StockMovementType', 'PaymentMethod', 'AccountType', 'UserStatus', 'ContactType', 'DocumentTemplateType',
+    'DocumentType', 'DocumentStatus', 'InvoiceType', 'StockMovementType', 'PaymentMethod', 'AccountType', 'AccountRole', 'UserStatus', 'ContactType', 'DocumentTemplateType',
     'EmployeeClass', 'PayPeriod', 'LeaveType', 'LeaveStatus', 'PTOAccrualPeriod',
-    'ExpenseStatus', 'TransactionType', 'ApprovalStatus',
+    'ExpenseStatus', 'TransactionType', 'ApprovalStatus', 'CostingMethod', 'StockMovementSource',
     'role_permissions', 'user_companies', 'expense_tags', 'ledger_entry_tags',
     'Company', 'Role', 'Permission', 'User', 'Contact', 'Category',
     'InventoryItem', 'PurchaseOrder', 'PurchaseOrderItem',
     'Document', 'DocumentItem', 'Payment', 'Report', 'Notification',
-    'StockMovement', 'DocumentSequence',
+    'StockMovement', 'StockSnapshot', 'InventoryStats', 'ContactStats', 'DocumentSequence',
+    'DocumentNumberBlock', 'DocumentNumberGap', 'BackgroundJob', 'OutboundEmail',
     'Account', 'Project', 'Expense', 'LedgerEntry', 'Transaction',
     'AuditLog', 'Tag',
     'Warehouse', 'WarehouseItem',
@@ -1,5 +1,5 @@
 from .base import db, BaseModel
-from .enums import AccountType
+from .enums import AccountRole, AccountType
 
 
 class Account(BaseModel):
@@ -11,6 +11,9 @@ class Account(BaseModel):
     AccountingService.get_account_balance(account_id) for a real-time figure.
     """
     __tablename__ = 'accounts'
+    __table_args__ = (
+        db.Index('ix_accounts_company_id_is_deleted', 'company_id', 'is_deleted'),
+    )
 
     company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False, index=True)
 
@@ -22,6 +25,8 @@ class Account(BaseModel):
     description = db.Column(db.String(1024))
     is_default = db.Column(db.Boolean, default=False, index=True)
     default_purpose = db.Column(db.String(50), nullable=True, index=True)
+    # Cash / receivable / payable classification used by dashboards and AR reporting
+    role = db.Column(db.Enum(AccountRole), nullable=True, index=True)
     is_active = db.Column(db.Boolean, default=True, nullable=False, index=True)
 
     company = db.relationship('Company', backref=db.backref('accounts', lazy='select'))
@@ -17,5 +17,9 @@ class AuditLog(BaseModel):
     user = db.relationship('User', backref='audit_logs', lazy='select')
     company = db.relationship('Company', backref='audit_logs', lazy='select')
 
+    __table_args__ = (
+        db.Index('ix_audit_logs_table_record_created', 'table_name', 'record_id', 'created_at'),
+    )
+
     def __repr__(self) -> str:
         return f'<AuditLog {self.id} {self.action} on {self.table_name}>'
\ No newline at end of file
@@ -0,0 +1,58 @@
+from .base import db, BaseModel
+
+JOB_STATUS_QUEUED = 'queued'
+JOB_STATUS_RUNNING = 'running'
+JOB_STATUS_SUCCEEDED = 'succeeded'
+JOB_STATUS_FAILED = 'failed'
+JOB_STATUSES = (JOB_STATUS_QUEUED, JOB_STATUS_RUNNING, JOB_STATUS_SUCCEEDED, JOB_STATUS_FAILED)
+
+
+class BackgroundJob(BaseModel):
+    """A unit of work queued for ``flask worker``.
+
+    ``run_at`` is when the job becomes eligible; retries push it forward.
+    ``unique_key`` deduplicates enqueues, e.g. one row per periodic task and
+    time slot even when several workers run the scheduler. File results are
+    written under ``JOB_RESULTS_DIR`` and referenced by ``result_path``; small
+    structured results go to ``result``.
+    """
+    __tablename__ = 'background_jobs'
+
+    name = db.Column(db.String(100), nullable=False, index=True)
+    payload = db.Column(db.JSON, nullable=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=True, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True, index=True)
+    unique_key = db.Column(db.String(200), nullable=True, unique=True)
+
+    status = db.Column(db.String(20), nullable=False, default=JOB_STATUS_QUEUED, server_default=JOB_STATUS_QUEUED)
+    priority = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    max_attempts = db.Column(db.Integer, nullable=False, default=3, server_default='3')
+    run_at = db.Column(db.DateTime, nullable=False)
+
+    locked_by = db.Column(db.String(100), nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True, index=True)
+    last_error = db.Column(db.Text, nullable=True)
+
+    result = db.Column(db.JSON, nullable=True)
+    result_path = db.Column(db.String(500), nullable=True)
+    result_filename = db.Column(db.String(255), nullable=True)
+    result_mimetype = db.Column(db.String(100), nullable=True)
+
+    __table_args__ = (
+        db.CheckConstraint(
+            "status IN ('queued', 'running', 'succeeded', 'failed')", name='check_background_job_status',
+        ),
+        # Claim query: eligible queued jobs in priority order.
+        db.Index('ix_background_jobs_status_run_at', 'status', 'run_at', 'priority'),
+        db.Index('ix_background_jobs_user_created', 'user_id', 'created_at'),
+    )
+
+    @property
+    def is_finished(self):
+        return self.status in (JOB_STATUS_SUCCEEDED, JOB_STATUS_FAILED)
+
+    def __repr__(self) -> str:
+        return f'<BackgroundJob {self.id} {self.name}({self.status})>'
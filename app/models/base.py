@@ -1,28 +1,33 @@
 from datetime import datetime, UTC
 from app.extensions import db
 from sqlalchemy.orm import with_loader_criteria
-from sqlalchemy import event
+from sqlalchemy import event, false
 
 class BaseModel(db.Model):
     __abstract__ = True
     id = db.Column(db.Integer, primary_key=True)
-    is_deleted = db.Column(db.Boolean, default=False)
+    is_deleted = db.Column(db.Boolean, default=False, server_default=false(), nullable=False)
     deleted_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC))
 
 from sqlalchemy.orm import Session
 
+# Built once: the lambda has no closure, so its SQL is cached per mapper and
+# statements carrying this option keep a stable compiled-cache key.
+_soft_delete_criteria = with_loader_criteria(
+    BaseModel,
+    lambda cls: cls.is_deleted == false(),
+    include_aliases=True
+)
+
 @event.listens_for(Session, "do_orm_execute")
 def _add_filtering_criteria(execute_state):
     if (
         execute_state.is_select
         and not execute_state.execution_options.get("include_deleted", False)
+        # Loaded instances re-apply their load options on refresh and lazy
+        # loads; adding the criteria twice would change the cache key.
+        and _soft_delete_criteria not in execute_state.statement._with_options
     ):
-        execute_state.statement = execute_state.statement.options(
-            with_loader_criteria(
-                BaseModel,
-                lambda cls: (cls.is_deleted == False) | (cls.is_deleted == None),
-                include_aliases=True
-            )
-        )
+        execute_state.statement = execute_state.statement.options(_soft_delete_criteria)
@@ -1,5 +1,6 @@
 import re
 from .base import db, BaseModel
+from .enums import CostingMethod
 
 class Company(BaseModel):
     __tablename__ = 'companies'
@@ -15,6 +16,7 @@ class Company(BaseModel):
     
     currency = db.Column(db.String(3), default='USD', nullable=False)
     tax_rate = db.Column(db.Numeric(5, 2), default=0.0, nullable=False)
+    costing_method = db.Column(db.Enum(CostingMethod), default=CostingMethod.average, nullable=False)
     
     __table_args__ = (
         db.CheckConstraint("tax_rate >= 0 AND tax_rate <= 100", name='check_tax_rate_range'),
@@ -4,6 +4,9 @@ import re
 
 class Contact(BaseModel):
     __tablename__ = 'contacts'
+    __table_args__ = (
+        db.Index('ix_contacts_company_id_is_deleted', 'company_id', 'is_deleted'),
+    )
     
     company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False, index=True)
     name = db.Column(db.String(255), nullable=False, index=True)
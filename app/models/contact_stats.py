@@ -0,0 +1,23 @@
+from .base import db, BaseModel
+
+class ContactStats(BaseModel):
+    """Per-contact sales and supply totals shown on the contact page.
+
+    Rows are created lazily from the grouped aggregate queries and recomputed
+    when a transaction touching the contact's documents, payments or supplied
+    items commits.
+    """
+    __tablename__ = 'contact_stats'
+
+    contact_id = db.Column(db.Integer, db.ForeignKey('contacts.id'), nullable=False, unique=True, index=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False, index=True)
+
+    document_count = db.Column(db.Integer, nullable=False, default=0)
+    total_billed = db.Column(db.Numeric(16, 2), nullable=False, default=0)
+    total_paid = db.Column(db.Numeric(16, 2), nullable=False, default=0)
+    product_count = db.Column(db.Integer, nullable=False, default=0)
+    stock_value = db.Column(db.Numeric(16, 2), nullable=False, default=0)
+    low_stock_products = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f'<ContactStats Contact:{self.contact_id} Documents:{self.document_count}>'
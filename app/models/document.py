@@ -1,8 +1,18 @@
 from .base import db, BaseModel
 from .enums import DocumentType, DocumentStatus
 from decimal import Decimal, ROUND_HALF_UP
+from sqlalchemy.orm import validates
 
 _CENT = Decimal('0.01')
+_MAX_SUFFIX = 2_147_483_647
+
+def document_number_suffix(document_number):
+    """Trailing number of a document number ('000-001-01-00000042' -> 42), or None."""
+    try:
+        value = int(str(document_number).rsplit('-', 1)[-1])
+    except (TypeError, ValueError):
+        return None
+    return value if 0 <= value <= _MAX_SUFFIX else None
 
 def _money(value):
     return Decimal(str(value or 0)).quantize(_CENT, rounding=ROUND_HALF_UP)
@@ -33,6 +43,8 @@ class Document(BaseModel):
     
     company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False, index=True)
     document_number = db.Column(db.String(50), nullable=False, index=True)
+    # Kept in step with document_number so sequence syncs are an index lookup.
+    number_suffix = db.Column(db.Integer, nullable=True)
     type = db.Column(db.Enum(DocumentType), nullable=False)
     
     client_id = db.Column(db.Integer, db.ForeignKey('contacts.id'), index=True)
@@ -61,6 +73,12 @@ class Document(BaseModel):
     __table_args__ = (
         db.UniqueConstraint('company_id', 'document_number', name='uq_document_per_company'),
         db.CheckConstraint("total_amount >= 0", name='check_total_amount_non_negative'),
+        db.Index('ix_documents_company_id_is_deleted', 'company_id', 'is_deleted'),
+        db.Index(
+            'ix_documents_company_type_status_issued', 'company_id', 'type', 'is_deleted', 'status', 'issued_date',
+            postgresql_include=['total_amount'],
+        ),
+        db.Index('ix_documents_company_type_number_suffix', 'company_id', 'type', 'is_deleted', 'number_suffix'),
     )
 
     @property
@@ -92,6 +110,11 @@ class Document(BaseModel):
         totals = calculate_document_totals(self.items or [], 0, 0)
         return float(totals['item_discount'])
 
+    @validates('document_number')
+    def _sync_number_suffix(self, key, value):
+        self.number_suffix = document_number_suffix(value)
+        return value
+
     def refresh_cache(self):
         """Refresh all persisted total caches from current items."""
         company = self.company
@@ -1,20 +1,83 @@
+from datetime import datetime, UTC
+
 from .base import db, BaseModel
 
+# Numbering streams kept in document_sequences. Invoice rows are CAI ranges
+# authorised by the tax authority; the other kinds are one open-ended counter
+# per company.
+SEQUENCE_KIND_INVOICE = 'invoice'
+SEQUENCE_KIND_QUOTE = 'quote'
+SEQUENCE_KIND_PURCHASE_ORDER = 'purchase_order'
+SEQUENCE_KINDS = (SEQUENCE_KIND_INVOICE, SEQUENCE_KIND_QUOTE, SEQUENCE_KIND_PURCHASE_ORDER)
+
+
 class DocumentSequence(BaseModel):
     __tablename__ = 'document_sequences'
     company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False, index=True)
 
-    cai = db.Column(db.String(50), nullable=False, index=True)
+    kind = db.Column(db.String(20), nullable=False, default=SEQUENCE_KIND_INVOICE, server_default=SEQUENCE_KIND_INVOICE, index=True)
+    cai = db.Column(db.String(50), nullable=True, index=True)
     range_start = db.Column(db.Integer, nullable=False)
     range_end = db.Column(db.Integer, nullable=False)
+    # Last number handed out; range_start - 1 while the range is unused.
     current = db.Column(db.Integer, nullable=False)
-    expiration_date = db.Column(db.Date, nullable=False, index=True)
+    expiration_date = db.Column(db.Date, nullable=True, index=True)
 
     company = db.relationship('Company', backref='document_sequences', lazy='select')
-    
+
     __table_args__ = (
-        db.CheckConstraint("range_start > 0 AND range_end > 0 AND current >= range_start", name='check_doc_sequence_range'),
+        db.CheckConstraint("range_start > 0 AND range_end > 0 AND current >= range_start - 1", name='check_doc_sequence_range'),
+        db.CheckConstraint("kind IN ('invoice', 'quote', 'purchase_order')", name='check_doc_sequence_kind'),
+        db.Index(
+            'uq_doc_sequence_counter', 'company_id', 'kind', unique=True,
+            postgresql_where=db.text("kind <> 'invoice'"),
+            sqlite_where=db.text("kind <> 'invoice'"),
+        ),
     )
-    
+
+    def __repr__(self) -> str:
+        return f'<DocumentSequence {self.id} {self.kind} {self.cai} ({self.current}/{self.range_end})>'
+
+
+class DocumentNumberBlock(BaseModel):
+    """Numbers of a sequence reserved for one holder (a POS register or a worker process)."""
+    __tablename__ = 'document_number_blocks'
+
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False, index=True)
+    sequence_id = db.Column(db.Integer, db.ForeignKey('document_sequences.id'), nullable=False, index=True)
+    holder = db.Column(db.String(100), nullable=False, index=True)
+    range_start = db.Column(db.Integer, nullable=False)
+    range_end = db.Column(db.Integer, nullable=False)
+    # Next number to hand out; range_end + 1 once the block is used up.
+    next_value = db.Column(db.Integer, nullable=False)
+    released_at = db.Column(db.DateTime, nullable=True, index=True)
+
+    sequence = db.relationship('DocumentSequence', backref=db.backref('blocks', lazy='dynamic'))
+
+    __table_args__ = (
+        db.CheckConstraint("range_end >= range_start AND next_value >= range_start AND next_value <= range_end + 1", name='check_doc_number_block_range'),
+        db.Index('ix_doc_number_blocks_holder_open', 'sequence_id', 'holder', 'released_at'),
+    )
+
+    def __repr__(self) -> str:
+        return f'<DocumentNumberBlock {self.id} {self.holder} ({self.next_value}/{self.range_end})>'
+
+
+class DocumentNumberGap(BaseModel):
+    """A number handed out and then given back, reused before the sequence advances."""
+    __tablename__ = 'document_number_gaps'
+
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False, index=True)
+    sequence_id = db.Column(db.Integer, db.ForeignKey('document_sequences.id'), nullable=False, index=True)
+    number = db.Column(db.Integer, nullable=False)
+    reason = db.Column(db.String(50), nullable=False, default='released')
+    released_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(UTC))
+
+    sequence = db.relationship('DocumentSequence', backref=db.backref('gaps', lazy='dynamic'))
+
+    __table_args__ = (
+        db.UniqueConstraint('sequence_id', 'number', name='uq_doc_number_gap'),
+    )
+
     def __repr__(self) -> str:
-        return f'<DocumentSequence {self.id} {self.cai} ({self.current}/{self.range_end})>'
+        return f'<DocumentNumberGap {self.sequence_id} #{self.number} ({self.reason})>'
@@ -17,6 +17,19 @@ class AccountType(enum.Enum):
             'expense': 'Gasto'
         }.get(self.value, self.value.title())
 
+class AccountRole(enum.Enum):
+    cash = 'cash'
+    receivable = 'receivable'
+    payable = 'payable'
+
+    @property
+    def label_es(self):
+        return {
+            'cash': 'Caja y Bancos',
+            'receivable': 'Cuentas por Cobrar',
+            'payable': 'Cuentas por Pagar'
+        }.get(self.value, self.value.title())
+
 class DocumentType(enum.Enum):
     quote = 'quote'
     invoice = 'invoice'
@@ -71,6 +84,34 @@ class StockMovementType(enum.Enum):
             'adjustment': 'Ajuste'
         }.get(self.value, self.value.title())
 
+class StockMovementSource(enum.Enum):
+    document = 'document'
+    purchase_order = 'purchase_order'
+    transfer = 'transfer'
+    adjustment = 'adjustment'
+    initial_stock = 'initial_stock'
+
+    @property
+    def label_es(self):
+        return {
+            'document': 'Factura',
+            'purchase_order': 'Orden de Compra',
+            'transfer': 'Traslado',
+            'adjustment': 'Ajuste',
+            'initial_stock': 'Inventario Inicial'
+        }.get(self.value, self.value.title())
+
+class CostingMethod(enum.Enum):
+    average = 'average'
+    fifo = 'fifo'
+
+    @property
+    def label_es(self):
+        return {
+            'average': 'Costo Promedio Ponderado',
+            'fifo': 'PEPS (Primeras Entradas, Primeras Salidas)'
+        }.get(self.value, self.value.title())
+
 class PaymentMethod(enum.Enum):
     cash = 'cash'
     bank_transfer = 'bank_transfer'
@@ -52,6 +52,7 @@ class Expense(BaseModel):
 
     __table_args__ = (
         db.CheckConstraint("amount > 0", name='check_expense_amount_positive'),
+        db.Index('ix_expenses_company_id_is_deleted', 'company_id', 'is_deleted'),
     )
 
     @property
@@ -16,7 +16,9 @@ class InventoryItem(BaseModel):
     
     quantity = db.Column(db.Integer, nullable=False, default=0)
     price = db.Column(db.Numeric(12, 2), nullable=False, default=0.0)
-    cost_price = db.Column(db.Numeric(12, 2), default=0.0, nullable=False)
+    cost_price = db.Column(db.Numeric(12, 4), default=0.0, nullable=False)
+    # FIFO cost layers still on hand, oldest first: [[quantity, unit_cost], ...]
+    cost_layers = db.Column(db.JSON, nullable=True)
     discount = db.Column(db.Numeric(5, 2), default=0.0, nullable=False)
     
     supplier_id = db.Column(db.Integer, db.ForeignKey('contacts.id'), index=True)
@@ -28,6 +30,7 @@ class InventoryItem(BaseModel):
         db.CheckConstraint("cost_price >= 0", name='check_cost_price_non_negative'),
         db.CheckConstraint("discount >= 0 AND discount <= 100", name='check_discount_range'),
         db.UniqueConstraint('company_id', 'sku', name='uq_company_sku'),
+        db.Index('ix_inventory_items_company_id_is_deleted', 'company_id', 'is_deleted'),
     )
 
     @staticmethod
@@ -0,0 +1,19 @@
+from .base import db, BaseModel
+
+class InventoryStats(BaseModel):
+    """Per-company inventory counters kept in step with item writes.
+
+    Rows are created lazily from one aggregate query and then adjusted by
+    deltas on every flush that touches an inventory item.
+    """
+    __tablename__ = 'inventory_stats'
+    
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False, unique=True, index=True)
+    
+    total_items = db.Column(db.Integer, nullable=False, default=0)
+    low_stock_items = db.Column(db.Integer, nullable=False, default=0)
+    out_of_stock_items = db.Column(db.Integer, nullable=False, default=0)
+    total_value = db.Column(db.Numeric(16, 4), nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f'<InventoryStats Company:{self.company_id} Items:{self.total_items}>'
@@ -42,6 +42,11 @@ class LedgerEntry(BaseModel):
             "debit >= 0 AND credit >= 0 AND (debit > 0 OR credit > 0)",
             name='check_ledger_entry_amounts'
         ),
+        db.Index('ix_ledger_entries_company_id_is_deleted', 'company_id', 'is_deleted'),
+        db.Index(
+            'ix_ledger_entries_company_account_date', 'company_id', 'account_id', 'date', 'id',
+            postgresql_include=['debit', 'credit'],
+        ),
     )
 
     @property
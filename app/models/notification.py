@@ -26,6 +26,10 @@ class Notification(BaseModel):
     created_by = db.relationship('User', foreign_keys=[created_by_id], lazy='select')
     company = db.relationship('Company', backref='notifications', lazy='select')
 
+    __table_args__ = (
+        db.Index('ix_notifications_user_status_sent', 'user_id', 'status', 'sent_at'),
+    )
+
     @property
     def display_body(self):
         return self.body or self.message or ''
@@ -0,0 +1,40 @@
+from .base import db, BaseModel
+
+EMAIL_STATUS_PENDING = 'pending'
+EMAIL_STATUS_SENDING = 'sending'
+EMAIL_STATUS_SENT = 'sent'
+EMAIL_STATUS_FAILED = 'failed'
+
+
+class OutboundEmail(BaseModel):
+    """A message handed to the email queue, kept until it is delivered or gives up.
+
+    ``pending`` rows are waiting for ``next_attempt_at`` (a retry, or a message
+    whose process stopped before sending it); ``sending`` rows are claimed by
+    the dispatcher named in ``locked_by``.
+    """
+    __tablename__ = 'outbound_emails'
+
+    subject = db.Column(db.String(500), nullable=False)
+    sender = db.Column(db.String(255), nullable=True)
+    recipients = db.Column(db.JSON, nullable=False)
+    text_body = db.Column(db.Text, nullable=True)
+    html_body = db.Column(db.Text, nullable=True)
+
+    status = db.Column(db.String(20), nullable=False, default=EMAIL_STATUS_PENDING, server_default=EMAIL_STATUS_PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    next_attempt_at = db.Column(db.DateTime, nullable=False)
+    locked_by = db.Column(db.String(100), nullable=True, index=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+
+    __table_args__ = (
+        db.CheckConstraint(
+            "status IN ('pending', 'sending', 'sent', 'failed')", name='check_outbound_email_status',
+        ),
+        db.Index('ix_outbound_emails_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    def __repr__(self) -> str:
+        return f'<OutboundEmail {self.id} {self.status} {self.subject!r}>'
@@ -19,6 +19,8 @@ class Payment(BaseModel):
     
     __table_args__ = (
         db.CheckConstraint("amount > 0", name='check_payment_amount_positive'),
+        db.Index('ix_payments_company_id_is_deleted', 'company_id', 'is_deleted'),
+        db.Index('ix_payments_company_date', 'company_id', 'payment_date', postgresql_include=['amount']),
     )
 
     def __repr__(self) -> str:
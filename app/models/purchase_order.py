@@ -19,6 +19,7 @@ class PurchaseOrder(BaseModel):
     __table_args__ = (
         db.UniqueConstraint('company_id', 'order_number', name='uq_purchase_order_per_company'),
         db.CheckConstraint("total_amount >= 0", name='check_po_total_amount_non_negative'),
+        db.Index('ix_purchase_orders_company_id_is_deleted', 'company_id', 'is_deleted'),
     )
 
     def __repr__(self) -> str:
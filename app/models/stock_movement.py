@@ -1,6 +1,7 @@
 from .base import db, BaseModel
-from .enums import StockMovementType
+from .enums import StockMovementSource, StockMovementType
 from datetime import datetime, UTC
+from sqlalchemy import case, func
 
 class StockMovement(BaseModel):
     __tablename__ = 'stock_movements'
@@ -13,8 +14,12 @@ class StockMovement(BaseModel):
     
     type = db.Column(db.Enum(StockMovementType), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
+    unit_cost = db.Column(db.Numeric(12, 4), nullable=True)
     reference = db.Column(db.String(100), index=True)
     notes = db.Column(db.String(1024))
+    # Typed link to the originating document (invoice, purchase order, ...); replaces parsing `reference`.
+    source_type = db.Column(db.Enum(StockMovementSource), nullable=True)
+    source_id = db.Column(db.Integer, nullable=True)
     date = db.Column(db.DateTime, default=lambda: datetime.now(UTC), index=True)
 
     inventory_item = db.relationship('InventoryItem', backref='movements', lazy='select')
@@ -25,20 +30,38 @@ class StockMovement(BaseModel):
     
     __table_args__ = (
         db.CheckConstraint("quantity != 0", name='check_movement_quantity_nonzero'),
+        db.Index('ix_stock_movements_source', 'source_type', 'source_id'),
+        db.Index('ix_stock_movements_company_id_is_deleted', 'company_id', 'is_deleted'),
+        db.Index('ix_stock_movements_company_date', 'company_id', 'date'),
+        db.Index('ix_stock_movements_item_date', 'inventory_item_id', 'date', 'id'),
     )
 
-    @property
-    def qty_change(self) -> int:
-        """Return signed quantity change.
+    @staticmethod
+    def signed_quantity(movement_type, quantity) -> int:
+        """Return the signed stock change for a raw (type, quantity) pair.
         - incoming: always positive
         - outgoing: always negative
         - adjustment: signed as stored (positive = add stock, negative = remove stock)
         """
-        if self.type == StockMovementType.adjustment:
-            return self.quantity  # already signed
-        if self.type == StockMovementType.outgoing:
-            return -abs(self.quantity)
-        return abs(self.quantity)
+        if movement_type == StockMovementType.adjustment:
+            return quantity  # already signed
+        if movement_type == StockMovementType.outgoing:
+            return -abs(quantity)
+        return abs(quantity)
+
+    @classmethod
+    def signed_quantity_expr(cls):
+        """SQL counterpart of :meth:`signed_quantity` for aggregate queries."""
+        return case(
+            (cls.type == StockMovementType.adjustment, cls.quantity),
+            (cls.type == StockMovementType.outgoing, -func.abs(cls.quantity)),
+            else_=func.abs(cls.quantity),
+        )
+
+    @property
+    def qty_change(self) -> int:
+        """Return signed quantity change."""
+        return self.signed_quantity(self.type, self.quantity)
 
     def __repr__(self) -> str:
         return f'<StockMovement {self.id} {self.type.value} qty={self.quantity}>'
@@ -0,0 +1,24 @@
+from .base import db, BaseModel
+
+class StockSnapshot(BaseModel):
+    """On-hand quantity and unit cost of one item in one warehouse at a point in time.
+
+    ``warehouse_id`` is NULL for stock moved without a warehouse (e.g. invoices
+    issued without one), so summing an item's rows gives its total on hand.
+    """
+    __tablename__ = 'stock_snapshots'
+    
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False, index=True)
+    inventory_item_id = db.Column(db.Integer, db.ForeignKey('inventory_items.id'), nullable=False, index=True)
+    warehouse_id = db.Column(db.Integer, db.ForeignKey('warehouses.id'), nullable=True, index=True)
+    
+    snapshot_date = db.Column(db.DateTime, nullable=False, index=True)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    unit_cost = db.Column(db.Numeric(12, 2), nullable=False, default=0.0)
+    
+    __table_args__ = (
+        db.Index('ix_stock_snapshots_company_date', 'company_id', 'snapshot_date'),
+    )
+
+    def __repr__(self) -> str:
+        return f'<StockSnapshot {self.snapshot_date} Item:{self.inventory_item_id} WH:{self.warehouse_id} Qty:{self.quantity}>'
@@ -10,6 +10,9 @@ class Transaction(BaseModel):
     Transaction so they can be voided or audited as a unit.
     """
     __tablename__ = 'transactions'
+    __table_args__ = (
+        db.Index('ix_transactions_company_id_is_deleted', 'company_id', 'is_deleted'),
+    )
 
     company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False, index=True)
     date = db.Column(db.DateTime, default=lambda: datetime.now(UTC), nullable=False, index=True)
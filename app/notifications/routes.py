@@ -4,6 +4,7 @@ from flask import jsonify, redirect, render_template, request, url_for, flash
 from flask_login import current_user, login_required
 
 from app.models import Company, Notification, User, db
+from app.services.pagination import keyset_paginate
 
 from . import notifications
 
@@ -172,16 +173,19 @@ def send():
 @notifications.route('/api/recent')
 @login_required
 def recent():
-    items = (
-        _query_current_user_notifications(include_read=True)
-        .order_by(Notification.sent_at.desc(), Notification.created_at.desc())
-        .limit(8)
-        .all()
+    limit = max(1, min(request.args.get('limit', 8, type=int), 50))
+    page = keyset_paginate(
+        _query_current_user_notifications(include_read=True),
+        [Notification.sent_at, Notification.id],
+        cursor=request.args.get('cursor', ''),
+        per_page=limit,
+        descending=True,
     )
     unread_count = _query_current_user_notifications(include_read=False).count()
     return jsonify({
         'unread_count': unread_count,
-        'notifications': [_serialize(item) for item in items],
+        'notifications': [_serialize(item) for item in page.items],
+        'next_cursor': page.next_cursor,
     })
 
 
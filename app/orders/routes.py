@@ -2,11 +2,13 @@ from app.utils import resolve_company
 from datetime import datetime, UTC
 
 from flask import render_template, request, redirect, url_for, flash, current_app, Response
-from flask_login import login_required
+from flask_login import current_user, login_required
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.models import Contact, InventoryItem, PurchaseOrder
 from app.models.enums import ContactType
+from app.services.export_service import xlsx_response
+from app.services.job_service import enqueue, job_accepted_response, wants_background
 
 from .services import (
     create_purchase_order, update_purchase_order,
@@ -176,25 +178,19 @@ def delete(company_id, id):
 def export(company_id):
     company = resolve_company(company_id)
     company_id = company.id
-    import io
-    from flask import send_file
 
     search = request.args.get('search', '')
     supplier_id = request.args.get('supplier_id', '')
 
-    wb, filename = export_purchase_orders_xlsx(
+    if wants_background():
+        job = enqueue('exports.purchase_orders_xlsx',
+                      payload={'company_id': company_id, 'search': search, 'supplier_id': supplier_id},
+                      company_id=company_id, user_id=current_user.id)
+        return job_accepted_response(job)
+
+    out, filename = export_purchase_orders_xlsx(
         company_id=company_id,
         search=search,
         supplier_id=supplier_id
     )
-    
-    out = io.BytesIO()
-    wb.save(out)
-    out.seek(0)
-    
-    return send_file(
-        out,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=filename
-    )
\ No newline at end of file
+    return xlsx_response(out, filename)
\ No newline at end of file
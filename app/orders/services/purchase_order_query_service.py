@@ -2,19 +2,11 @@ from app.models import PurchaseOrder, Contact
 from sqlalchemy import asc, desc, or_
 
 
-def get_purchase_orders(
-    company_id,
-    page,
-    per_page,
-    search=None,
-    supplier_id=None,
-    sort_by='created_at',
-    sort_order='desc'
-):
-    query = PurchaseOrder.query.filter_by(company_id=company_id)
+def _purchase_order_criteria(company_id, search=None, supplier_id=None):
+    criteria = [PurchaseOrder.company_id == company_id]
 
     if search:
-        query = query.filter(
+        criteria.append(
             or_(
                 PurchaseOrder.order_number.ilike(f'%{search}%'),
                 PurchaseOrder.supplier.has(
@@ -24,7 +16,21 @@ def get_purchase_orders(
         )
 
     if supplier_id and str(supplier_id).isdigit():
-        query = query.filter_by(supplier_id=int(supplier_id))
+        criteria.append(PurchaseOrder.supplier_id == int(supplier_id))
+
+    return criteria
+
+
+def get_purchase_orders(
+    company_id,
+    page,
+    per_page,
+    search=None,
+    supplier_id=None,
+    sort_by='created_at',
+    sort_order='desc'
+):
+    query = PurchaseOrder.query.filter(*_purchase_order_criteria(company_id, search, supplier_id))
 
     sort_map = {
         'order_number': PurchaseOrder.order_number,
@@ -40,4 +46,4 @@ def get_purchase_orders(
         page=page,
         per_page=per_page,
         error_out=False
-    )
\ No newline at end of file
+    )
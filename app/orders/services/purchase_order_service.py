@@ -1,9 +1,14 @@
 from datetime import datetime, UTC
-from app.models import db, PurchaseOrder, PurchaseOrderItem, InventoryItem, StockMovement, StockMovementType
+from app.models import db, PurchaseOrder, PurchaseOrderItem, InventoryItem, StockMovement, StockMovementSource, StockMovementType
 from sqlalchemy import func
 from flask import current_app
 from sqlalchemy.exc import SQLAlchemyError
 
+from app.extensions import reads_from_replica
+from app.models.document_sequence import SEQUENCE_KIND_PURCHASE_ORDER
+from app.services.document_numbers import next_document_number
+from app.inventory.services.costing import apply_receipt, company_costing_method, reverse_receipt
+
 
 def _purchase_cost_from_form(raw_price, inventory_item):
     """Use the submitted purchase cost, falling back to the item's cost price."""
@@ -18,9 +23,7 @@ def create_purchase_order(company_id, form_data):
         if not supplier_id or not supplier_id.isdigit():
             return {'success': False, 'error': 'Contact is required'}
         
-        last_id = db.session.query(func.max(PurchaseOrder.id)).filter_by(company_id=company_id).scalar() or 0
-        next_seq = int(last_id) + 1
-        order_number = f"PO-{company_id}-{next_seq:06d}"
+        order_number = next_document_number(company_id, SEQUENCE_KIND_PURCHASE_ORDER)
         
         buy_date_str = form_data.get('buy_date')
         buy_date = None
@@ -56,6 +59,7 @@ def create_purchase_order(company_id, form_data):
         
         total_amount = 0.0
         item_count = 0
+        costing_method = company_costing_method(company_id)
         indices = [k.split('[')[1].split(']')[0] for k in form_data.keys()
                    if k.startswith('items[') and k.endswith('][inventory_item_id]')]
         indices.sort(key=int)
@@ -79,8 +83,8 @@ def create_purchase_order(company_id, form_data):
                         continue
                     
                     item_total = quantity * price
+                    apply_receipt(inventory_item, quantity, price, method=costing_method)
                     inventory_item.quantity = (inventory_item.quantity or 0) + quantity
-                    inventory_item.cost_price = price
                     db.session.add(inventory_item)
                     
                     if warehouse_id:
@@ -98,7 +102,10 @@ def create_purchase_order(company_id, form_data):
                         warehouse_id=warehouse_id,
                         type=StockMovementType.incoming,
                         quantity=quantity,
+                        unit_cost=price,
                         reference=f"PO {order_number}",
+                        source_type=StockMovementSource.purchase_order,
+                        source_id=po.id,
                         date=created_at or datetime.now(UTC)
                     )
                     db.session.add(movement)
@@ -194,14 +201,18 @@ def update_purchase_order(company_id, order_id, form_data):
         # Collect existing movements to calculate net stock deltas
         movements = StockMovement.query.filter_by(
             company_id=company_id,
-            reference=f"PO {purchase_order.order_number}",
+            source_type=StockMovementSource.purchase_order,
+            source_id=purchase_order.id,
             type=StockMovementType.incoming
         ).all()
         
         inventory_deltas = {}  # inventory_item_id -> delta
         warehouse_deltas = {}  # (warehouse_id, inventory_item_id) -> delta
+        old_receipts = {}  # inventory_item_id -> [(quantity, unit_cost)]
+        new_receipts = {}
         
         for m in movements:
+            old_receipts.setdefault(m.inventory_item_id, []).append((m.quantity, m.unit_cost))
             inventory_deltas[m.inventory_item_id] = inventory_deltas.get(m.inventory_item_id, 0) - m.quantity
             if m.warehouse_id:
                 key = (m.warehouse_id, m.inventory_item_id)
@@ -245,11 +256,9 @@ def update_purchase_order(company_id, order_id, form_data):
             inventory_item = data['inventory_item']
             item_total = quantity * price
 
-            inventory_item.cost_price = price
-            db.session.add(inventory_item)
-
             # Add positive deltas
             inventory_deltas[item_id] = inventory_deltas.get(item_id, 0) + quantity
+            new_receipts.setdefault(item_id, []).append((quantity, price))
             if new_warehouse_id:
                 key = (new_warehouse_id, item_id)
                 warehouse_deltas[key] = warehouse_deltas.get(key, 0) + quantity
@@ -279,6 +288,7 @@ def update_purchase_order(company_id, order_id, form_data):
                 existing_movements.remove(movement)
                 movement.warehouse_id = purchase_order.warehouse_id
                 movement.quantity = quantity
+                movement.unit_cost = price
                 movement.date = purchase_order.created_at or datetime.now(UTC)
             else:
                 movement = StockMovement(
@@ -287,7 +297,10 @@ def update_purchase_order(company_id, order_id, form_data):
                     warehouse_id=purchase_order.warehouse_id,
                     type=StockMovementType.incoming,
                     quantity=quantity,
+                    unit_cost=price,
                     reference=f"PO {purchase_order.order_number}",
+                    source_type=StockMovementSource.purchase_order,
+                    source_id=purchase_order.id,
                     date=purchase_order.created_at or datetime.now(UTC)
                 )
                 db.session.add(movement)
@@ -309,12 +322,25 @@ def update_purchase_order(company_id, order_id, form_data):
         # Apply net stock deltas
         from app.models import WarehouseItem
         
-        for item_id, delta in inventory_deltas.items():
-            if delta != 0:
-                inv = InventoryItem.query.filter_by(id=item_id, company_id=company_id).first()
-                if inv:
-                    inv.quantity = (inv.quantity or 0) + delta
-                    db.session.add(inv)
+        # Swap the old receipts for the new ones in the item cost, leaving stock
+        # without movements and manual cost edits alone.
+        costing_method = company_costing_method(company_id)
+        for item_id in inventory_deltas:
+            removed = old_receipts.get(item_id, [])
+            added = new_receipts.get(item_id, [])
+            if [(q, float(c or 0)) for q, c in removed] == [(q, float(c)) for q, c in added]:
+                continue
+            inv = InventoryItem.query.filter_by(id=item_id, company_id=company_id).first()
+            if not inv:
+                continue
+            for quantity, unit_cost in removed:
+                unit_cost = inv.cost_price if unit_cost is None else unit_cost
+                reverse_receipt(inv, quantity, unit_cost, method=costing_method)
+                inv.quantity = (inv.quantity or 0) - quantity
+            for quantity, unit_cost in added:
+                apply_receipt(inv, quantity, unit_cost, method=costing_method)
+                inv.quantity = (inv.quantity or 0) + quantity
+            db.session.add(inv)
                     
         for (wh_id, item_id), delta in warehouse_deltas.items():
             if delta != 0:
@@ -343,42 +369,46 @@ def delete_purchase_order(company_id: int, order_id: int) -> None:
     db.session.commit()
 
 
+@reads_from_replica
 def export_purchase_orders_xlsx(company_id: int, search: str = None, supplier_id: str = None):
-    """Return (workbook, filename) tuple for all purchase orders matching criteria."""
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, Alignment
-    from app.orders.services.purchase_order_query_service import get_purchase_orders
-
-    pagination = get_purchase_orders(
-        company_id=company_id,
-        page=1,
-        per_page=1000000,
-        search=search,
-        supplier_id=supplier_id
+    """Return (spooled xlsx file, filename) tuple streaming all purchase orders matching criteria."""
+    from openpyxl.styles import Alignment
+    from app.models import Contact
+    from app.orders.services.purchase_order_query_service import _purchase_order_criteria
+    from app.services.export_service import build_xlsx, stream_query
+
+    item_counts = db.session.query(
+        PurchaseOrderItem.purchase_order_id.label('purchase_order_id'),
+        func.count(PurchaseOrderItem.id).label('item_count'),
+    ).group_by(PurchaseOrderItem.purchase_order_id).subquery()
+
+    query = db.session.query(
+        PurchaseOrder.order_number,
+        Contact.name,
+        PurchaseOrder.total_amount,
+        func.coalesce(item_counts.c.item_count, 0),
+        PurchaseOrder.created_at,
+    ).select_from(PurchaseOrder).outerjoin(
+        Contact, PurchaseOrder.supplier_id == Contact.id
+    ).outerjoin(
+        item_counts, item_counts.c.purchase_order_id == PurchaseOrder.id
+    ).filter(
+        *_purchase_order_criteria(company_id, search, supplier_id)
+    ).order_by(PurchaseOrder.created_at.desc())
+
+    rows = (
+        [
+            order_number,
+            supplier_name or '',
+            float(total_amount),
+            item_count,
+            created_at.strftime('%Y-%m-%d %H:%M')
+        ]
+        for order_number, supplier_name, total_amount, item_count, created_at in stream_query(query)
     )
-    orders = pagination.items
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = 'Ordenes de Compra'
 
     headers = ['Número de Orden', 'Proveedor', 'Monto Total', 'Cantidad de Productos', 'Fecha de Creación']
-    ws.append(headers)
-
-    for col in range(1, len(headers) + 1):
-        cell = ws.cell(row=1, column=col)
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal='center')
-
-    for order in orders:
-        ws.append([
-            order.order_number,
-            order.supplier.name if order.supplier else '',
-            float(order.total_amount),
-            len(order.items),
-            order.created_at.strftime('%Y-%m-%d %H:%M')
-        ])
+    out = build_xlsx('Ordenes de Compra', headers, rows, header_alignment=Alignment(horizontal='center'))
 
     filename = f"ordenes_de_compra_{company_id}_{datetime.now(UTC).strftime('%Y%m%d')}.xlsx"
-    return wb, filename
-
+    return out, filename
@@ -7,6 +7,8 @@ from werkzeug.datastructures import MultiDict
 
 from app.invoices.services import add_invoice_payment, create_invoice_or_quote
 from app.models import Contact, ContactType, DocumentSequence, InventoryItem, PosCashMovement, PosRegisterSession, Warehouse, db
+from app.models.document_sequence import SEQUENCE_KIND_INVOICE
+from app.services.document_numbers import register_holder, release_register_blocks
 from app.utils import resolve_company
 
 from . import pos
@@ -68,7 +70,7 @@ def index(company_id):
     company_route_id = _company_route_id(company)
     receipt_payload = _receipt_payload(receipt)
     register_session = _current_register_session(company.id)
-    active_sequence = DocumentSequence.query.filter_by(company_id=company.id).order_by(
+    active_sequence = DocumentSequence.query.filter_by(company_id=company.id, kind=SEQUENCE_KIND_INVOICE).order_by(
         DocumentSequence.expiration_date.desc()
     ).first()
     pos_config = {
@@ -132,7 +134,8 @@ def checkout(company_id):
             raise ValueError("El metodo de pago no es valido.")
 
         document = create_invoice_or_quote(
-            company.id, invoice_form, current_user.id, commit=False
+            company.id, invoice_form, current_user.id, commit=False,
+            number_holder=register_holder(register_session.id),
         )
         total_amount = _money(document.total_amount)
         payment_amount = min(amount_received, total_amount)
@@ -235,6 +238,7 @@ def close_register(company_id):
         session.status = "closed"
         session.closed_at = datetime.now(UTC)
         session.closing_notes = (request.form.get("closing_notes") or "").strip()
+        release_register_blocks(session.id)
         db.session.commit()
         flash("Caja cerrada correctamente.", "success")
     except Exception as exc:
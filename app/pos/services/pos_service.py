@@ -6,6 +6,7 @@ from flask_login import current_user
 from werkzeug.datastructures import MultiDict
 
 from app.models import Contact, Document, DocumentSequence, DocumentType, InventoryItem, Payment, PaymentMethod, PosCashMovement, PosRegisterSession, Warehouse, WarehouseItem
+from app.models.document_sequence import SEQUENCE_KIND_INVOICE
 
 PAYMENT_METHODS = [
     {"value": "cash", "label": "Efectivo"},
@@ -112,7 +113,7 @@ def _document_sequence_for_receipt(document: Document | None):
     except (TypeError, ValueError):
         sequence_number = None
 
-    query = DocumentSequence.query.filter_by(company_id=document.company_id)
+    query = DocumentSequence.query.filter_by(company_id=document.company_id, kind=SEQUENCE_KIND_INVOICE)
     if sequence_number is not None:
         sequence = query.filter(
             DocumentSequence.range_start <= sequence_number,
@@ -1,8 +1,9 @@
-from flask import Flask, request, session, redirect, url_for, render_template, abort
+from flask import Flask, request, session, redirect, url_for, render_template, abort, jsonify, send_file
 from flask_login import login_required, current_user
 from sqlalchemy import or_
 from config import Config
-from app.models import Contact, Document, InventoryItem, PurchaseOrder, Company, Payment, Project, Expense, Warehouse
+from app.extensions import reads_from_replica
+from app.models import BackgroundJob, Contact, Document, InventoryItem, PurchaseOrder, Company, Payment, Project, Expense, Warehouse
 
 
 SEARCH_CATEGORIES = (
@@ -130,6 +131,7 @@ def register_routes(app: Flask):
 
     @app.route('/search')
     @login_required
+    @reads_from_replica
     def search():
         query_text = request.args.get('q', '').strip()
         category_filter = request.args.get('type', 'all').strip() or 'all'
@@ -413,3 +415,49 @@ def register_routes(app: Flask):
             active_type=category_filter,
             total_results=total_results,
         )
+
+    def _own_job(job_id):
+        job = BackgroundJob.query.filter_by(id=job_id, user_id=current_user.id).first()
+        if job is None:
+            abort(404)
+        return job
+
+    @app.route('/jobs')
+    @login_required
+    def job_list():
+        from app.services.job_service import job_status
+
+        jobs = (
+            BackgroundJob.query
+            .filter_by(user_id=current_user.id)
+            .order_by(BackgroundJob.created_at.desc(), BackgroundJob.id.desc())
+            .limit(20)
+            .all()
+        )
+        return jsonify([job_status(job) for job in jobs])
+
+    @app.route('/jobs/<int:job_id>')
+    @login_required
+    def job_detail(job_id):
+        from app.services.job_service import job_status
+
+        job = _own_job(job_id)
+        data = job_status(job)
+        data['download_url'] = url_for('job_download', job_id=job.id) if job.result_path else None
+        return jsonify(data)
+
+    @app.route('/jobs/<int:job_id>/download')
+    @login_required
+    def job_download(job_id):
+        job = _own_job(job_id)
+        if not job.result_path:
+            abort(404)
+        try:
+            return send_file(
+                job.result_path,
+                mimetype=job.result_mimetype,
+                as_attachment=True,
+                download_name=job.result_filename,
+            )
+        except FileNotFoundError:
+            abort(404)
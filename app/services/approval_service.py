@@ -2,6 +2,23 @@ from datetime import datetime, UTC
 import inspect
 from app.models import db, ApprovalRequest, ApprovalStatus
 
+def call_with_payload(handler, payload):
+    """Call ``handler`` with the keys of ``payload`` it accepts as keyword arguments."""
+    payload = payload or {}
+    parameters = inspect.signature(handler).parameters
+    if any(parameter.kind == inspect.Parameter.VAR_KEYWORD for parameter in parameters.values()):
+        return handler(**payload)
+    accepted = {key: value for key, value in payload.items() if key in parameters}
+    missing = [
+        parameter.name for parameter in parameters.values()
+        if parameter.kind in (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY)
+        and parameter.default is inspect.Parameter.empty
+        and parameter.name not in accepted
+    ]
+    if missing:
+        raise ValueError(f"Missing required action parameters: {', '.join(missing)}")
+    return handler(**accepted)
+
 class ActionRegistry:
     _handlers = {}
 
@@ -15,21 +32,7 @@ class ActionRegistry:
         """Execute a registered action with the given payload."""
         if name not in cls._handlers:
             raise ValueError(f"No handler registered for action: {name}")
-        handler = cls._handlers[name]
-        payload = payload or {}
-        parameters = inspect.signature(handler).parameters
-        if any(parameter.kind == inspect.Parameter.VAR_KEYWORD for parameter in parameters.values()):
-            return handler(**payload)
-        accepted = {key: value for key, value in payload.items() if key in parameters}
-        missing = [
-            parameter.name for parameter in parameters.values()
-            if parameter.kind in (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY)
-            and parameter.default is inspect.Parameter.empty
-            and parameter.name not in accepted
-        ]
-        if missing:
-            raise ValueError(f"Missing required action parameters: {', '.join(missing)}")
-        return handler(**accepted)
+        return call_with_payload(cls._handlers[name], payload)
 
 class ApprovalService:
     @staticmethod
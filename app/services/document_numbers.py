@@ -0,0 +1,381 @@
+"""Document number allocation for invoices, quotes and purchase orders.
+
+Every numbering stream is a ``document_sequences`` row: the CAI ranges a
+company is authorised to invoice with (``kind='invoice'``) and one open-ended
+counter per company for quotes and for purchase orders, created on first use.
+``current`` is the last number handed out, so taking a number is a single
+conditional ``UPDATE ... SET current = current + n`` instead of locking the row
+for the whole request or scanning existing documents.
+
+With ``DOCUMENT_NUMBER_BLOCK_SIZE`` above 1, invoice numbers are reserved in
+blocks per holder (a POS register session, or the worker process for other
+callers) and handed out from that holder's ``document_number_blocks`` row, so
+concurrent registers only touch the shared CAI row when they need a new block.
+Numbers given back (an invoice turned into a quote, the unused tail of a block
+when a register closes) are recorded in ``document_number_gaps`` and reused,
+lowest first, before the sequence advances.
+
+Worker blocks stay reserved until ``flask release-number-blocks`` returns
+their unused numbers.
+"""
+import os
+import socket
+from datetime import date, datetime, UTC
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.models import (
+    Document, DocumentNumberBlock, DocumentNumberGap, DocumentSequence, DocumentType, PurchaseOrder, db,
+)
+from app.models.document import document_number_suffix
+from app.models.document_sequence import (
+    SEQUENCE_KIND_INVOICE, SEQUENCE_KIND_PURCHASE_ORDER, SEQUENCE_KIND_QUOTE,
+)
+
+_sequences = DocumentSequence.__table__
+_blocks = DocumentNumberBlock.__table__
+_gaps = DocumentNumberGap.__table__
+_documents = Document.__table__
+_purchase_orders = PurchaseOrder.__table__
+
+COUNTER_RANGE_END = 2_147_483_647
+
+
+class DocumentNumberError(Exception):
+    """No number can be handed out (missing, expired or exhausted sequence)."""
+
+
+def format_document_number(company_id, kind, value):
+    if kind == SEQUENCE_KIND_INVOICE:
+        return f"000-001-01-{value:08d}"
+    if kind == SEQUENCE_KIND_QUOTE:
+        return f"Q-{company_id}-{value:06d}"
+    return f"PO-{company_id}-{value:06d}"
+
+
+def worker_holder():
+    return f"worker:{socket.gethostname()}:{os.getpid()}"[:100]
+
+
+def register_holder(register_session_id):
+    return f"pos-register:{register_session_id}"
+
+
+def _block_size():
+    return max(int(current_app.config.get('DOCUMENT_NUMBER_BLOCK_SIZE') or 0), 0)
+
+
+def _now():
+    return datetime.now(UTC)
+
+
+def _number_taken(company_id, kind, value):
+    """Whether a document (deleted ones included) already carries this number."""
+    number = format_document_number(company_id, kind, value)
+    if kind == SEQUENCE_KIND_PURCHASE_ORDER:
+        query = select(_purchase_orders.c.id).where(
+            _purchase_orders.c.company_id == company_id, _purchase_orders.c.order_number == number,
+        )
+    else:
+        query = select(_documents.c.id).where(
+            _documents.c.company_id == company_id, _documents.c.document_number == number,
+        )
+    return db.session.execute(query.limit(1)).first() is not None
+
+
+def _active_invoice_sequence(company_id):
+    return db.session.execute(
+        select(_sequences)
+        .where(
+            _sequences.c.company_id == company_id,
+            _sequences.c.kind == SEQUENCE_KIND_INVOICE,
+            _sequences.c.is_deleted.is_(False),
+        )
+        .order_by(_sequences.c.expiration_date.desc(), _sequences.c.id.desc())
+        .limit(1)
+    ).first()
+
+
+def _sequence_for_number(company_id, value):
+    return db.session.execute(
+        select(_sequences)
+        .where(
+            _sequences.c.company_id == company_id,
+            _sequences.c.kind == SEQUENCE_KIND_INVOICE,
+            _sequences.c.is_deleted.is_(False),
+            _sequences.c.range_start <= value,
+            _sequences.c.range_end >= value,
+        )
+        .order_by(_sequences.c.expiration_date.desc(), _sequences.c.id.desc())
+        .limit(1)
+    ).first()
+
+
+def _advance(sequence_id, count):
+    """Move the sequence ``count`` numbers forward and return the first one, or None if it does not fit."""
+    result = db.session.execute(
+        update(_sequences)
+        .where(_sequences.c.id == sequence_id, _sequences.c.current + count <= _sequences.c.range_end)
+        .values(current=_sequences.c.current + count, updated_at=_now())
+    )
+    if result.rowcount != 1:
+        return None
+    current = db.session.execute(select(_sequences.c.current).where(_sequences.c.id == sequence_id)).scalar_one()
+    return current - count + 1
+
+
+def _take_gap(sequence_id):
+    candidates = db.session.execute(
+        select(_gaps.c.id, _gaps.c.number)
+        .where(_gaps.c.sequence_id == sequence_id)
+        .order_by(_gaps.c.number)
+        .limit(5)
+    ).all()
+    for gap_id, number in candidates:
+        # Another worker may reuse the same gap; whoever deletes it owns the number.
+        if db.session.execute(delete(_gaps).where(_gaps.c.id == gap_id)).rowcount == 1:
+            return number
+    return None
+
+
+def _take_from_block(sequence, holder, size):
+    open_block = (
+        _blocks.c.sequence_id == sequence.id,
+        _blocks.c.holder == holder,
+        _blocks.c.released_at.is_(None),
+        _blocks.c.next_value <= _blocks.c.range_end,
+    )
+    block_id = db.session.execute(
+        select(_blocks.c.id).where(*open_block).order_by(_blocks.c.id).limit(1)
+    ).scalar()
+    if block_id is not None:
+        result = db.session.execute(
+            update(_blocks).where(_blocks.c.id == block_id, *open_block[2:])
+            .values(next_value=_blocks.c.next_value + 1, updated_at=_now())
+        )
+        if result.rowcount == 1:
+            return db.session.execute(select(_blocks.c.next_value).where(_blocks.c.id == block_id)).scalar_one() - 1
+
+    count = min(size, sequence.range_end - sequence.current)
+    start = _advance(sequence.id, count) if count > 0 else None
+    while start is None and count > 1:
+        # The range end is near and another holder got there first: take what is left.
+        remaining = db.session.execute(
+            select(_sequences.c.range_end - _sequences.c.current).where(_sequences.c.id == sequence.id)
+        ).scalar_one()
+        count = min(count, remaining)
+        if count <= 0:
+            return None
+        start = _advance(sequence.id, count)
+    if start is None:
+        return None
+
+    db.session.execute(insert(_blocks).values(
+        company_id=sequence.company_id, sequence_id=sequence.id, holder=holder,
+        range_start=start, range_end=start + count - 1, next_value=start + 1, is_deleted=False,
+    ))
+    return start
+
+
+def _next_invoice_value(company_id, holder):
+    sequence = _active_invoice_sequence(company_id)
+    if sequence is None:
+        raise DocumentNumberError("No active CAI configuration found for this company.")
+    if sequence.expiration_date and sequence.expiration_date < date.today():
+        raise DocumentNumberError(f"The CAI sequence has expired (Limit date: {sequence.expiration_date}).")
+
+    size = _block_size()
+    while True:
+        value = _take_gap(sequence.id)
+        if value is None:
+            if size > 1:
+                value = _take_from_block(sequence, holder or worker_holder(), size)
+            else:
+                value = _advance(sequence.id, 1)
+        if value is None:
+            raise DocumentNumberError("The CAI sequence range has been exhausted.")
+        if not _number_taken(company_id, SEQUENCE_KIND_INVOICE, value):
+            return value
+
+
+def _seed_counter(company_id, kind):
+    """Highest number already used by the company for a counter kind."""
+    prefix = format_document_number(company_id, kind, 0)[:-6]
+    if kind == SEQUENCE_KIND_PURCHASE_ORDER:
+        numbers = db.session.execute(select(_purchase_orders.c.order_number).where(
+            _purchase_orders.c.company_id == company_id, _purchase_orders.c.order_number.like(f"{prefix}%"),
+        )).scalars()
+        return max((value for value in map(document_number_suffix, numbers) if value), default=0)
+    return db.session.execute(select(func.max(_documents.c.number_suffix)).where(
+        _documents.c.company_id == company_id,
+        _documents.c.type == DocumentType[kind],
+        _documents.c.document_number.like(f"{prefix}%"),
+    )).scalar() or 0
+
+
+def _counter_id(company_id, kind):
+    query = select(_sequences.c.id).where(_sequences.c.company_id == company_id, _sequences.c.kind == kind)
+    counter_id = db.session.execute(query).scalar()
+    if counter_id is not None:
+        return counter_id
+
+    # One-time scan of the numbers issued before the counter existed.
+    seed = _seed_counter(company_id, kind)
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(_sequences).values(
+                company_id=company_id, kind=kind, range_start=1, range_end=COUNTER_RANGE_END,
+                current=seed, is_deleted=False,
+            ))
+    except IntegrityError:
+        pass  # Created concurrently; use that row.
+    return db.session.execute(query).scalar_one()
+
+
+def next_document_number(company_id, kind, holder=None):
+    """Allocate the next number of ``kind`` for a company and return it formatted.
+
+    ``holder`` names who the invoice number block is reserved for when block
+    reservation is enabled; it defaults to the current worker process.
+    """
+    if kind == SEQUENCE_KIND_INVOICE:
+        value = _next_invoice_value(company_id, holder)
+    else:
+        counter_id = _counter_id(company_id, kind)
+        while True:
+            value = _advance(counter_id, 1)
+            if value is None:
+                raise DocumentNumberError(f"The {kind} counter has been exhausted.")
+            if not _number_taken(company_id, kind, value):
+                break
+    return format_document_number(company_id, kind, value)
+
+
+def _log_gaps(sequence, numbers, reason):
+    existing = set(db.session.execute(
+        select(_gaps.c.number).where(_gaps.c.sequence_id == sequence.id, _gaps.c.number.in_(numbers))
+    ).scalars())
+    rows = [
+        {'company_id': sequence.company_id, 'sequence_id': sequence.id, 'number': number,
+         'reason': reason, 'released_at': _now(), 'is_deleted': False}
+        for number in numbers if number not in existing
+    ]
+    if rows:
+        db.session.execute(insert(_gaps), rows)
+
+
+def release_invoice_number(company_id, document_number, reason='released'):
+    """Give an invoice number back after its document stopped using it.
+
+    The latest number of a block or of the sequence is simply rolled back;
+    any other number is logged as a gap and handed out again later.
+    """
+    value = document_number_suffix(document_number)
+    if value is None:
+        return False
+    sequence = _sequence_for_number(company_id, value)
+    if sequence is None:
+        return False
+
+    block_rollback = db.session.execute(
+        update(_blocks)
+        .where(
+            _blocks.c.sequence_id == sequence.id,
+            _blocks.c.released_at.is_(None),
+            _blocks.c.next_value == value + 1,
+            _blocks.c.range_start <= value,
+            _blocks.c.range_end >= value,
+        )
+        .values(next_value=value, updated_at=_now())
+    )
+    if block_rollback.rowcount:
+        return True
+
+    sequence_rollback = db.session.execute(
+        update(_sequences)
+        .where(_sequences.c.id == sequence.id, _sequences.c.current == value)
+        .values(current=value - 1, updated_at=_now())
+    )
+    if sequence_rollback.rowcount:
+        return True
+
+    _log_gaps(sequence, [value], reason)
+    return True
+
+
+def release_blocks(holder=None, company_id=None, idle_for=None):
+    """Close open number blocks and give their unused numbers back.
+
+    Filters by holder, company and/or blocks not used for ``idle_for`` (a
+    timedelta). Returns the number of blocks released; does not commit.
+    """
+    query = select(_blocks).where(_blocks.c.released_at.is_(None))
+    if holder is not None:
+        query = query.where(_blocks.c.holder == holder)
+    if company_id is not None:
+        query = query.where(_blocks.c.company_id == company_id)
+    if idle_for is not None:
+        query = query.where(_blocks.c.updated_at < _now() - idle_for)
+
+    released = 0
+    for block in db.session.execute(query.order_by(_blocks.c.range_end.desc())).all():
+        closed = db.session.execute(
+            update(_blocks)
+            .where(_blocks.c.id == block.id, _blocks.c.released_at.is_(None))
+            .values(released_at=_now(), updated_at=_now())
+        )
+        if not closed.rowcount:
+            continue
+        released += 1
+        if block.next_value > block.range_end:
+            continue
+        # The most recent block of the sequence rolls the counter back; older ones leave gaps.
+        rolled_back = db.session.execute(
+            update(_sequences)
+            .where(_sequences.c.id == block.sequence_id, _sequences.c.current == block.range_end)
+            .values(current=block.next_value - 1, updated_at=_now())
+        ).rowcount
+        if not rolled_back:
+            sequence = db.session.execute(select(_sequences).where(_sequences.c.id == block.sequence_id)).first()
+            _log_gaps(sequence, list(range(block.next_value, block.range_end + 1)), 'block_released')
+    return released
+
+
+def release_register_blocks(register_session_id):
+    return release_blocks(holder=register_holder(register_session_id))
+
+
+def sync_invoice_sequence(company_id):
+    """Recompute ``current`` of the active CAI sequence from the invoices using it.
+
+    Keeps numbers reserved by open blocks and drops logged gaps that are now
+    past the end of the sequence.
+    """
+    sequence = _active_invoice_sequence(company_id)
+    if sequence is None:
+        return
+
+    max_used = db.session.execute(
+        select(func.max(_documents.c.number_suffix)).where(
+            _documents.c.company_id == company_id,
+            _documents.c.type == DocumentType.invoice,
+            _documents.c.is_deleted.is_(False),
+            _documents.c.number_suffix.between(sequence.range_start, sequence.range_end),
+        )
+    ).scalar()
+    max_reserved = db.session.execute(
+        select(func.max(_blocks.c.range_end)).where(
+            _blocks.c.sequence_id == sequence.id,
+            _blocks.c.released_at.is_(None),
+            _blocks.c.next_value <= _blocks.c.range_end,
+        )
+    ).scalar()
+    current = max(max_used or sequence.range_start - 1, max_reserved or 0)
+
+    db.session.execute(
+        update(_sequences).where(_sequences.c.id == sequence.id).values(current=current, updated_at=_now())
+    )
+    db.session.execute(delete(_gaps).where(_gaps.c.sequence_id == sequence.id, _gaps.c.number > current))
+    db.session.flush()
@@ -0,0 +1,423 @@
+"""Outbound email queue with a bounded pool of SMTP senders.
+
+:meth:`EmailService.send_email` hands messages to the process's
+:class:`EmailDispatcher`: a bounded in-memory queue drained by
+``MAIL_WORKER_THREADS`` threads. Every message is first stored as a
+``pending`` row of ``outbound_emails`` and only its id is queued, so nothing
+is lost if the process stops before sending it. Each thread takes up to
+``MAIL_BATCH_SIZE`` queued ids, claims those rows and delivers the batch over
+one SMTP connection (``mail.connect()``), so a burst of password resets pays
+for one TLS handshake and login instead of one per message.
+
+A connection dropped by the server (``SMTPServerDisconnected``) is reopened
+and the message retried straight away. Other transient failures leave the row
+``pending`` with exponential backoff, up to ``MAIL_MAX_ATTEMPTS``. Pending rows
+(retries, messages that did not fit in the queue and messages whose process
+stopped before delivering them) are picked up by idle dispatcher threads and
+by the periodic ``emails.send_pending`` job.
+"""
+import atexit
+import logging
+import os
+import queue
+import secrets
+import smtplib
+import socket
+import threading
+import time
+from datetime import UTC, datetime, timedelta
+
+from flask import current_app
+from flask_mail import Message
+from sqlalchemy import false, insert, select, update
+
+from app.engine_profiles import session_holds_sqlite_write_lock
+from app.extensions import db, mail
+from app.models.outbound_email import (
+    EMAIL_STATUS_FAILED, EMAIL_STATUS_PENDING, EMAIL_STATUS_SENDING, EMAIL_STATUS_SENT, OutboundEmail,
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF_SECONDS = 6 * 60 * 60
+ERROR_MAX_LENGTH = 2000
+_STOP = object()
+
+
+def _now():
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def is_transient(exc):
+    """Whether delivery may succeed later: dropped connections, timeouts and 4xx replies."""
+    if isinstance(exc, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _message in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPException):
+        return False
+    return isinstance(exc, (socket.timeout, OSError))
+
+
+class SmtpSession:
+    """One SMTP connection reused for a batch and reopened when the server drops it."""
+
+    def __init__(self, stats):
+        self._connection = None
+        self._stats = stats
+
+    def _open(self):
+        self._connection = mail.connect()
+        self._connection.__enter__()
+        self._stats.increment('connections')
+
+    def send(self, message):
+        if self._connection is None:
+            self._open()
+        try:
+            self._connection.send(message)
+        except smtplib.SMTPServerDisconnected:
+            self._connection = None
+            self._stats.increment('reconnects')
+            self._open()
+            self._connection.send(message)
+
+    def close(self):
+        if self._connection is not None:
+            try:
+                self._connection.__exit__(None, None, None)
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._connection = None
+
+
+class EmailStats:
+    """Counters of one dispatcher process, reported on the support performance page."""
+
+    FIELDS = ('queued', 'sent', 'failed', 'deferred', 'batches', 'connections', 'reconnects')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = dict.fromkeys(self.FIELDS, 0)
+            self._send_seconds = 0.0
+            self._started = time.monotonic()
+
+    def increment(self, field, amount=1):
+        with self._lock:
+            self._counts[field] += amount
+
+    def add_send_time(self, seconds):
+        with self._lock:
+            self._send_seconds += seconds
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self._counts)
+            send_seconds = self._send_seconds
+            uptime = time.monotonic() - self._started
+        data['send_seconds'] = round(send_seconds, 3)
+        data['messages_per_second'] = round(data['sent'] / send_seconds, 2) if send_seconds else 0.0
+        data['messages_per_connection'] = round(data['sent'] / data['connections'], 2) if data['connections'] else 0.0
+        data['uptime_seconds'] = round(uptime, 1)
+        return data
+
+
+def _message_for(row):
+    message = Message(row.subject, sender=row.sender, recipients=list(row.recipients or []))
+    message.body = row.text_body
+    if row.html_body:
+        message.html = row.html_body
+    return message
+
+
+def _connection_lost(exc):
+    if isinstance(exc, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    return isinstance(exc, OSError) and not isinstance(exc, smtplib.SMTPException)
+
+
+def _safe_mail_context(row):
+    """Mail settings and message details for failure logs, without credentials."""
+    config = current_app.config
+    recipients = list(row.recipients or [])
+    return {
+        'mail_server': config.get('MAIL_SERVER'),
+        'mail_port': config.get('MAIL_PORT'),
+        'mail_use_tls': config.get('MAIL_USE_TLS'),
+        'mail_use_ssl': config.get('MAIL_USE_SSL'),
+        'mail_username_set': bool(config.get('MAIL_USERNAME')),
+        'mail_password_set': bool(config.get('MAIL_PASSWORD')),
+        'email_id': row.id,
+        'attempt': row.attempts,
+        'status': row.status,
+        'sender': row.sender,
+        'recipient_count': len(recipients),
+        'recipients': recipients,
+        'subject': row.subject,
+    }
+
+
+def _log_failure(row, exc):
+    # Retries are warnings; messages that gave up are errors.
+    log = logger.warning if row.status == EMAIL_STATUS_PENDING else logger.error
+    context = _safe_mail_context(row)
+    if isinstance(exc, smtplib.SMTPAuthenticationError):
+        log('SMTP authentication failed while sending email. context=%s smtp_code=%s smtp_error=%r',
+            context, exc.smtp_code, exc.smtp_error)
+    elif isinstance(exc, smtplib.SMTPRecipientsRefused):
+        log('SMTP rejected all recipients while sending email. context=%s recipients=%r',
+            context, exc.recipients)
+    elif isinstance(exc, smtplib.SMTPSenderRefused):
+        log('SMTP rejected sender while sending email. context=%s smtp_code=%s sender=%r smtp_error=%r',
+            context, exc.smtp_code, exc.sender, exc.smtp_error)
+    elif isinstance(exc, smtplib.SMTPResponseException):
+        log('SMTP rejected the message. context=%s smtp_code=%s smtp_error=%r',
+            context, exc.smtp_code, exc.smtp_error)
+    elif _connection_lost(exc):
+        log('SMTP connection error while sending email. context=%s error_type=%s error=%r',
+            context, type(exc).__name__, exc)
+    else:
+        log('Unexpected error sending email. context=%s error_type=%s error=%r',
+            context, type(exc).__name__, exc, exc_info=exc)
+
+
+def _record_failure(row, exc, max_attempts, backoff, stats):
+    row.last_error = f'{type(exc).__name__}: {exc}'[:ERROR_MAX_LENGTH]
+    row.locked_by = None
+    if is_transient(exc) and row.attempts < max_attempts:
+        row.status = EMAIL_STATUS_PENDING
+        delay = min(backoff * 2 ** max(row.attempts - 1, 0), MAX_BACKOFF_SECONDS)
+        row.next_attempt_at = _now() + timedelta(seconds=delay)
+        stats.increment('deferred')
+    else:
+        row.status = EMAIL_STATUS_FAILED
+        stats.increment('failed')
+
+
+def deliver(row_ids, stats):
+    """Send claimed rows over one connection and record each outcome."""
+    if not row_ids:
+        return
+    rows = OutboundEmail.query.filter(OutboundEmail.id.in_(row_ids)).order_by(OutboundEmail.id).all()
+    max_attempts = int(current_app.config.get('MAIL_MAX_ATTEMPTS', 5))
+    backoff = int(current_app.config.get('MAIL_RETRY_BACKOFF_SECONDS', 60))
+    session = SmtpSession(stats)
+    unreachable = None
+    started = time.perf_counter()
+    try:
+        for row in rows:
+            if unreachable is not None:
+                # The server is unreachable: defer the rest of the batch without using up attempts.
+                _record_failure(row, unreachable, max_attempts, backoff, stats)
+                continue
+            row.attempts += 1
+            try:
+                session.send(_message_for(row))
+            except Exception as exc:
+                if _connection_lost(exc):
+                    session.close()
+                    unreachable = exc
+                _record_failure(row, exc, max_attempts, backoff, stats)
+                _log_failure(row, exc)
+                continue
+            row.status = EMAIL_STATUS_SENT
+            row.sent_at = _now()
+            row.locked_by = None
+            row.last_error = None
+            stats.increment('sent')
+    finally:
+        session.close()
+        stats.add_send_time(time.perf_counter() - started)
+        stats.increment('batches')
+        db.session.commit()
+
+
+def _claim(holder, row_ids, now):
+    emails = OutboundEmail.__table__
+    # A per-claim token tells our rows apart from ones another process claimed concurrently.
+    token = f'{holder}:{secrets.token_hex(4)}'
+    db.session.execute(
+        update(emails)
+        .where(emails.c.id.in_(row_ids), emails.c.status == EMAIL_STATUS_PENDING)
+        .values(status=EMAIL_STATUS_SENDING, locked_by=token, locked_at=now, updated_at=now)
+    )
+    claimed = db.session.execute(select(emails.c.id).where(emails.c.locked_by == token)).scalars().all()
+    db.session.commit()
+    return claimed
+
+
+def claim_queued_emails(holder, row_ids):
+    """Claim the queued rows in ``row_ids`` that are still pending (not taken by a retry pass)."""
+    return _claim(holder, row_ids, _now()) if row_ids else []
+
+
+def claim_due_emails(holder, limit):
+    """Claim up to ``limit`` pending rows that are due, after unlocking ones left by dead senders."""
+    emails = OutboundEmail.__table__
+    now = _now()
+    lock_timeout = timedelta(minutes=int(current_app.config.get('MAIL_LOCK_TIMEOUT_MINUTES', 10)))
+    db.session.execute(
+        update(emails)
+        .where(emails.c.status == EMAIL_STATUS_SENDING, emails.c.locked_at < now - lock_timeout)
+        .values(status=EMAIL_STATUS_PENDING, locked_by=None, updated_at=now)
+    )
+    due_ids = db.session.execute(
+        select(emails.c.id)
+        .where(emails.c.status == EMAIL_STATUS_PENDING, emails.c.next_attempt_at <= now,
+               emails.c.is_deleted == false())
+        .order_by(emails.c.next_attempt_at, emails.c.id)
+        .limit(limit)
+    ).scalars().all()
+    if not due_ids:
+        db.session.commit()
+        return []
+    return _claim(holder, due_ids, now)
+
+
+def store_pending_email(subject, sender, recipients, text_body, html_body=None):
+    """Insert a ``pending`` row for a message and return its id, leaving the caller's session alone.
+
+    The row is written in a transaction of its own, except on SQLite while the
+    caller's session holds the write lock: there it joins the caller's
+    transaction and is sent once that commits.
+    """
+    now = _now()
+    statement = insert(OutboundEmail.__table__).values(
+        subject=subject, sender=sender, recipients=list(recipients), text_body=text_body, html_body=html_body,
+        status=EMAIL_STATUS_PENDING, attempts=0, next_attempt_at=now,
+        is_deleted=False, created_at=now, updated_at=now,
+    )
+    if session_holds_sqlite_write_lock(db.session()):
+        return db.session.execute(statement).inserted_primary_key[0]
+    with db.engine.begin() as connection:
+        return connection.execute(statement).inserted_primary_key[0]
+
+
+def send_pending_emails(stats=None):
+    """Deliver every due pending row in batches; used by the periodic job."""
+    stats = stats or EmailStats()
+    batch_size = int(current_app.config.get('MAIL_BATCH_SIZE', 50))
+    holder = f'{socket.gethostname()}:{os.getpid()}'
+    while True:
+        row_ids = claim_due_emails(holder, batch_size)
+        if not row_ids:
+            break
+        deliver(row_ids, stats)
+    return stats.snapshot()
+
+
+class EmailDispatcher:
+    """Per-process queue and sender threads; see the module docstring."""
+
+    def __init__(self, app):
+        self.app = app
+        self.pid = os.getpid()
+        self.holder = f'{socket.gethostname()}:{self.pid}'
+        self.batch_size = int(app.config.get('MAIL_BATCH_SIZE', 50))
+        self.idle_interval = float(app.config.get('MAIL_RETRY_INTERVAL', 30))
+        self.stats = EmailStats()
+        self._queue = queue.Queue(maxsize=int(app.config.get('MAIL_QUEUE_MAX_SIZE', 1000)))
+        self._threads = [
+            threading.Thread(target=self._work, name=f'email-sender-{index}', daemon=True)
+            for index in range(int(app.config.get('MAIL_WORKER_THREADS', 2)))
+        ]
+        for thread in self._threads:
+            thread.start()
+        atexit.register(self.shutdown)
+
+    def submit(self, subject, sender, recipients, text_body, html_body=None):
+        """Store a message as pending and queue its id; when the queue is full the retry pass sends it."""
+        row_id = store_pending_email(subject, sender, recipients, text_body, html_body)
+        self.stats.increment('queued')
+        try:
+            self._queue.put_nowait(row_id)
+        except queue.Full:
+            logger.warning('Email queue full; email %s waits for the retry pass', row_id)
+        return True
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def _drain(self, first):
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _work(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.idle_interval)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                return
+            try:
+                with self.app.app_context():
+                    if item is None:
+                        row_ids = claim_due_emails(self.holder, self.batch_size)
+                    else:
+                        row_ids = claim_queued_emails(self.holder, self._drain(item))
+                    deliver(row_ids, self.stats)
+            except Exception:
+                # Claimed rows are released once their lock times out and retried.
+                logger.exception('Email sender thread failed to process a batch')
+
+    def shutdown(self, timeout=10):
+        """Let the sender threads finish what is queued, waiting up to ``timeout`` seconds."""
+        if os.getpid() != self.pid:
+            return
+        deadline = time.monotonic() + timeout
+        for _ in self._threads:
+            try:
+                self._queue.put(_STOP, timeout=max(deadline - time.monotonic(), 0.01))
+            except queue.Full:
+                return
+        for thread in self._threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+
+
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher(app=None):
+    """The email dispatcher of this process, started on first use (and again after a fork)."""
+    app = app or current_app._get_current_object()
+    dispatcher = app.extensions.get('email_dispatcher')
+    if dispatcher is None or dispatcher.pid != os.getpid():
+        with _dispatcher_lock:
+            dispatcher = app.extensions.get('email_dispatcher')
+            if dispatcher is None or dispatcher.pid != os.getpid():
+                dispatcher = EmailDispatcher(app)
+                app.extensions['email_dispatcher'] = dispatcher
+    return dispatcher
+
+
+def email_queue_stats(app=None):
+    """Counters of this process's dispatcher plus the queue state in the database."""
+    app = app or current_app._get_current_object()
+    dispatcher = app.extensions.get('email_dispatcher')
+    data = dispatcher.stats.snapshot() if dispatcher and dispatcher.pid == os.getpid() else EmailStats().snapshot()
+    data['queue_depth'] = dispatcher.queue_depth() if dispatcher else 0
+    counts = dict(
+        db.session.query(OutboundEmail.status, db.func.count(OutboundEmail.id))
+        .filter(OutboundEmail.status.in_((EMAIL_STATUS_PENDING, EMAIL_STATUS_SENDING, EMAIL_STATUS_FAILED)))
+        .group_by(OutboundEmail.status)
+        .all()
+    )
+    data['stored'] = {status: counts.get(status, 0)
+                      for status in (EMAIL_STATUS_PENDING, EMAIL_STATUS_SENDING, EMAIL_STATUS_FAILED)}
+    return data
@@ -0,0 +1,78 @@
+import tempfile
+
+from flask import send_file
+
+from app.lazy_backends import openpyxl, openpyxl_cell, openpyxl_styles, openpyxl_utils
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Rows fetched per database round-trip while streaming an export.
+EXPORT_CHUNK_SIZE = 1000
+# Generated workbooks larger than this are spooled from memory to disk.
+EXPORT_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+
+def stream_query(query, chunk_size=EXPORT_CHUNK_SIZE):
+    """Iterate a column query in chunks instead of materializing every row.
+
+    Only plain column queries should be streamed: ORM entities with eager
+    loads cannot be combined with ``yield_per``.
+    """
+    return query.execution_options(yield_per=chunk_size)
+
+
+def build_xlsx(title, headers, rows, *, header_font=None, header_fill=None, header_alignment=None,
+               column_widths=None, number_formats=None, freeze_header=False, auto_filter=False):
+    """Write ``rows`` into a write-only workbook and return it as a rewound temp file.
+
+    ``rows`` may be any iterable (typically :func:`stream_query`), so memory stays
+    bounded by openpyxl's row buffer rather than the size of the export.
+    ``number_formats`` maps zero-based column indexes to Excel number formats.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+
+    for idx, width in enumerate(column_widths or [], start=1):
+        ws.column_dimensions[openpyxl_utils.get_column_letter(idx)].width = width
+    if freeze_header:
+        ws.freeze_panes = 'A2'
+
+    header_cells = []
+    for header in headers:
+        cell = openpyxl_cell.WriteOnlyCell(ws, value=header)
+        cell.font = header_font or openpyxl_styles.Font(bold=True)
+        if header_fill is not None:
+            cell.fill = header_fill
+        if header_alignment is not None:
+            cell.alignment = header_alignment
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    row_count = 0
+    for row in rows:
+        if number_formats:
+            row = list(row)
+            for idx, number_format in number_formats.items():
+                cell = openpyxl_cell.WriteOnlyCell(ws, value=row[idx])
+                cell.number_format = number_format
+                row[idx] = cell
+        ws.append(row)
+        row_count += 1
+
+    if auto_filter and headers:
+        ws.auto_filter.ref = f"A1:{openpyxl_utils.get_column_letter(len(headers))}{row_count + 1}"
+
+    out = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_SIZE)
+    wb.save(out)
+    out.seek(0)
+    return out
+
+
+def xlsx_response(fileobj, filename):
+    """Send a workbook produced by :func:`build_xlsx` as a download."""
+    return send_file(
+        fileobj,
+        mimetype=XLSX_MIMETYPE,
+        as_attachment=True,
+        download_name=filename
+    )
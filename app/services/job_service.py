@@ -0,0 +1,459 @@
+"""Database-backed background jobs.
+
+Handlers are registered by name in :class:`JobRegistry` (see
+:func:`init_job_handlers`) and queued with :func:`enqueue`. ``flask worker``
+claims due jobs with a conditional UPDATE, so any number of worker processes
+can share the ``background_jobs`` table without row locks, and runs them on a
+thread pool. A failing job is retried with exponential backoff until it has
+used ``max_attempts``.
+
+Handlers receive the job payload as keyword arguments and return ``None``,
+JSON-serialisable data (stored in ``BackgroundJob.result``) or a
+:class:`JobFile`, which is written under ``JOB_RESULTS_DIR`` for download.
+
+Handlers registered with ``every=`` are periodic: each worker's scheduler
+enqueues them once per time slot, deduplicated through ``unique_key``.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from flask import current_app, jsonify, request, url_for
+from sqlalchemy import false, select, update
+from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import secure_filename
+
+from app.models import BackgroundJob, db
+from app.models.background_job import (
+    JOB_STATUS_FAILED, JOB_STATUS_QUEUED, JOB_STATUS_RUNNING, JOB_STATUS_SUCCEEDED,
+)
+from app.services.approval_service import call_with_payload
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF_SECONDS = 6 * 60 * 60
+ERROR_MAX_LENGTH = 4000
+# Finished jobs are deleted after this long; their files go after JOB_RESULT_TTL_HOURS.
+JOB_HISTORY_DAYS = 30
+# Seconds between stale-lock recovery and periodic scheduling passes.
+MAINTENANCE_INTERVAL = 30
+CLAIM_ATTEMPTS = 5
+
+
+@dataclass
+class JobFile:
+    """A generated file returned by a handler: a binary file object or bytes."""
+    content: object
+    filename: str
+    mimetype: str = 'application/octet-stream'
+
+
+@dataclass(frozen=True)
+class JobDefinition:
+    name: str
+    handler: object
+    max_attempts: int = 3
+    priority: int = 0
+    every: timedelta = None
+
+
+class JobRegistry:
+    _definitions = {}
+
+    @classmethod
+    def register(cls, name, handler, max_attempts=3, priority=0, every=None):
+        """Register ``handler`` under ``name``; ``every`` makes it a periodic task."""
+        cls._definitions[name] = JobDefinition(name, handler, max_attempts, priority, every)
+
+    @classmethod
+    def get(cls, name):
+        if name not in cls._definitions:
+            raise ValueError(f"No handler registered for job: {name}")
+        return cls._definitions[name]
+
+    @classmethod
+    def periodic(cls):
+        return [definition for definition in cls._definitions.values() if definition.every]
+
+
+def _now():
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def results_dir():
+    path = current_app.config.get('JOB_RESULTS_DIR') or os.path.join(current_app.instance_path, 'job_results')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def retry_delay(attempts):
+    base = int(current_app.config.get('JOB_RETRY_BACKOFF_SECONDS', 30))
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), MAX_BACKOFF_SECONDS))
+
+
+def enqueue(name, payload=None, company_id=None, user_id=None, run_at=None, unique_key=None, commit=True):
+    """Queue a job and return it, or ``None`` if a job with ``unique_key`` already exists."""
+    definition = JobRegistry.get(name)
+    job = BackgroundJob(
+        name=name,
+        payload=payload or {},
+        company_id=company_id,
+        user_id=user_id,
+        unique_key=unique_key,
+        status=JOB_STATUS_QUEUED,
+        priority=definition.priority,
+        max_attempts=definition.max_attempts,
+        run_at=run_at or _now(),
+    )
+    if unique_key:
+        try:
+            with db.session.begin_nested():
+                db.session.add(job)
+        except IntegrityError:
+            return None
+    else:
+        db.session.add(job)
+    if commit:
+        db.session.commit()
+    return job
+
+
+def claim_next(holder):
+    """Mark the next due job as running for ``holder`` and return its id."""
+    jobs = BackgroundJob.__table__
+    for _ in range(CLAIM_ATTEMPTS):
+        now = _now()
+        job_id = db.session.execute(
+            select(jobs.c.id)
+            .where(jobs.c.status == JOB_STATUS_QUEUED, jobs.c.run_at <= now, jobs.c.is_deleted == false())
+            .order_by(jobs.c.priority.desc(), jobs.c.run_at, jobs.c.id)
+            .limit(1)
+        ).scalar()
+        if job_id is None:
+            db.session.commit()
+            return None
+        # Another worker may claim the same row first; only one UPDATE matches.
+        claimed = db.session.execute(
+            update(jobs)
+            .where(jobs.c.id == job_id, jobs.c.status == JOB_STATUS_QUEUED)
+            .values(status=JOB_STATUS_RUNNING, locked_by=holder, locked_at=now, started_at=now,
+                    attempts=jobs.c.attempts + 1, updated_at=now)
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            return job_id
+    return None
+
+
+def _store_result(job, outcome):
+    if outcome is None:
+        return
+    if not isinstance(outcome, JobFile):
+        job.result = json.loads(json.dumps(outcome, default=str))
+        return
+
+    path = os.path.join(results_dir(), f'{job.id}-{secure_filename(outcome.filename) or "result"}')
+    with open(path, 'wb') as fh:
+        if isinstance(outcome.content, (bytes, bytearray)):
+            fh.write(outcome.content)
+        else:
+            outcome.content.seek(0)
+            shutil.copyfileobj(outcome.content, fh)
+    job.result_path = path
+    job.result_filename = outcome.filename
+    job.result_mimetype = outcome.mimetype
+
+
+def run_job(job_id):
+    """Run a claimed job and record its outcome; failures are rescheduled or marked failed."""
+    job = db.session.get(BackgroundJob, job_id)
+    try:
+        outcome = call_with_payload(JobRegistry.get(job.name).handler, job.payload)
+        _store_result(job, outcome)
+        job.status = JOB_STATUS_SUCCEEDED
+        job.finished_at = _now()
+        job.last_error = None
+        job.locked_by = None
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        error = traceback.format_exc()[-ERROR_MAX_LENGTH:]
+        job = db.session.get(BackgroundJob, job_id)
+        job.last_error = error
+        job.locked_by = None
+        if job.attempts < job.max_attempts:
+            job.status = JOB_STATUS_QUEUED
+            job.run_at = _now() + retry_delay(job.attempts)
+        else:
+            job.status = JOB_STATUS_FAILED
+            job.finished_at = _now()
+        db.session.commit()
+        logger.warning('Job %s (%s) attempt %s/%s failed', job.id, job.name, job.attempts, job.max_attempts,
+                       exc_info=True)
+    return job
+
+
+def requeue_stale_jobs():
+    """Give jobs whose worker died (locked longer than ``JOB_LOCK_TIMEOUT_MINUTES``) back to the queue."""
+    jobs = BackgroundJob.__table__
+    now = _now()
+    cutoff = now - timedelta(minutes=int(current_app.config.get('JOB_LOCK_TIMEOUT_MINUTES', 30)))
+    stale = (jobs.c.status == JOB_STATUS_RUNNING, jobs.c.locked_at < cutoff)
+    message = 'Worker stopped before the job finished.'
+    requeued = db.session.execute(
+        update(jobs).where(*stale, jobs.c.attempts < jobs.c.max_attempts)
+        .values(status=JOB_STATUS_QUEUED, run_at=now, locked_by=None, last_error=message, updated_at=now)
+    ).rowcount
+    failed = db.session.execute(
+        update(jobs).where(*stale, jobs.c.attempts >= jobs.c.max_attempts)
+        .values(status=JOB_STATUS_FAILED, finished_at=now, locked_by=None, last_error=message, updated_at=now)
+    ).rowcount
+    db.session.commit()
+    return requeued + failed
+
+
+def schedule_periodic_jobs():
+    """Enqueue every periodic task whose current time slot has no job yet."""
+    now = _now()
+    epoch = now.replace(tzinfo=UTC).timestamp()
+    created = 0
+    for definition in JobRegistry.periodic():
+        slot = int(epoch // definition.every.total_seconds())
+        job = enqueue(definition.name, unique_key=f'periodic:{definition.name}:{slot}', commit=False)
+        created += job is not None
+    db.session.commit()
+    return created
+
+
+def purge_job_results():
+    """Delete expired result files and forget finished jobs older than ``JOB_HISTORY_DAYS``."""
+    now = _now()
+    file_cutoff = now - timedelta(hours=int(current_app.config.get('JOB_RESULT_TTL_HOURS', 24)))
+    expired = BackgroundJob.query.filter(
+        BackgroundJob.result_path.isnot(None),
+        BackgroundJob.finished_at < file_cutoff,
+    ).all()
+    for job in expired:
+        try:
+            os.remove(job.result_path)
+        except FileNotFoundError:
+            pass
+        job.result_path = None
+
+    jobs = BackgroundJob.__table__
+    deleted = db.session.execute(
+        jobs.delete().where(
+            jobs.c.status.in_((JOB_STATUS_SUCCEEDED, JOB_STATUS_FAILED)),
+            jobs.c.finished_at < now - timedelta(days=JOB_HISTORY_DAYS),
+            jobs.c.result_path.is_(None),
+        )
+    ).rowcount
+    db.session.commit()
+    return {'expired_files': len(expired), 'deleted_jobs': deleted}
+
+
+def job_status(job):
+    """JSON view of a job for the status API."""
+    def iso(value):
+        return value.isoformat() + 'Z' if value else None
+
+    return {
+        'id': job.id,
+        'name': job.name,
+        'status': job.status,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'created_at': iso(job.created_at),
+        'run_at': iso(job.run_at),
+        'started_at': iso(job.started_at),
+        'finished_at': iso(job.finished_at),
+        'error': job.last_error.strip().splitlines()[-1] if job.last_error else None,
+        'result': job.result,
+        'has_file': bool(job.result_path),
+        'filename': job.result_filename,
+    }
+
+
+def job_accepted_response(job):
+    """202 response pointing a client at the status API of a job it just queued."""
+    return jsonify({
+        'id': job.id,
+        'status': job.status,
+        'status_url': url_for('job_detail', job_id=job.id),
+    }), 202
+
+
+def wants_background():
+    """True when the request asks for a queued job instead of an inline result (``?background=1``)."""
+    return request.args.get('background', '').lower() in ('1', 'true', 'on')
+
+
+class JobWorker:
+    """Claims due jobs and runs them on a thread pool until stopped."""
+
+    def __init__(self, app, threads=None, poll_interval=None, schedule=None):
+        self.app = app
+        self.threads = threads or int(app.config.get('JOB_WORKER_THREADS', 4))
+        self.poll_interval = poll_interval or float(app.config.get('JOB_POLL_INTERVAL', 2))
+        self.schedule = app.config.get('JOB_SCHEDULER_ENABLED', True) if schedule is None else schedule
+        self._stopping = threading.Event()
+
+    def stop(self, *_args):
+        self._stopping.set()
+
+    def _run(self, job_id):
+        with self.app.app_context():
+            run_job(job_id)
+
+    def _maintain(self):
+        requeue_stale_jobs()
+        if self.schedule:
+            schedule_periodic_jobs()
+
+    def run(self, burst=False):
+        """Process jobs until :meth:`stop`; with ``burst`` return once the queue is empty."""
+        holder = worker_id()
+        processed = 0
+        in_flight = set()
+        last_maintenance = None
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='job') as executor:
+            while not self._stopping.is_set():
+                with self.app.app_context():
+                    if last_maintenance is None or time.monotonic() - last_maintenance >= MAINTENANCE_INTERVAL:
+                        self._maintain()
+                        last_maintenance = time.monotonic()
+                    while len(in_flight) < self.threads:
+                        job_id = claim_next(holder)
+                        if job_id is None:
+                            break
+                        in_flight.add(executor.submit(self._run, job_id))
+
+                if burst and not in_flight:
+                    break
+                if in_flight:
+                    done, in_flight = wait(in_flight, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                    processed += len(done)
+                else:
+                    self._stopping.wait(self.poll_interval)
+            processed += len(in_flight)
+        return processed
+
+
+def _worker_process(app, threads, poll_interval, schedule):
+    worker = JobWorker(app, threads=threads, poll_interval=poll_interval, schedule=schedule)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+
+
+def run_worker_pool(app, processes=1, threads=None, poll_interval=None, schedule=None, burst=False):
+    """Run ``processes`` forked worker processes (or one in-process worker) until interrupted."""
+    if processes <= 1 or burst:
+        worker = JobWorker(app, threads=threads, poll_interval=poll_interval, schedule=schedule)
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, worker.stop)
+            signal.signal(signal.SIGINT, worker.stop)
+        return worker.run(burst=burst)
+
+    # Connections must not be shared across fork.
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+    context = multiprocessing.get_context('fork')
+    children = [
+        context.Process(target=_worker_process, args=(app, threads, poll_interval, schedule), daemon=False)
+        for _ in range(processes)
+    ]
+    for child in children:
+        child.start()
+
+    def forward(signum, _frame):
+        for child in children:
+            if child.is_alive():
+                os.kill(child.pid, signum)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for child in children:
+        child.join()
+    return None
+
+
+# ── Handlers ────────────────────────────────────────────────────────────────
+
+def _xlsx(result):
+    from app.services.export_service import XLSX_MIMETYPE
+
+    fileobj, filename = result
+    return JobFile(fileobj, filename, XLSX_MIMETYPE)
+
+
+def init_job_handlers():
+    from app.accounting.services import AccountingService
+    from app.inventory.services import (
+        InventoryService, month_end_before, send_low_stock_notifications, snapshot_all_companies,
+    )
+    from app.invoices.services import export_invoice_report_xlsx, mark_overdue_documents
+    from app.orders.services import export_purchase_orders_xlsx
+    from app.services.document_numbers import release_blocks
+    from app.services.email_queue import send_pending_emails
+
+    def compute_report(company_id, report_type, start_date='', end_date=''):
+        report_data, total = AccountingService.compute_report(company_id, report_type, start_date, end_date)
+        return {'report_type': report_type, 'report_data': report_data, 'total': total}
+
+    def export_invoices(company_id, filters=None):
+        return _xlsx(export_invoice_report_xlsx(company_id, filters or {}))
+
+    def export_purchase_orders(company_id, search='', supplier_id=''):
+        return _xlsx(export_purchase_orders_xlsx(company_id=company_id, search=search, supplier_id=supplier_id))
+
+    def export_inventory_items(company_id, search='', supplier_id=None):
+        return _xlsx(InventoryService.export_inventory_items_xlsx(
+            company_id=company_id, search=search, supplier_id=supplier_id,
+        ))
+
+    def export_stock_movements(company_id, movement_type=None, period='all', search='', client_id=None,
+                               supplier_id=None):
+        return _xlsx(InventoryService.export_stock_movements_xlsx(
+            company_id=company_id, movement_type=movement_type, period=period, search=search,
+            client_id=client_id, supplier_id=supplier_id,
+        ))
+
+    def release_idle_number_blocks(idle_minutes=60):
+        released = release_blocks(idle_for=timedelta(minutes=idle_minutes))
+        db.session.commit()
+        return {'released_blocks': released}
+
+    def snapshot_stock():
+        as_of = month_end_before()
+        return {'companies': sum(1 for _ in snapshot_all_companies(as_of=as_of)), 'as_of': as_of}
+
+    JobRegistry.register('reports.compute', compute_report)
+    JobRegistry.register('exports.invoices_xlsx', export_invoices)
+    JobRegistry.register('exports.purchase_orders_xlsx', export_purchase_orders)
+    JobRegistry.register('exports.inventory_items_xlsx', export_inventory_items)
+    JobRegistry.register('exports.stock_movements_xlsx', export_stock_movements)
+
+    # The former cron jobs of app/cli.py.
+    JobRegistry.register('invoices.mark_overdue', mark_overdue_documents, every=timedelta(hours=1))
+    JobRegistry.register('inventory.low_stock_notifications', send_low_stock_notifications, every=timedelta(days=1))
+    JobRegistry.register('documents.release_number_blocks', release_idle_number_blocks, every=timedelta(hours=1))
+    JobRegistry.register('inventory.snapshot_stock', snapshot_stock, every=timedelta(days=1))
+    JobRegistry.register('jobs.purge_results', purge_job_results, every=timedelta(hours=1))
+    JobRegistry.register('emails.send_pending', send_pending_emails, every=timedelta(minutes=1))
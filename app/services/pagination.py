@@ -0,0 +1,183 @@
+"""Keyset (cursor) pagination for large listings.
+
+``paginate()`` issues ``COUNT(*)`` plus ``OFFSET``, so deep pages and totals get
+slower as tables grow. :func:`keyset_paginate` instead seeks from the last row
+seen, using an index on the sort key, e.g. ``(date, id)`` or ``(name, id)``.
+The sort key must end with a unique column and its columns must be NOT NULL.
+
+Cursors are opaque URL-safe strings; clients pass them back unchanged.
+"""
+import base64
+import enum
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import func, select, text, tuple_
+from sqlalchemy.exc import CompileError
+
+from app.extensions import db
+
+# Capped counts stop scanning after this many rows and report an estimate.
+ESTIMATE_COUNT_CAP = 10000
+
+
+@dataclass
+class KeysetPage:
+    items: list
+    per_page: int
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+    total: int | None = None
+    total_is_estimate: bool = False
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def as_dict(self):
+        """Pagination metadata for JSON responses."""
+        return {
+            'per_page': self.per_page,
+            'next_cursor': self.next_cursor,
+            'prev_cursor': self.prev_cursor,
+            'has_next': self.has_next,
+            'has_prev': self.has_prev,
+            'total': self.total,
+            'total_is_estimate': self.total_is_estimate,
+        }
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'dec': str(value)}
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+        if 'dec' in value:
+            return Decimal(value['dec'])
+    return value
+
+
+def encode_cursor(values, direction='next'):
+    payload = {'k': [_encode_value(v) for v in values], 'd': direction}
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return ``(values, direction)``; raises ``ValueError`` for malformed cursors."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        return [_decode_value(v) for v in payload['k']], payload.get('d', 'next')
+    except (ValueError, TypeError, KeyError) as exc:
+        raise ValueError('Invalid cursor') from exc
+
+
+def estimate_count(query):
+    """Approximate row count of ``query``.
+
+    PostgreSQL uses the planner estimate (no scan). Other databases count up to
+    :data:`ESTIMATE_COUNT_CAP` rows. Returns ``(count, is_estimate)``.
+    """
+    query = query.order_by(None)
+    bind = db.session.get_bind()
+    if bind.dialect.name == 'postgresql':
+        try:
+            compiled = query.statement.compile(bind, compile_kwargs={'literal_binds': True})
+        except (CompileError, NotImplementedError):
+            compiled = None  # parameters without a literal form: fall back to a capped count
+        if compiled is not None:
+            plan = db.session.execute(text(f'EXPLAIN (FORMAT JSON) {compiled}')).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows']), True
+
+    capped = query.limit(ESTIMATE_COUNT_CAP + 1).subquery()
+    count = db.session.execute(select(func.count()).select_from(capped)).scalar() or 0
+    if count > ESTIMATE_COUNT_CAP:
+        return ESTIMATE_COUNT_CAP, True
+    return count, False
+
+
+def keyset_paginate(query, order_by, cursor=None, per_page=20, descending=False, total=None):
+    """Return a :class:`KeysetPage` of ``query`` ordered by the ``order_by`` columns.
+
+    ``order_by`` is the full sort key, ending with a unique column. ``total``
+    may be ``None`` (skip counting), ``'exact'`` or ``'estimate'``. Invalid
+    cursors restart from the first page.
+    """
+    values, direction = None, 'next'
+    if cursor:
+        try:
+            values, direction = decode_cursor(cursor)
+        except ValueError:
+            values = None
+        if values is not None and len(values) != len(order_by):
+            values = None
+
+    total_count, total_is_estimate = None, False
+    if total == 'exact':
+        total_count = query.order_by(None).count()
+    elif total == 'estimate':
+        total_count, total_is_estimate = estimate_count(query)
+
+    # Going backwards flips both the seek comparison and the sort order.
+    backwards = values is not None and direction == 'prev'
+    seek_descending = descending != backwards
+
+    page_query = query
+    if values is not None:
+        key, bound = tuple_(*order_by), tuple_(*values)
+        page_query = page_query.filter(key < bound if seek_descending else key > bound)
+    page_query = page_query.order_by(*[col.desc() if seek_descending else col.asc() for col in order_by])
+
+    rows = page_query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    def key_of(row):
+        return [_row_value(row, col) for col in order_by]
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_more or backwards:
+            next_cursor = encode_cursor(key_of(rows[-1]), 'next')
+        if values is not None and (has_more or not backwards):
+            prev_cursor = encode_cursor(key_of(rows[0]), 'prev')
+
+    return KeysetPage(
+        items=rows,
+        per_page=per_page,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+        total=total_count,
+        total_is_estimate=total_is_estimate,
+    )
+
+
+def _row_value(row, column):
+    key = column.key
+    if hasattr(row, '_mapping') and key in row._mapping:
+        return row._mapping[key]
+    return getattr(row, key)
@@ -0,0 +1,181 @@
+"""EXPLAIN plans for a catalog of representative hot queries.
+
+Each catalog entry mirrors a query issued by a service (dashboard, ledger,
+stock, notifications, audit history, invoice numbering) and names the index
+it is expected to use, so dropped or shadowed indexes show up as regressions
+before they show up as slow pages. Run it with ``flask explain-hot-queries``.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import false, func, select, text
+
+from app.extensions import db
+from app.models import AuditLog, Document, LedgerEntry, Notification, Payment, StockMovement
+from app.models.enums import DocumentStatus, DocumentType
+
+OPEN_INVOICE_STATUSES = (DocumentStatus.partial, DocumentStatus.overdue, DocumentStatus.pending)
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    name: str
+    source: str
+    expected_index: str
+    build: Callable[[dict], object]
+
+
+def _params(company_id, user_id):
+    now = datetime.now().replace(microsecond=0)
+    return {
+        'company_id': company_id,
+        'user_id': user_id,
+        'start': now - timedelta(days=30),
+        'end': now,
+    }
+
+
+HOT_QUERIES = (
+    HotQuery(
+        'dashboard.outstanding_invoices',
+        'DashboardService.get_dashboard_data',
+        'ix_documents_company_type_status_issued',
+        lambda p: select(func.count(Document.id)).where(
+            Document.company_id == p['company_id'],
+            Document.type == DocumentType.invoice,
+            Document.status.in_(OPEN_INVOICE_STATUSES),
+            Document.issued_date >= p['start'],
+            Document.issued_date < p['end'],
+            Document.is_deleted == false(),
+        ),
+    ),
+    HotQuery(
+        'invoices.sequence_sync',
+        'sync_document_sequence',
+        'ix_documents_company_type_number_suffix',
+        lambda p: select(func.max(Document.number_suffix)).where(
+            Document.company_id == p['company_id'],
+            Document.type == DocumentType.invoice,
+            Document.is_deleted == false(),
+            Document.number_suffix.between(1, 99_999_999),
+        ),
+    ),
+    HotQuery(
+        'dashboard.revenue',
+        'DashboardService.get_dashboard_data',
+        'ix_payments_company_date',
+        lambda p: select(func.sum(Payment.amount)).where(
+            Payment.company_id == p['company_id'],
+            Payment.payment_date >= p['start'],
+            Payment.payment_date < p['end'],
+            Payment.is_deleted == false(),
+        ),
+    ),
+    HotQuery(
+        'accounting.ledger_page',
+        'JournalService.get_ledger_page',
+        'ix_ledger_entries_company_account_date',
+        lambda p: select(LedgerEntry.id, LedgerEntry.date, LedgerEntry.debit, LedgerEntry.credit).where(
+            LedgerEntry.company_id == p['company_id'],
+            LedgerEntry.account_id == 1,
+            LedgerEntry.date >= p['start'],
+            LedgerEntry.date <= p['end'],
+            LedgerEntry.is_deleted == false(),
+        ).order_by(LedgerEntry.date, LedgerEntry.id).limit(41),
+    ),
+    HotQuery(
+        'accounting.account_balance',
+        '_compute_account_balance',
+        'ix_ledger_entries_company_account_date',
+        lambda p: select(func.sum(LedgerEntry.debit), func.sum(LedgerEntry.credit)).where(
+            LedgerEntry.company_id == p['company_id'],
+            LedgerEntry.account_id == 1,
+            LedgerEntry.date <= p['end'],
+            LedgerEntry.is_deleted == false(),
+        ),
+    ),
+    HotQuery(
+        'inventory.movements_by_date',
+        'InventoryService movement history and stock snapshots',
+        'ix_stock_movements_company_date',
+        lambda p: select(StockMovement.id).where(
+            StockMovement.company_id == p['company_id'],
+            StockMovement.date > p['start'],
+            StockMovement.date <= p['end'],
+            StockMovement.is_deleted == false(),
+        ).order_by(StockMovement.date.desc()).limit(50),
+    ),
+    HotQuery(
+        'inventory.cost_replay',
+        'recompute_item_costs',
+        'ix_stock_movements_item_date',
+        lambda p: select(StockMovement.inventory_item_id, StockMovement.quantity).where(
+            StockMovement.company_id == p['company_id'],
+            StockMovement.inventory_item_id.in_([1, 2, 3]),
+            StockMovement.is_deleted == false(),
+        ).order_by(StockMovement.inventory_item_id, StockMovement.date, StockMovement.id),
+    ),
+    HotQuery(
+        'notifications.unread_count',
+        'notifications.recent',
+        'ix_notifications_user_status_sent',
+        lambda p: select(func.count(Notification.id)).where(
+            Notification.user_id == p['user_id'],
+            Notification.status == 'unread',
+            Notification.read_at.is_(None),
+            Notification.is_deleted == false(),
+        ),
+    ),
+    HotQuery(
+        'support.record_history',
+        'support.record_view',
+        'ix_audit_logs_table_record_created',
+        lambda p: select(AuditLog.id).where(
+            AuditLog.table_name == 'documents',
+            AuditLog.record_id == 1,
+            AuditLog.is_deleted == false(),
+        ).order_by(AuditLog.created_at.desc()),
+    ),
+)
+
+
+def _plan_lines(connection, sql):
+    if connection.dialect.name == 'sqlite':
+        return [row[-1] for row in connection.execute(text(f'EXPLAIN QUERY PLAN {sql}'))]
+    return [row[0] for row in connection.execute(text(f'EXPLAIN {sql}'))]
+
+
+def _full_scans(dialect_name, plan):
+    if dialect_name == 'sqlite':
+        return [line for line in plan if line.startswith('SCAN ') and 'USING' not in line]
+    return [line.strip() for line in plan if 'Seq Scan on' in line]
+
+
+def explain_hot_queries(company_id=1, user_id=1, names=None):
+    """Return one result per catalog entry with its plan and whether the expected index is used.
+
+    On PostgreSQL sequential scans are disabled for the duration of the check,
+    so small development tables do not hide a missing index.
+    """
+    params = _params(company_id, user_id)
+    results = []
+    with db.engine.connect() as connection:
+        dialect = connection.dialect
+        if dialect.name == 'postgresql':
+            connection.execute(text('SET LOCAL enable_seqscan = off'))
+        for query in HOT_QUERIES:
+            if names and query.name not in names:
+                continue
+            sql = query.build(params).compile(dialect=dialect, compile_kwargs={'literal_binds': True})
+            plan = _plan_lines(connection, str(sql))
+            results.append({
+                'name': query.name,
+                'source': query.source,
+                'expected_index': query.expected_index,
+                'uses_expected_index': any(query.expected_index in line for line in plan),
+                'full_scans': _full_scans(dialect.name, plan),
+                'plan': plan,
+            })
+        connection.rollback()
+    return results
@@ -0,0 +1,412 @@
+"""Server-side session and rate-limit storage shared by all workers.
+
+``STATE_STORAGE_URL`` selects the backend:
+
+* ``sqlite:///path/state.db`` – a WAL-mode SQLite file, for one host running
+  several workers (the default for ``SESSION_TYPE=filesystem`` is
+  ``state.db`` in the instance folder).
+* ``redis://[:password@]host:6379/0`` – any server speaking the Redis
+  protocol, for several hosts. No client library is needed.
+
+Sessions are stored under a random id kept in a signed cookie. A session is
+only written back when its contents changed or half of its lifetime has
+passed, and the cookie is only re-sent when the id is new or the expiry is
+refreshed. The id is replaced whenever the logged-in user changes (login,
+logout, remember-me restore) or :func:`regenerate_session` is called, so an id
+planted before login never becomes an authenticated session.
+``SESSION_TYPE=cookie`` keeps Flask's signed-cookie sessions.
+
+Unless ``RATELIMIT_STORAGE_URI`` is set, Flask-Limiter counters use the same
+store through the ``trackdesk+sqlite://`` / ``trackdesk+redis://`` schemes
+(fixed-window strategies only).
+"""
+import os
+import secrets
+import socket
+import sqlite3
+import threading
+import time
+from urllib.parse import unquote, urlparse
+
+from flask import session as flask_session
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from limits.storage import Storage
+from werkzeug.datastructures import CallbackDict
+
+LIMITS_SCHEME_PREFIX = 'trackdesk+'
+
+
+class StateStoreError(Exception):
+    """The state backend is unreachable or answered with an error."""
+
+
+class SQLiteStateStore:
+    """Key/value entries with expiry in a SQLite file shared by local processes."""
+
+    def __init__(self, path, timeout=5.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        connection = self._connect()
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS state_entries '
+            '(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)'
+        )
+        connection.execute('CREATE INDEX IF NOT EXISTS ix_state_entries_expires_at ON state_entries (expires_at)')
+        connection.close()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    @property
+    def _connection(self):
+        # One connection per thread, re-opened after a fork.
+        if getattr(self._local, 'pid', None) != os.getpid():
+            self._local.connection = self._connect()
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    def get(self, key):
+        return self._connection.execute(
+            'SELECT value, expires_at FROM state_entries WHERE key = ? AND expires_at > ?', (key, time.time()),
+        ).fetchone()
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        self._connection.execute(
+            'INSERT OR REPLACE INTO state_entries (key, value, expires_at) VALUES (?, ?, ?)', (key, value, now + ttl),
+        )
+        if secrets.randbelow(200) == 0:
+            self._connection.execute('DELETE FROM state_entries WHERE expires_at <= ?', (now,))
+
+    def delete(self, key):
+        self._connection.execute('DELETE FROM state_entries WHERE key = ?', (key,))
+
+    def incr(self, key, amount, ttl):
+        """Add ``amount`` to a counter, starting a new one with ``ttl`` if missing or expired."""
+        connection = self._connection
+        now = time.time()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT value, expires_at FROM state_entries WHERE key = ? AND expires_at > ?', (key, now),
+            ).fetchone()
+            value, expires_at = (int(row[0]) + amount, row[1]) if row else (amount, now + ttl)
+            connection.execute(
+                'INSERT OR REPLACE INTO state_entries (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, str(value).encode(), expires_at),
+            )
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return value
+
+    def expires_at(self, key):
+        row = self.get(key)
+        return row[1] if row else None
+
+    def delete_prefix(self, prefix):
+        return self._connection.execute(
+            'DELETE FROM state_entries WHERE substr(key, 1, ?) = ?', (len(prefix), prefix),
+        ).rowcount
+
+    def ping(self):
+        self._connection.execute('SELECT 1').fetchone()
+        return True
+
+
+class RedisStateStore:
+    """Minimal Redis-protocol (RESP) client with the same interface as :class:`SQLiteStateStore`."""
+
+    def __init__(self, url, timeout=5.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.db = int((parsed.path or '/0').lstrip('/') or 0)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _open(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._local.sock = sock
+        self._local.reader = sock.makefile('rb')
+        self._local.pid = os.getpid()
+        setup = []
+        if self.password:
+            setup.append(('AUTH', self.username, self.password) if self.username else ('AUTH', self.password))
+        if self.db:
+            setup.append(('SELECT', self.db))
+        if setup:
+            self._exchange(setup)
+
+    def _close(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = None
+        self._local.pid = None
+
+    @staticmethod
+    def _encode(command):
+        parts = [b'*%d\r\n' % len(command)]
+        for arg in command:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+        return b''.join(parts)
+
+    def _read_reply(self):
+        line = self._local.reader.readline()
+        if not line:
+            raise ConnectionError('Connection closed by the state server')
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode()
+        if kind == b'-':
+            raise StateStoreError(payload.decode())
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._local.reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            length = int(payload)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise StateStoreError(f'Unexpected reply from the state server: {line!r}')
+
+    def _exchange(self, commands):
+        self._local.sock.sendall(b''.join(self._encode(command) for command in commands))
+        return [self._read_reply() for _ in commands]
+
+    def _pipeline(self, *commands):
+        """Send the commands in one round trip, reconnecting once if the connection dropped."""
+        for attempt in (1, 2):
+            if getattr(self._local, 'pid', None) != os.getpid():
+                self._open()
+            try:
+                return self._exchange(commands)
+            except (OSError, ConnectionError):
+                self._close()
+                if attempt == 2:
+                    raise
+
+    def get(self, key):
+        value, ttl_ms = self._pipeline(('GET', key), ('PTTL', key))
+        if value is None:
+            return None
+        return value, (time.time() + ttl_ms / 1000 if ttl_ms and ttl_ms > 0 else float('inf'))
+
+    def set(self, key, value, ttl):
+        self._pipeline(('SET', key, value, 'PX', max(int(ttl * 1000), 1)))
+
+    def delete(self, key):
+        self._pipeline(('DEL', key))
+
+    def incr(self, key, amount, ttl):
+        # SET NX starts the window with its expiry; INCRBY keeps an existing expiry.
+        _created, value = self._pipeline(
+            ('SET', key, 0, 'PX', max(int(ttl * 1000), 1), 'NX'),
+            ('INCRBY', key, amount),
+        )
+        return value
+
+    def expires_at(self, key):
+        (ttl_ms,) = self._pipeline(('PTTL', key))
+        return time.time() + ttl_ms / 1000 if ttl_ms > 0 else None
+
+    def delete_prefix(self, prefix):
+        deleted, cursor = 0, b'0'
+        while True:
+            ((cursor, keys),) = self._pipeline(('SCAN', cursor, 'MATCH', f'{prefix}*', 'COUNT', 500))
+            if keys:
+                (count,) = self._pipeline(('DEL', *keys))
+                deleted += count
+            if cursor in (b'0', 0, '0'):
+                return deleted
+
+    def ping(self):
+        (reply,) = self._pipeline(('PING',))
+        return reply == 'PONG'
+
+
+def store_from_url(url):
+    scheme = urlparse(url).scheme
+    if scheme == 'sqlite':
+        return SQLiteStateStore(url[len('sqlite:///'):] if url.startswith('sqlite:///') else url[len('sqlite://'):])
+    if scheme in ('redis', 'resp'):
+        return RedisStateStore(url)
+    raise ValueError(f"Unsupported state storage URL {url!r}; use sqlite:///path or redis://host:port/db.")
+
+
+# ── Sessions ─────────────────────────────────────────────────────────────────
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False, stored=None, expires_at=None):
+        def on_update(session):
+            session.modified = True
+            session.accessed = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.stored = stored
+        self.expires_at = expires_at
+        self.modified = False
+        self.initial_user_id = self.get('_user_id')
+        self.replaced_sid = None
+
+    def regenerate(self):
+        """Move the data to a fresh id; the old entry is deleted when the response is saved."""
+        if not self.new:
+            self.replaced_sid = self.replaced_sid or self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.new = True
+        self.modified = True
+
+
+def regenerate_session():
+    """Give the current server-side session a new id (no-op for cookie sessions)."""
+    current = flask_session._get_current_object()
+    if isinstance(current, ServerSideSession):
+        current.regenerate()
+
+
+class StateSessionInterface(SessionInterface):
+    """Keeps session data in a state store and only a signed session id in the cookie."""
+
+    serializer = TaggedJSONSerializer()
+    key_prefix = 'session:'
+
+    def __init__(self, store):
+        self.store = store
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt='trackdesk-session-id')
+
+    def open_session(self, app, request):
+        if not app.secret_key:
+            return None
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode()
+            except BadSignature:
+                sid = None
+            entry = self.store.get(self.key_prefix + sid) if sid else None
+            if entry is not None:
+                stored = entry[0] if isinstance(entry[0], bytes) else bytes(entry[0])
+                return ServerSideSession(
+                    self.serializer.loads(stored.decode()), sid=sid, stored=stored, expires_at=entry[1],
+                )
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session.new and session.get('_user_id') != session.initial_user_id:
+            session.regenerate()
+        if session.replaced_sid:
+            self.store.delete(self.key_prefix + session.replaced_sid)
+
+        if not session:
+            if not session.new:
+                self.store.delete(self.key_prefix + session.sid)
+            if not session.new or session.replaced_sid:
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        payload = self.serializer.dumps(dict(session)).encode()
+        fresh = session.expires_at is not None and session.expires_at - time.time() > lifetime / 2
+        if not session.new and payload == session.stored and fresh:
+            return
+
+        self.store.set(self.key_prefix + session.sid, payload, lifetime)
+        # A new or regenerated id needs the cookie; otherwise it is only re-sent to push its expiry.
+        if session.new or (session.permanent and not fresh):
+            response.set_cookie(
+                name,
+                self._signer(app).sign(session.sid.encode()).decode(),
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
+
+
+# ── Rate limits ──────────────────────────────────────────────────────────────
+
+class StateLimitStorage(Storage):
+    """Flask-Limiter/limits counters kept in a state store (fixed-window strategies)."""
+
+    STORAGE_SCHEME = [f'{LIMITS_SCHEME_PREFIX}sqlite', f'{LIMITS_SCHEME_PREFIX}redis']
+    key_prefix = 'limits:'
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.store = store_from_url(uri[len(LIMITS_SCHEME_PREFIX):])
+
+    @property
+    def base_exceptions(self):
+        return (StateStoreError, sqlite3.Error, OSError)
+
+    def incr(self, key, expiry, amount=1):
+        return self.store.incr(self.key_prefix + key, amount, expiry)
+
+    def get(self, key):
+        entry = self.store.get(self.key_prefix + key)
+        return int(entry[0]) if entry else 0
+
+    def get_expiry(self, key):
+        return self.store.expires_at(self.key_prefix + key) or time.time()
+
+    def check(self):
+        try:
+            return self.store.ping()
+        except Exception:
+            return False
+
+    def reset(self):
+        return self.store.delete_prefix(self.key_prefix)
+
+    def clear(self, key):
+        self.store.delete(self.key_prefix + key)
+
+
+def configure_state_storage(app):
+    """Install server-side sessions and point the rate limiter at the shared store.
+
+    Call before ``limiter.init_app``.
+    """
+    session_type = (app.config.get('SESSION_TYPE') or 'cookie').lower()
+    url = app.config.get('STATE_STORAGE_URL')
+    if not url and session_type == 'filesystem':
+        url = f"sqlite:///{os.path.join(app.instance_path, 'state.db')}"
+    if not url:
+        if session_type == 'redis':
+            raise ValueError('SESSION_TYPE=redis requires STATE_STORAGE_URL.')
+        return
+
+    if session_type != 'cookie':
+        app.session_interface = StateSessionInterface(store_from_url(url))
+    if not app.config.get('RATELIMIT_STORAGE_URI'):
+        app.config['RATELIMIT_STORAGE_URI'] = LIMITS_SCHEME_PREFIX + url
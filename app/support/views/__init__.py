@@ -1,4 +1,4 @@
 from . import common
-from . import audit, dashboard, database, recovery
+from . import audit, dashboard, database, performance, recovery
 
-__all__ = ["audit", "common", "dashboard", "database", "recovery"]
+__all__ = ["audit", "common", "dashboard", "database", "performance", "recovery"]
@@ -5,6 +5,7 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from app.extensions import db
 from app.models.audit import AuditLog
+from app.services.pagination import keyset_paginate
 
 from .. import support
 from .common import (
@@ -26,7 +27,7 @@ def audit_logs():
     from app.models.company import Company
     from datetime import datetime, timedelta
 
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor', '').strip()
     per_page = 50
 
     # Collect all filter params
@@ -70,7 +71,7 @@ def audit_logs():
         except ValueError:
             pass
 
-    pagination = query.order_by(AuditLog.id.desc()).paginate(page=page, per_page=per_page, error_out=False)
+    pagination = keyset_paginate(query, [AuditLog.id], cursor=cursor, per_page=per_page, descending=True, total='estimate')
 
     models    = get_all_models()
     users     = User.query.with_entities(User.id, User.name).order_by(User.name).all()
@@ -3,7 +3,7 @@ from flask_login import current_user
 from sqlalchemy import and_, delete, func, insert, select, update
 from sqlalchemy.exc import SQLAlchemyError
 
-from app.extensions import db
+from app.extensions import db, reads_from_replica
 from app.models.audit import AuditLog
 
 from .. import support
@@ -21,6 +21,7 @@ from .common import (
 
 
 @support.route('/database')
+@reads_from_replica
 def database_browser():
     table_name = request.args.get('table_name', '')
     page = max(request.args.get('page', 1, type=int), 1)
@@ -0,0 +1,42 @@
+from flask import current_app, flash, jsonify, redirect, render_template, request, url_for
+
+from app.middleware.instrumentation import bucket_labels
+from app.services.email_queue import email_queue_stats
+
+from .. import support
+
+
+def _metrics():
+    return current_app.extensions.get('request_metrics')
+
+
+@support.route('/performance')
+def performance():
+    metrics = _metrics()
+    min_ms = request.args.get('min_ms', 0, type=float)
+    endpoints = metrics.endpoint_summary() if metrics else []
+    recent = metrics.recent_requests(limit=50, min_duration_ms=min_ms) if metrics else []
+    email = email_queue_stats()
+
+    if request.args.get('format') == 'json':
+        return jsonify({'endpoints': endpoints, 'recent': recent, 'email': email})
+
+    return render_template(
+        'support/performance.html',
+        enabled=metrics is not None,
+        endpoints=endpoints,
+        recent=recent,
+        bucket_labels=bucket_labels(),
+        min_ms=min_ms,
+        slow_request_ms=current_app.config.get('SLOW_REQUEST_MS'),
+        email=email,
+    )
+
+
+@support.route('/performance/reset', methods=['POST'])
+def performance_reset():
+    metrics = _metrics()
+    if metrics:
+        metrics.reset()
+        flash('Métricas reiniciadas.', 'success')
+    return redirect(url_for('support.performance'))
@@ -13,33 +13,14 @@ def resolve_company(company_id_or_slug):
     else:
         return CompanyService.get_company_by_slug(company_id_or_slug, current_user)
 
-def export_excel_response(filename: str, headers: list[str], rows: list[list]):
+def export_excel_response(filename: str, headers: list[str], rows):
     """
     Generates an Excel file response.
+
+    ``rows`` may be a list or any iterable (e.g. a streamed query), and is written
+    through a write-only workbook spooled to a temporary file.
     """
-    import openpyxl
-    from io import BytesIO
-    from flask import Response
-    from openpyxl.styles import Font
+    from app.services.export_service import build_xlsx, xlsx_response
 
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    
-    # Write headers
-    ws.append(headers)
-    for cell in ws[1]:
-        cell.font = Font(bold=True)
-        
-    # Write rows
-    for row in rows:
-        ws.append(row)
-        
-    out = BytesIO()
-    wb.save(out)
-    out.seek(0)
-    
-    return Response(
-        out.getvalue(),
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        headers={'Content-disposition': f'attachment; filename={filename}.xlsx'}
-    )
+    out = build_xlsx('Sheet', headers, rows)
+    return xlsx_response(out, f'{filename}.xlsx')
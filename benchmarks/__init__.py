@@ -0,0 +1,13 @@
+"""Performance benchmarks. Not imported by the application.
+
+* ``run.py`` – latency and query counts of hot service calls and pages over
+  synthetic data from ``datagen.py``.
+* ``concurrent_checkout.py`` – POS checkout write throughput under each
+  database engine profile.
+* ``startup.py`` – ``-X importtime`` cost of the full and lightweight
+  application factory.
+* ``soft_delete_cache.py`` – compiled-statement cache hit rate of the
+  soft-delete filter.
+* ``email_queue.py`` – outbound email throughput per batch size against a
+  local SMTP stand-in.
+"""
@@ -0,0 +1,197 @@
+"""Write throughput of concurrent POS checkouts under each database engine profile.
+
+Generates one synthetic dataset, then for every profile runs ``--threads``
+clients posting checkouts against its own copy of the database for
+``--seconds`` and reports completed checkouts per second, latency percentiles
+and failures (e.g. "database is locked")::
+
+    python -m benchmarks.concurrent_checkout --threads 8 --seconds 10 --profile default --profile sqlite
+
+Each profile runs in a separate process so its engine is built from scratch.
+Only file-based SQLite databases are supported.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.run import _percentile  # noqa: E402
+
+
+def _generate(db_path, args):
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    os.environ['DB_ENGINE_PROFILE'] = 'default'
+
+    from app import create_app
+    from app.models import db
+    from benchmarks.datagen import DatasetSize, generate
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        generate(db, DatasetSize(
+            companies=1, contacts=args.contacts, items=args.items, invoices=args.invoices,
+            transactions=100, audit_rows=100,
+        ), seed=args.seed)
+        db.engine.dispose()
+
+
+def _checkout_worker(app, target, deadline, seed, results):
+    rng = random.Random(seed)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(target['user_id'])
+        session['_fresh'] = True
+
+    while time.perf_counter() < deadline:
+        items = rng.sample(target['item_ids'], 3)
+        started = time.perf_counter()
+        response = client.post(f"/{target['slug']}/pos/checkout", data={
+            'warehouse_id': target['warehouse_id'],
+            'client_id': rng.choice(target['customer_ids']),
+            'cart_payload': json.dumps([{'id': item_id, 'quantity': 1} for item_id in items]),
+            'amount_received': '100000',
+            'payment_method': 'cash',
+        })
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if 'receipt_id=' in response.headers.get('Location', ''):
+            results['latencies'].append(elapsed_ms)
+            continue
+        with client.session_transaction() as session:
+            messages = [message for category, message in session.pop('_flashes', []) if category == 'error']
+        results['errors'].append(messages[-1] if messages else f'HTTP {response.status_code}')
+
+
+def _run_profile(args):
+    """Child process: hammer the checkout endpoint and print a JSON result."""
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{args.db}'
+    os.environ['DB_ENGINE_PROFILE'] = args.worker
+    os.environ['DOCUMENT_NUMBER_BLOCK_SIZE'] = str(args.block_size)
+    os.environ['INSTRUMENTATION_ENABLED'] = 'false'
+
+    from app import create_app
+    from app.extensions import limiter
+    from app.models import Company, Contact, ContactType, User, Warehouse, WarehouseItem, db
+
+    app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+    limiter.enabled = False
+
+    with app.app_context():
+        company = Company.query.order_by(Company.id).first()
+        warehouse = Warehouse.query.filter_by(company_id=company.id).first()
+        target = {
+            'slug': company.slug,
+            'user_id': User.query.order_by(User.id).first().id,
+            'warehouse_id': warehouse.id,
+            'customer_ids': [cid for (cid,) in db.session.query(Contact.id).filter(
+                Contact.company_id == company.id, Contact.type != ContactType.supplier,
+            )],
+            'item_ids': [iid for (iid,) in db.session.query(WarehouseItem.inventory_item_id).filter(
+                WarehouseItem.warehouse_id == warehouse.id, WarehouseItem.quantity >= 100,
+            )],
+        }
+        journal_mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+
+    results = {'latencies': [], 'errors': []}
+    deadline = time.perf_counter() + args.seconds
+    threads = [
+        threading.Thread(target=_checkout_worker, args=(app, target, deadline, args.seed + idx, results))
+        for idx in range(args.threads)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_seconds = time.perf_counter() - started
+
+    latencies = sorted(results['latencies'])
+    error_kinds = {}
+    for message in results['errors']:
+        key = message[:120]
+        error_kinds[key] = error_kinds.get(key, 0) + 1
+    print(json.dumps({
+        'profile': args.worker,
+        'journal_mode': journal_mode,
+        'checkouts': len(latencies),
+        'failures': len(results['errors']),
+        'checkouts_per_second': round(len(latencies) / wall_seconds, 2),
+        'p50_ms': round(_percentile(latencies, 50), 2),
+        'p95_ms': round(_percentile(latencies, 95), 2),
+        'max_ms': round(latencies[-1], 2) if latencies else 0.0,
+        'mean_ms': round(statistics.fmean(latencies), 2) if latencies else 0.0,
+        'failure_reasons': error_kinds,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profile', action='append', choices=('default', 'sqlite'),
+                        help='engine profiles to compare (repeatable; default: both)')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--block-size', type=int, default=0, help='DOCUMENT_NUMBER_BLOCK_SIZE for the run')
+    parser.add_argument('--contacts', type=int, default=500)
+    parser.add_argument('--items', type=int, default=5000)
+    parser.add_argument('--invoices', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _run_profile(args)
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, 'base.db')
+        started = time.perf_counter()
+        _generate(base, args)
+        generate_seconds = time.perf_counter() - started
+
+        for profile in args.profile or ('default', 'sqlite'):
+            db_path = os.path.join(tmp, f'{profile}.db')
+            shutil.copyfile(base, db_path)
+            completed = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.concurrent_checkout', '--worker', profile, '--db', db_path,
+                 '--threads', str(args.threads), '--seconds', str(args.seconds),
+                 '--block-size', str(args.block_size), '--seed', str(args.seed)],
+                cwd=ROOT, capture_output=True, text=True, check=False,
+            )
+            if completed.returncode != 0:
+                raise RuntimeError(f'{profile} run failed:\n{completed.stderr}')
+            results[profile] = json.loads(completed.stdout.strip().splitlines()[-1])
+            print(f"{profile}: {results[profile]['checkouts_per_second']} checkouts/s "
+                  f"failures={results[profile]['failures']}", file=sys.stderr)
+
+    report = {
+        'parameters': {
+            'threads': args.threads, 'seconds': args.seconds, 'block_size': args.block_size,
+            'contacts': args.contacts, 'items': args.items, 'invoices': args.invoices, 'seed': args.seed,
+        },
+        'generate_seconds': round(generate_seconds, 2),
+        'profiles': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
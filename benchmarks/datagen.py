@@ -0,0 +1,279 @@
+"""Deterministic synthetic multi-tenant data for the benchmark suite.
+
+Every company gets the default chart of accounts, contacts, inventory items
+stocked in one warehouse, invoices with lines and payments, stock movements,
+balanced ledger transactions and audit rows. Rows are written with bulk Core
+inserts, so ORM listeners (audit log, inventory stats cache) do not run; the
+inventory stats cache is rebuilt on first read.
+
+The same ``seed`` and sizes always produce the same rows.
+"""
+import random
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert
+
+BATCH_SIZE = 2000
+BENCH_PASSWORD_HASH = 'benchmark-not-a-password'
+
+
+@dataclass
+class DatasetSize:
+    companies: int = 2
+    contacts: int = 2000
+    items: int = 20000
+    invoices: int = 5000
+    lines_per_invoice: int = 3
+    transactions: int = 5000
+    audit_rows: int = 10000
+    days: int = 365
+
+
+@dataclass
+class Dataset:
+    user_id: int
+    company_ids: list = field(default_factory=list)
+    company_slugs: dict = field(default_factory=dict)
+    warehouse_ids: dict = field(default_factory=dict)
+    template_ids: dict = field(default_factory=dict)
+    document_ids: dict = field(default_factory=dict)
+    item_ids: dict = field(default_factory=dict)
+    stocked_item_ids: dict = field(default_factory=dict)
+    customer_ids: dict = field(default_factory=dict)
+
+
+def _bulk_insert(db, model, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+
+def _inserted_ids(db, model, company_id):
+    return [
+        row_id for (row_id,) in db.session.query(model.id)
+        .filter(model.company_id == company_id)
+        .order_by(model.id)
+        .all()
+    ]
+
+
+def generate(db, size=None, seed=42):
+    """Populate the current database and return a :class:`Dataset` describing it.
+
+    Must run inside an application context, on an empty schema.
+    """
+    from app.accounting.services import AccountingService
+    from app.models import (
+        Account, AuditLog, Company, Contact, Document, DocumentItem, DocumentSequence,
+        DocumentTemplate, InventoryItem, LedgerEntry, Payment, PosRegisterSession, Role,
+        StockMovement, Transaction, User, Warehouse, WarehouseItem,
+    )
+    from app.models.document_template import DocumentTemplateType
+    from app.models.enums import (
+        AccountType, ContactType, DocumentStatus, DocumentType, PaymentMethod,
+        StockMovementSource, StockMovementType, TransactionType,
+    )
+
+    size = size or DatasetSize()
+    rng = random.Random(seed)
+    start_day = datetime.combine(date.today(), datetime.min.time()) - timedelta(days=size.days)
+
+    def random_date():
+        return start_day + timedelta(days=rng.randrange(size.days), seconds=rng.randrange(86400))
+
+    role = Role(name='superadmin')
+    db.session.add(role)
+    db.session.flush()
+    user = User(name='Benchmark', email='benchmark@trackdesk.local', password_hash=BENCH_PASSWORD_HASH, role_id=role.id)
+    db.session.add(user)
+    db.session.flush()
+    dataset = Dataset(user_id=user.id)
+
+    for company_idx in range(size.companies):
+        company = Company(
+            name=f'Empresa {company_idx + 1}',
+            identifier=f'BENCH-{company_idx + 1:04d}',
+            slug=f'empresa-{company_idx + 1}',
+            tax_rate=15,
+            currency='HNL',
+        )
+        db.session.add(company)
+        db.session.flush()
+        user.companies.append(company)
+        company_id = company.id
+        dataset.company_ids.append(company_id)
+        dataset.company_slugs[company_id] = company.slug
+
+        warehouse = Warehouse(company_id=company_id, name='Bodega Central')
+        template = DocumentTemplate(
+            company_id=company_id, name='Demo', type=DocumentTemplateType.html,
+            html_template_path='demo.html', is_default=True,
+        )
+        db.session.add_all([warehouse, template])
+        db.session.add(DocumentSequence(
+            company_id=company_id, cai=f'CAI-BENCH-{company_idx + 1}', range_start=1,
+            range_end=10_000_000, current=size.invoices + 1, expiration_date=date.today() + timedelta(days=365),
+        ))
+        db.session.flush()
+        db.session.add(PosRegisterSession(
+            company_id=company_id, user_id=user.id, warehouse_id=warehouse.id, opening_amount=0,
+        ))
+        dataset.warehouse_ids[company_id] = warehouse.id
+        dataset.template_ids[company_id] = template.id
+        AccountingService.generate_default_accounts(company_id)
+        db.session.flush()
+
+        # Contacts: mostly customers, a tenth suppliers.
+        contact_types = [ContactType.customer] * 8 + [ContactType.supplier, ContactType.customer_supplier]
+        _bulk_insert(db, Contact, [
+            {
+                'company_id': company_id,
+                'name': f'Contacto {idx:05d} {rng.choice(["Norte", "Sur", "Centro", "Costa"])}',
+                'type': rng.choice(contact_types),
+                'identifier': f'{company_idx:02d}{idx:012d}',
+                'email': f'contacto{idx}@empresa{company_idx}.test',
+                'phone': f'9{idx:07d}',
+            }
+            for idx in range(size.contacts)
+        ])
+        contacts = db.session.query(Contact.id, Contact.type).filter(Contact.company_id == company_id).order_by(Contact.id).all()
+        customers = [cid for cid, ctype in contacts if ctype != ContactType.supplier]
+        suppliers = [cid for cid, ctype in contacts if ctype != ContactType.customer] or customers
+        dataset.customer_ids[company_id] = customers
+
+        # Inventory items with their stock in the central warehouse.
+        item_rows = []
+        for idx in range(size.items):
+            quantity = rng.choice([0, 1, 3, 5, 10, 25, 50, 100, 250])
+            item_rows.append({
+                'company_id': company_id,
+                'sku': f'SKU-{idx:06d}',
+                'name': f'Producto {idx:06d}',
+                'description': f'Artículo de prueba {idx}',
+                'quantity': quantity,
+                'price': round(rng.uniform(5, 500), 2),
+                'cost_price': round(rng.uniform(2, 250), 4),
+                'discount': 0,
+                'supplier_id': rng.choice(suppliers),
+            })
+        _bulk_insert(db, InventoryItem, item_rows)
+        item_ids = _inserted_ids(db, InventoryItem, company_id)
+        dataset.item_ids[company_id] = item_ids
+        dataset.stocked_item_ids[company_id] = [
+            item_id for item_id, row in zip(item_ids, item_rows) if row['quantity'] >= 100
+        ]
+        _bulk_insert(db, WarehouseItem, [
+            {'warehouse_id': warehouse.id, 'inventory_item_id': item_id, 'quantity': row['quantity']}
+            for item_id, row in zip(item_ids, item_rows)
+        ])
+        _bulk_insert(db, StockMovement, [
+            {
+                'company_id': company_id, 'inventory_item_id': item_id, 'warehouse_id': warehouse.id,
+                'user_id': user.id, 'type': StockMovementType.incoming, 'quantity': row['quantity'],
+                'unit_cost': row['cost_price'], 'reference': 'Initial Stock', 'date': start_day,
+                'source_type': StockMovementSource.initial_stock, 'source_id': item_id,
+            }
+            for item_id, row in zip(item_ids, item_rows) if row['quantity']
+        ])
+
+        # Invoices and quotes with lines, payments and outgoing movements.
+        statuses = [DocumentStatus.paid, DocumentStatus.partial, DocumentStatus.pending, DocumentStatus.overdue]
+        document_rows, line_specs = [], []
+        for idx in range(size.invoices):
+            issued = random_date()
+            lines = [
+                (rng.choice(item_ids), rng.randint(1, 5), round(rng.uniform(5, 500), 2))
+                for _ in range(rng.randint(1, size.lines_per_invoice * 2 - 1))
+            ]
+            subtotal = round(sum(qty * price for _, qty, price in lines), 2)
+            tax = round(subtotal * 0.15, 2)
+            doc_type = DocumentType.quote if idx % 10 == 0 else DocumentType.invoice
+            document_rows.append({
+                'company_id': company_id,
+                'document_number': f'000-001-01-{idx + 1:08d}',
+                'number_suffix': idx + 1,
+                'type': doc_type,
+                'client_id': rng.choice(customers),
+                'user_id': user.id,
+                'warehouse_id': warehouse.id,
+                'status': DocumentStatus.draft if doc_type == DocumentType.quote else rng.choice(statuses),
+                'total_amount': round(subtotal + tax, 2),
+                'subtotal_cache': subtotal,
+                'tax_cache': tax,
+                'issued_date': issued,
+                'due_date': issued + timedelta(days=30),
+            })
+            line_specs.append(lines)
+        _bulk_insert(db, Document, document_rows)
+        document_ids = _inserted_ids(db, Document, company_id)
+        dataset.document_ids[company_id] = [
+            doc_id for doc_id, row in zip(document_ids, document_rows) if row['type'] == DocumentType.invoice
+        ]
+
+        item_rows_out, payment_rows, movement_rows = [], [], []
+        for doc_id, row, lines in zip(document_ids, document_rows, line_specs):
+            for item_id, quantity, price in lines:
+                item_rows_out.append({
+                    'document_id': doc_id, 'inventory_item_id': item_id, 'description': f'Producto {item_id}',
+                    'quantity': quantity, 'unit_price': price, 'discount': 0,
+                })
+                if row['type'] == DocumentType.invoice:
+                    movement_rows.append({
+                        'company_id': company_id, 'inventory_item_id': item_id, 'warehouse_id': warehouse.id,
+                        'user_id': user.id, 'type': StockMovementType.outgoing, 'quantity': -quantity,
+                        'reference': f"INV {row['document_number']}", 'date': row['issued_date'],
+                        'source_type': StockMovementSource.document, 'source_id': doc_id,
+                    })
+            if row['status'] in (DocumentStatus.paid, DocumentStatus.partial):
+                share = 1 if row['status'] == DocumentStatus.paid else 0.5
+                payment_rows.append({
+                    'company_id': company_id, 'document_id': doc_id,
+                    'amount': round(row['total_amount'] * share, 2),
+                    'payment_date': row['issued_date'] + timedelta(days=rng.randrange(15)),
+                    'method': rng.choice(list(PaymentMethod)),
+                })
+        _bulk_insert(db, DocumentItem, item_rows_out)
+        _bulk_insert(db, Payment, payment_rows)
+        _bulk_insert(db, StockMovement, movement_rows)
+
+        # Balanced two-line journal transactions between asset and revenue/expense accounts.
+        accounts = db.session.query(Account.id, Account.type).filter(Account.company_id == company_id).all()
+        assets = [aid for aid, atype in accounts if atype == AccountType.asset]
+        others = [aid for aid, atype in accounts if atype in (AccountType.revenue, AccountType.expense)]
+        transaction_rows = [
+            {
+                'company_id': company_id, 'date': random_date(), 'memo': f'Asiento {idx}',
+                'reference': f'BENCH-{idx}', 'transaction_type': rng.choice(list(TransactionType)),
+                'created_by': user.id,
+            }
+            for idx in range(size.transactions)
+        ]
+        _bulk_insert(db, Transaction, transaction_rows)
+        ledger_rows = []
+        for txn_id, txn in zip(_inserted_ids(db, Transaction, company_id), transaction_rows):
+            amount = round(rng.uniform(10, 5000), 2)
+            debit_account, credit_account = rng.choice(assets), rng.choice(others)
+            if rng.random() < 0.5:
+                debit_account, credit_account = credit_account, debit_account
+            for account_id, debit, credit in ((debit_account, amount, 0), (credit_account, 0, amount)):
+                ledger_rows.append({
+                    'company_id': company_id, 'account_id': account_id, 'transaction_id': txn_id,
+                    'date': txn['date'], 'description': txn['memo'], 'debit': debit, 'credit': credit,
+                })
+        _bulk_insert(db, LedgerEntry, ledger_rows)
+
+        _bulk_insert(db, AuditLog, [
+            {
+                'company_id': company_id, 'user_id': user.id,
+                'action': rng.choice(['create', 'update', 'delete']),
+                'table_name': rng.choice(['documents', 'inventory_items', 'contacts', 'payments']),
+                'record_id': rng.randrange(1, max(size.items, 2)),
+                'old_data': None,
+                'new_data': {'benchmark': True, 'idx': idx},
+            }
+            for idx in range(size.audit_rows)
+        ])
+        db.session.commit()
+
+    db.session.commit()
+    return dataset
@@ -0,0 +1,138 @@
+"""Throughput of the outbound email queue against a local SMTP stand-in.
+
+Starts the SMTP stand-in of ``tests/smtp_stand_in.py`` on localhost, waiting
+``--handshake-ms`` before its greeting (standing in for TCP + TLS + AUTH to a
+real relay) and optionally dropping the connection every ``--drop-every``
+messages, then queues
+``--messages`` emails through :class:`EmailService` for each batch size and
+reports messages per second, connections opened and reconnects::
+
+    python -m benchmarks.email_queue --messages 500 --batch-size 1 --batch-size 50
+
+Batch size 1 is the old behaviour of one connection per message. Each batch
+size runs in a separate process against a fresh SQLite database, since the
+mail settings are read when the config module is imported.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from tests.smtp_stand_in import SmtpStandIn  # noqa: E402
+
+
+def _run_batch_size(args):
+    """Child process: queue the messages, wait for delivery and print a JSON result."""
+    os.environ.update({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{args.db}',
+        'INSTRUMENTATION_ENABLED': 'false',
+        'MAIL_SERVER': '127.0.0.1',
+        'MAIL_PORT': str(args.port),
+        'MAIL_USE_TLS': 'false',
+        'MAIL_USE_SSL': 'false',
+        'MAIL_BATCH_SIZE': str(args.worker),
+        'MAIL_WORKER_THREADS': str(args.threads),
+        'MAIL_QUEUE_MAX_SIZE': str(max(args.messages, 1000)),
+    })
+
+    from app import create_app
+    from app.models import db
+    from app.models.outbound_email import EMAIL_STATUS_SENT, OutboundEmail
+    from app.services.email_queue import get_dispatcher
+    from app.services.email_service import EmailService
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        dispatcher = get_dispatcher()
+        started = time.perf_counter()
+        for index in range(args.messages):
+            EmailService.send_email(
+                f'Benchmark {index}', 'bench@trackdesk.local', [f'user{index}@example.com'], 'Hello',
+            )
+        deadline = time.monotonic() + args.timeout
+        sent = 0
+        while time.monotonic() < deadline:
+            sent = OutboundEmail.query.filter_by(status=EMAIL_STATUS_SENT).count()
+            db.session.remove()
+            if sent >= args.messages:
+                break
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - started
+        dispatcher.shutdown()
+        stats = dispatcher.stats.snapshot()
+
+    print(json.dumps({
+        'sent': sent,
+        'seconds': round(elapsed, 3),
+        'messages_per_second': round(sent / elapsed, 1) if elapsed else 0.0,
+        'connections': stats['connections'],
+        'reconnects': stats['reconnects'],
+        'batches': stats['batches'],
+        'failed': stats['failed'],
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, action='append', help='batch sizes to measure (repeatable)')
+    parser.add_argument('--threads', type=int, default=2, help='MAIL_WORKER_THREADS')
+    parser.add_argument('--handshake-ms', type=float, default=50, help='delay before the server greeting')
+    parser.add_argument('--drop-every', type=int, default=0, help='drop the connection every N messages')
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _run_batch_size(args)
+        return
+
+    server = SmtpStandIn(args.handshake_ms, args.drop_every).start()
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for batch_size in args.batch_size or (1, 50):
+                server.messages = 0
+                completed = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.email_queue', '--worker', str(batch_size),
+                     '--db', os.path.join(tmp, f'email_{batch_size}.db'), '--port', str(server.port),
+                     '--messages', str(args.messages), '--threads', str(args.threads),
+                     '--timeout', str(args.timeout)],
+                    cwd=ROOT, capture_output=True, text=True, check=False,
+                )
+                if completed.returncode != 0:
+                    raise RuntimeError(f'batch size {batch_size} run failed:\n{completed.stderr}')
+                results[str(batch_size)] = json.loads(completed.stdout.strip().splitlines()[-1])
+                results[str(batch_size)]['received_by_server'] = server.messages
+                print(f"batch size {batch_size}: {results[str(batch_size)]['messages_per_second']} messages/s "
+                      f"connections={results[str(batch_size)]['connections']}", file=sys.stderr)
+    finally:
+        server.stop()
+
+    report = {
+        'parameters': {
+            'messages': args.messages, 'threads': args.threads,
+            'handshake_ms': args.handshake_ms, 'drop_every': args.drop_every,
+        },
+        'batch_sizes': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
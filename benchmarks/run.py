@@ -0,0 +1,261 @@
+"""Latency and query-count benchmarks over a synthetic multi-tenant dataset.
+
+Builds a fresh database with :mod:`benchmarks.datagen`, then times the hot
+service calls and pages (both dashboards, trial balance, financial reports,
+inventory listing, global search, POS index and checkout, invoice PDF) and
+prints percentiles and SQL statement counts per scenario as JSON::
+
+    python -m benchmarks.run --companies 2 --items 20000 --iterations 20 --output before.json
+
+Runs with the same sizes and seed see the same data, so two JSON reports can
+be compared directly.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.datagen import DatasetSize  # noqa: E402
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+class QueryCounter:
+    """Counts statements executed on an engine while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(self.engine, 'after_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+        event.remove(self.engine, 'after_cursor_execute', self._on_execute)
+
+
+class Scenarios:
+    """The benchmarked calls, bound to one company of the generated dataset."""
+
+    def __init__(self, app, db, dataset, company_id, seed):
+        self.app = app
+        self.db = db
+        self.dataset = dataset
+        self.company_id = company_id
+        self.slug = dataset.company_slugs[company_id]
+        self.rng = random.Random(seed)
+        self.client = app.test_client()
+        with self.client.session_transaction() as session:
+            session['_user_id'] = str(dataset.user_id)
+            session['_fresh'] = True
+            session['selected_company_id'] = company_id
+            session['selected_company_slug'] = self.slug
+
+    def _in_request(self, fn):
+        # Each call gets its own app context, hence a fresh session and ``g``.
+        from flask_login import login_user
+        from app.models import User
+
+        with self.app.test_request_context():
+            login_user(self.db.session.get(User, self.dataset.user_id))
+            return fn()
+
+    def _get(self, url):
+        response = self.client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f'GET {url} returned {response.status_code}')
+
+    def dashboard(self):
+        from app.dashboard.services.dashboard_service import DashboardService
+        self._in_request(lambda: DashboardService.get_dashboard_data(self.company_id))
+
+    def accounting_dashboard(self):
+        from app.accounting.services import AccountingService
+        self._in_request(lambda: AccountingService.get_dashboard_data(self.company_id))
+
+    def trial_balance(self):
+        from app.accounting.services import AccountingService
+        self._in_request(lambda: AccountingService.get_trial_balance(self.company_id))
+
+    def _report(self, report_type):
+        from app.accounting.services import AccountingService
+        end = date.today()
+        start = end - timedelta(days=365)
+        self._in_request(lambda: AccountingService.compute_report(
+            self.company_id, report_type, start.isoformat(), end.isoformat(),
+        ))
+
+    def income_statement(self):
+        self._report('income_statement')
+
+    def balance_sheet(self):
+        self._report('balance_sheet')
+
+    def cash_flow(self):
+        self._report('cash_flow')
+
+    def inventory_items(self):
+        from app.inventory.services.inventory_service import InventoryService
+        self._in_request(lambda: InventoryService.get_inventory_items(self.company_id, page=1, per_page=15))
+
+    def inventory_search(self):
+        from app.inventory.services.inventory_service import InventoryService
+        term = f'{self.rng.randrange(1000):03d}'
+        self._in_request(lambda: InventoryService.get_inventory_items(self.company_id, page=1, per_page=15, search=term))
+
+    def global_search(self):
+        self._get(f'/search?q=Producto%20{self.rng.randrange(100):02d}')
+
+    def pos_index(self):
+        self._get(f'/{self.slug}/pos')
+
+    def pos_checkout(self):
+        items = self.rng.sample(self.dataset.stocked_item_ids[self.company_id], 3)
+        response = self.client.post(f'/{self.slug}/pos/checkout', data={
+            'warehouse_id': self.dataset.warehouse_ids[self.company_id],
+            'client_id': self.rng.choice(self.dataset.customer_ids[self.company_id]),
+            'cart_payload': json.dumps([{'id': item_id, 'quantity': 1} for item_id in items]),
+            'amount_received': '100000',
+            'payment_method': 'cash',
+        })
+        if 'receipt_id=' not in response.headers.get('Location', ''):
+            raise RuntimeError('POS checkout did not produce a receipt')
+
+    def invoice_pdf(self):
+        from app.invoices.services.invoice_pdf_service import generate_invoice_pdf
+        from app.models import Document, DocumentTemplate
+
+        document_id = self.rng.choice(self.dataset.document_ids[self.company_id])
+
+        def render():
+            document = self.db.session.get(Document, document_id)
+            template = self.db.session.get(DocumentTemplate, self.dataset.template_ids[self.company_id])
+            return generate_invoice_pdf(document, template=template)
+
+        self._in_request(render)
+
+
+SCENARIOS = (
+    'dashboard', 'accounting_dashboard', 'trial_balance',
+    'income_statement', 'balance_sheet', 'cash_flow',
+    'inventory_items', 'inventory_search', 'global_search',
+    'pos_index', 'pos_checkout', 'invoice_pdf',
+)
+
+
+def run_scenario(engine, fn, iterations, warmup):
+    for _ in range(warmup):
+        fn()
+
+    durations, queries = [], []
+    with QueryCounter(engine) as counter:
+        for _ in range(iterations):
+            counter.count = 0
+            started = time.perf_counter()
+            fn()
+            durations.append((time.perf_counter() - started) * 1000)
+            queries.append(counter.count)
+
+    durations.sort()
+    return {
+        'iterations': iterations,
+        'p50_ms': round(_percentile(durations, 50), 2),
+        'p90_ms': round(_percentile(durations, 90), 2),
+        'p95_ms': round(_percentile(durations, 95), 2),
+        'p99_ms': round(_percentile(durations, 99), 2),
+        'mean_ms': round(statistics.fmean(durations), 2),
+        'max_ms': round(durations[-1], 2),
+        'avg_queries': round(statistics.fmean(queries), 1),
+        'max_queries': max(queries),
+    }
+
+
+def main():
+    defaults = DatasetSize()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--companies', type=int, default=defaults.companies)
+    parser.add_argument('--contacts', type=int, default=defaults.contacts, help='per company')
+    parser.add_argument('--items', type=int, default=defaults.items, help='per company')
+    parser.add_argument('--invoices', type=int, default=defaults.invoices, help='per company')
+    parser.add_argument('--transactions', type=int, default=defaults.transactions, help='per company')
+    parser.add_argument('--audit-rows', type=int, default=defaults.audit_rows, help='per company')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, help='run only these (repeatable)')
+    parser.add_argument('--db', help='empty database URL to use instead of a temporary SQLite file')
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    args = parser.parse_args()
+
+    size = DatasetSize(
+        companies=args.companies, contacts=args.contacts, items=args.items, invoices=args.invoices,
+        transactions=args.transactions, audit_rows=args.audit_rows,
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['SQLALCHEMY_DATABASE_URI'] = args.db or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+
+        from app import create_app
+        from app.extensions import limiter
+        from app.models import db
+        from benchmarks.datagen import generate
+
+        app = create_app()
+        app.config['WTF_CSRF_ENABLED'] = False
+        # The limiter reads its settings at init time, so switch the extension off directly.
+        limiter.enabled = False
+        with app.app_context():
+            db.create_all()
+            started = time.perf_counter()
+            dataset = generate(db, size, seed=args.seed)
+            generate_seconds = time.perf_counter() - started
+            engine = db.engine
+
+        # Scenarios run outside the generator's app context so every call
+        # starts from a clean session, as a real request would.
+        scenarios = Scenarios(app, db, dataset, dataset.company_ids[0], args.seed)
+        results = {}
+        for name in args.scenario or SCENARIOS:
+            results[name] = run_scenario(engine, getattr(scenarios, name), args.iterations, args.warmup)
+            print(f"{name}: p50={results[name]['p50_ms']}ms p95={results[name]['p95_ms']}ms "
+                  f"queries={results[name]['avg_queries']}", file=sys.stderr)
+        engine.dispose()
+
+    report = {
+        'parameters': {**asdict(size), 'iterations': args.iterations, 'warmup': args.warmup, 'seed': args.seed},
+        'environment': {'python': platform.python_version(), 'dialect': engine.dialect.name},
+        'generate_seconds': round(generate_seconds, 2),
+        'scenarios': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
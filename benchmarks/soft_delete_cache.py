@@ -0,0 +1,142 @@
+"""Compiled-statement cache hit rate of the soft-delete filter.
+
+Runs the same ORM workload (filtered lists, ``session.get``, refreshes of
+expired instances and lazy loads) once with the previous per-statement
+``with_loader_criteria`` hook and once with the current one, and prints the
+cache hits, misses and wall time of each as JSON::
+
+    python benchmarks/soft_delete_cache.py --iterations 500
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def _legacy_filtering_criteria(execute_state):
+    """The hook as it was before is_deleted became NOT NULL."""
+    from sqlalchemy.orm import with_loader_criteria
+    from app.models.base import BaseModel
+
+    if execute_state.is_select and not execute_state.execution_options.get("include_deleted", False):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(
+                BaseModel,
+                lambda cls: (cls.is_deleted == False) | (cls.is_deleted == None),  # noqa: E711,E712
+                include_aliases=True
+            )
+        )
+
+
+def _seed(db, items_count):
+    from app.models import Company, Contact, InventoryItem, StockMovement, Warehouse
+    from app.models.enums import ContactType, StockMovementType
+
+    company = Company(name='Bench', identifier='BENCH', slug='bench')
+    db.session.add(company)
+    db.session.flush()
+    supplier = Contact(company_id=company.id, name='Supplier', type=ContactType.supplier)
+    warehouse = Warehouse(company_id=company.id, name='Main')
+    db.session.add_all([supplier, warehouse])
+    db.session.flush()
+    for idx in range(items_count):
+        item = InventoryItem(
+            company_id=company.id, name=f'Item {idx}', sku=f'SKU-{idx}',
+            quantity=10, price=5, cost_price=2, supplier_id=supplier.id,
+            is_deleted=(idx % 10 == 0),
+        )
+        db.session.add(item)
+        db.session.flush()
+        db.session.add(StockMovement(
+            company_id=company.id, inventory_item_id=item.id, warehouse_id=warehouse.id,
+            type=StockMovementType.incoming, quantity=10,
+        ))
+    db.session.commit()
+    return company.id, supplier.id
+
+
+def _workload(db, company_id, supplier_id, iterations):
+    from app.models import Contact, InventoryItem, StockMovement
+
+    for idx in range(iterations):
+        items = InventoryItem.query.filter(
+            InventoryItem.company_id == company_id,
+            InventoryItem.quantity >= idx % 5,
+        ).limit(10).all()
+        supplier = db.session.get(Contact, supplier_id)
+        _ = supplier.name
+        _ = items[0].supplier
+        StockMovement.query.filter(StockMovement.company_id == company_id).limit(10).all()
+        db.session.expire_all()
+        _ = supplier.name  # refresh of an expired instance
+
+
+def _run(db, engine, company_id, supplier_id, iterations):
+    from sqlalchemy import event
+
+    stats = Counter()
+
+    def count_cache(conn, cursor, statement, parameters, context, executemany):
+        stats[context.cache_hit.name] += 1
+
+    event.listen(engine, 'after_cursor_execute', count_cache)
+    started = time.perf_counter()
+    try:
+        _workload(db, company_id, supplier_id, iterations)
+    finally:
+        event.remove(engine, 'after_cursor_execute', count_cache)
+    elapsed = time.perf_counter() - started
+
+    statements = sum(stats.values())
+    return {
+        'statements': statements,
+        'cache_hits': stats['CACHE_HIT'],
+        'cache_misses': stats['CACHE_MISS'],
+        'hit_rate': round(stats['CACHE_HIT'] / statements, 4) if statements else None,
+        'seconds': round(elapsed, 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=300)
+    parser.add_argument('--items', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+
+        from sqlalchemy import event
+        from sqlalchemy.orm import Session
+        from app import create_app
+        from app.models import base, db
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            company_id, supplier_id = _seed(db, args.items)
+
+            event.remove(Session, 'do_orm_execute', base._add_filtering_criteria)
+            event.listen(Session, 'do_orm_execute', _legacy_filtering_criteria)
+            try:
+                legacy = _run(db, db.engine, company_id, supplier_id, args.iterations)
+            finally:
+                event.remove(Session, 'do_orm_execute', _legacy_filtering_criteria)
+                event.listen(Session, 'do_orm_execute', base._add_filtering_criteria)
+            db.session.remove()
+
+            current = _run(db, db.engine, company_id, supplier_id, args.iterations)
+            db.session.remove()
+
+    print(json.dumps({'iterations': args.iterations, 'legacy': legacy, 'current': current}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Worker and cron-job startup cost of the application factory.
+
+Runs ``python -X importtime`` in a fresh interpreter for each mode, ``full``
+(``create_app()``, what a web worker pays) and ``lightweight``
+(``create_app(lightweight=True)``, what the cron scripts pay), and reports
+the wall time, the total self import time, whether the heavy PDF / barcode /
+spreadsheet libraries were imported and the slowest top-level imports::
+
+    python -m benchmarks.startup --runs 5 --output startup.json
+
+Times are medians over ``--runs`` interpreters. Bytecode is compiled once by a
+warm-up run so later runs measure imports, not compilation.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.lazy_backends import HEAVY_MODULES  # noqa: E402
+
+MODES = {
+    'full': 'from app import create_app; create_app()',
+    'lightweight': 'from app import create_app; create_app(lightweight=True)',
+}
+
+
+def parse_importtime(stderr):
+    """Return ``[(module, self_us, cumulative_us, depth)]`` from ``-X importtime`` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def _run_once(code, env):
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=False,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(f'startup run failed:\n{completed.stderr[-4000:]}')
+    return wall_ms, parse_importtime(completed.stderr)
+
+
+def measure(mode, runs, top, env):
+    code = MODES[mode]
+    _run_once(code, env)
+
+    wall_times, import_totals, rows = [], [], []
+    for _ in range(runs):
+        wall_ms, rows = _run_once(code, env)
+        wall_times.append(wall_ms)
+        import_totals.append(sum(self_us for _name, self_us, _cum, _depth in rows) / 1000)
+
+    loaded = {name for name, _self, _cum, _depth in rows}
+    top_level = sorted((row for row in rows if row[3] == 0), key=lambda row: row[2], reverse=True)
+    return {
+        'wall_ms': round(statistics.median(wall_times), 1),
+        'import_ms': round(statistics.median(import_totals), 1),
+        'modules_imported': len(rows),
+        'heavy_modules_loaded': [name for name in HEAVY_MODULES if name in loaded],
+        'slowest_imports': [
+            {'module': name, 'cumulative_ms': round(cumulative_us / 1000, 1)}
+            for name, _self, cumulative_us, _depth in top_level[:top]
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', action='append', choices=tuple(MODES), help='modes to measure (repeatable)')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='slowest top-level imports to list')
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault('INSTRUMENTATION_ENABLED', 'false')
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+
+    report = {
+        'parameters': {'runs': args.runs, 'python': sys.version.split()[0]},
+        'modes': {mode: measure(mode, args.runs, args.top, env) for mode in args.mode or tuple(MODES)},
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -11,10 +11,29 @@ class Config:
                                        
     SQLALCHEMY_DATABASE_URI = os.getenv("SQLALCHEMY_DATABASE_URI", "sqlite:///trackdesk.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = os.getenv("SQLALCHEMY_TRACK_MODIFICATIONS", False)
+    # Optional read replica for reports, exports and search (see app.extensions.read_replica)
+    SQLALCHEMY_REPLICA_URI = os.getenv("SQLALCHEMY_REPLICA_URI")
+
+    # Engine tuning: auto | sqlite | server | default (see app/engine_profiles.py)
+    DB_ENGINE_PROFILE = os.getenv("DB_ENGINE_PROFILE", "auto")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", 20000))
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 30000))
 
                            
     PERMANENT_SESSION_LIFETIME = timedelta(minutes=int(os.getenv("PERMANENT_SESSION_LIFETIME", 60)))
+    # filesystem | redis store sessions server-side in STATE_STORAGE_URL, cookie keeps signed-cookie sessions
     SESSION_TYPE = os.getenv("SESSION_TYPE", 'filesystem')
+    # sqlite:///path/state.db or redis://host:6379/0; filesystem defaults to state.db in the instance folder
+    STATE_STORAGE_URL = os.getenv("STATE_STORAGE_URL")
+    # Overrides the rate-limit storage; otherwise the limiter shares STATE_STORAGE_URL
+    RATELIMIT_STORAGE_URI = os.getenv("RATELIMIT_STORAGE_URI")
     SESSION_COOKIE_HTTPONLY = os.getenv("SESSION_COOKIE_HTTPONLY", True)
     SESSION_COOKIE_SECURE = os.getenv("SESSION_COOKIE_SECURE", True)
     REMEMBER_COOKIE_DURATION = timedelta(days=int(os.getenv("REMEMBER_COOKIE_DURATION", 7)))
@@ -34,11 +53,45 @@ class Config:
     MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER")
     TRACKDESK_MAIL_SUBJECT_PREFIX = '[TrackDesk]'
     TRACKDESK_MAIL_SENDER = os.getenv("TRACKDESK_MAIL_SENDER", "TrackDesk Admin <admin@trackdesk.local>")
+    # Outbound email queue (see app/services/email_queue.py)
+    MAIL_WORKER_THREADS = int(os.getenv("MAIL_WORKER_THREADS", 2))
+    MAIL_QUEUE_MAX_SIZE = int(os.getenv("MAIL_QUEUE_MAX_SIZE", 1000))
+    MAIL_BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", 50))
+    MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", 5))
+    MAIL_RETRY_BACKOFF_SECONDS = int(os.getenv("MAIL_RETRY_BACKOFF_SECONDS", 60))
+    MAIL_RETRY_INTERVAL = float(os.getenv("MAIL_RETRY_INTERVAL", 30))
+    MAIL_LOCK_TIMEOUT_MINUTES = int(os.getenv("MAIL_LOCK_TIMEOUT_MINUTES", 10))
     TRACKDESK_ADMIN = os.getenv("TRACKDESK_ADMIN", "vrsanchesu@gmail.com")
     
                          
     LANGUAGES = {}
     
+    # Request instrumentation (support portal > Rendimiento)
+    INSTRUMENTATION_ENABLED = os.getenv("INSTRUMENTATION_ENABLED", "true").lower() in ["true", "on", "1"]
+    INSTRUMENTATION_BUFFER_SIZE = int(os.getenv("INSTRUMENTATION_BUFFER_SIZE", 200))
+    INSTRUMENTATION_ENDPOINT_SAMPLES = int(os.getenv("INSTRUMENTATION_ENDPOINT_SAMPLES", 500))
+    INSTRUMENTATION_SERVER_TIMING = os.getenv("INSTRUMENTATION_SERVER_TIMING", "false").lower() in ["true", "on", "1"]
+    SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", 1000))
+
+    # Seconds the main dashboard metrics stay cached per company (0 disables)
+    DASHBOARD_CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", 30))
+    # Seconds the record counts of the company pages stay cached per company (0 disables)
+    COMPANY_STATS_CACHE_TTL = int(os.getenv("COMPANY_STATS_CACHE_TTL", 60))
+    # Keep per-contact stats in the contact_stats table (recomputed on commit)
+    CONTACT_STATS_CACHE_ENABLED = os.getenv("CONTACT_STATS_CACHE_ENABLED", "true").lower() in ["true", "on", "1"]
+
+    # Invoice numbers reserved at once per POS register / worker process (0 or 1 disables blocks)
+    DOCUMENT_NUMBER_BLOCK_SIZE = int(os.getenv("DOCUMENT_NUMBER_BLOCK_SIZE", 0))
+
+    # Background jobs run by `flask worker` (see app/services/job_service.py)
+    JOB_WORKER_THREADS = int(os.getenv("JOB_WORKER_THREADS", 4))
+    JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 2))
+    JOB_LOCK_TIMEOUT_MINUTES = int(os.getenv("JOB_LOCK_TIMEOUT_MINUTES", 30))
+    JOB_RETRY_BACKOFF_SECONDS = int(os.getenv("JOB_RETRY_BACKOFF_SECONDS", 30))
+    JOB_RESULTS_DIR = os.getenv("JOB_RESULTS_DIR")  # defaults to <instance>/job_results
+    JOB_RESULT_TTL_HOURS = int(os.getenv("JOB_RESULT_TTL_HOURS", 24))
+    JOB_SCHEDULER_ENABLED = os.getenv("JOB_SCHEDULER_ENABLED", "true").lower() in ["true", "on", "1"]
+
     # File uploads for expense receipts
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app', 'static', 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB max
@@ -10,7 +10,7 @@ if project_home not in sys.path:
 from app import create_app
 from app.inventory.services import send_low_stock_notifications
 
-app = create_app()
+app = create_app(lightweight=True)
 
 
 # 3. Run the notification logic within the app context
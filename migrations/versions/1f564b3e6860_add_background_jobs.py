@@ -0,0 +1,56 @@
+"""Add the background job queue table."""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "1f564b3e6860"
+down_revision = "7d870ee74437"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "background_jobs",
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=True),
+        sa.Column("company_id", sa.Integer(), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("unique_key", sa.String(length=200), nullable=True),
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="queued"),
+        sa.Column("priority", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("max_attempts", sa.Integer(), nullable=False, server_default="3"),
+        sa.Column("run_at", sa.DateTime(), nullable=False),
+        sa.Column("locked_by", sa.String(length=100), nullable=True),
+        sa.Column("locked_at", sa.DateTime(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("result_path", sa.String(length=500), nullable=True),
+        sa.Column("result_filename", sa.String(length=255), nullable=True),
+        sa.Column("result_mimetype", sa.String(length=100), nullable=True),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("is_deleted", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("deleted_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.CheckConstraint(
+            "status IN ('queued', 'running', 'succeeded', 'failed')", name="check_background_job_status",
+        ),
+        sa.ForeignKeyConstraint(["company_id"], ["companies.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("unique_key"),
+    )
+    with op.batch_alter_table("background_jobs") as batch_op:
+        batch_op.create_index("ix_background_jobs_name", ["name"])
+        batch_op.create_index("ix_background_jobs_company_id", ["company_id"])
+        batch_op.create_index("ix_background_jobs_user_id", ["user_id"])
+        batch_op.create_index("ix_background_jobs_finished_at", ["finished_at"])
+        batch_op.create_index("ix_background_jobs_status_run_at", ["status", "run_at", "priority"])
+        batch_op.create_index("ix_background_jobs_user_created", ["user_id", "created_at"])
+
+
+def downgrade():
+    op.drop_table("background_jobs")
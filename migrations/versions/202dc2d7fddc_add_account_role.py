@@ -0,0 +1,48 @@
+"""Add a typed cash/receivable/payable role to accounts, backfilled from account names."""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "202dc2d7fddc"
+down_revision = "4a6f7dd1d1d8"
+branch_labels = None
+depends_on = None
+
+account_role = sa.Enum("cash", "receivable", "payable", name="accountrole")
+
+# Same rules and priority as AccountService.ROLE_RULES: (role, account type, name keywords).
+ROLE_RULES = (
+    ("receivable", "asset", ("cobrar", "receivable")),
+    ("payable", "liability", ("pagar", "payable")),
+    ("cash", "asset", ("caja", "banco", "cash")),
+)
+
+
+def upgrade():
+    account_role.create(op.get_bind(), checkfirst=True)
+    with op.batch_alter_table("accounts") as batch_op:
+        batch_op.add_column(sa.Column("role", account_role, nullable=True))
+        batch_op.create_index("ix_accounts_role", ["role"])
+
+    accounts = sa.table(
+        "accounts",
+        sa.column("role", account_role),
+        sa.column("type", sa.String),
+        sa.column("name", sa.String),
+    )
+    for role, account_type, keywords in ROLE_RULES:
+        op.execute(
+            accounts.update()
+            .where(
+                accounts.c.role.is_(None),
+                accounts.c.type == account_type,
+                sa.or_(*(sa.func.lower(accounts.c.name).like(f"%{keyword}%") for keyword in keywords)),
+            )
+            .values(role=role)
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("accounts") as batch_op:
+        batch_op.drop_index("ix_accounts_role")
+        batch_op.drop_column("role")
+    account_role.drop(op.get_bind(), checkfirst=True)
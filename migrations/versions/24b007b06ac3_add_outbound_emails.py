@@ -0,0 +1,42 @@
+"""Add the outbound email queue table."""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "24b007b06ac3"
+down_revision = "1f564b3e6860"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "outbound_emails",
+        sa.Column("subject", sa.String(length=500), nullable=False),
+        sa.Column("sender", sa.String(length=255), nullable=True),
+        sa.Column("recipients", sa.JSON(), nullable=False),
+        sa.Column("text_body", sa.Text(), nullable=True),
+        sa.Column("html_body", sa.Text(), nullable=True),
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("locked_by", sa.String(length=100), nullable=True),
+        sa.Column("locked_at", sa.DateTime(), nullable=True),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("is_deleted", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("deleted_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.CheckConstraint(
+            "status IN ('pending', 'sending', 'sent', 'failed')", name="check_outbound_email_status",
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("outbound_emails") as batch_op:
+        batch_op.create_index("ix_outbound_emails_locked_by", ["locked_by"])
+        batch_op.create_index("ix_outbound_emails_status_next_attempt", ["status", "next_attempt_at"])
+
+
+def downgrade():
+    op.drop_table("outbound_emails")
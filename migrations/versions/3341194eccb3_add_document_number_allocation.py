@@ -0,0 +1,96 @@
+"""Add quote/purchase order counters to document sequences, number blocks and the released number log."""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "3341194eccb3"
+down_revision = "202dc2d7fddc"
+branch_labels = None
+depends_on = None
+
+
+def _base_columns():
+    return [
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("is_deleted", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("deleted_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    ]
+
+
+def upgrade():
+    with op.batch_alter_table("document_sequences") as batch_op:
+        batch_op.add_column(sa.Column("kind", sa.String(length=20), nullable=False, server_default="invoice"))
+        batch_op.alter_column("cai", existing_type=sa.String(length=50), nullable=True)
+        batch_op.alter_column("expiration_date", existing_type=sa.Date(), nullable=True)
+        # current is the last number handed out: range_start - 1 for an unused range.
+        batch_op.drop_constraint("check_doc_sequence_range", type_="check")
+        batch_op.create_check_constraint(
+            "check_doc_sequence_range", "range_start > 0 AND range_end > 0 AND current >= range_start - 1",
+        )
+        batch_op.create_check_constraint(
+            "check_doc_sequence_kind", "kind IN ('invoice', 'quote', 'purchase_order')",
+        )
+        batch_op.create_index("ix_document_sequences_kind", ["kind"])
+    op.create_index(
+        "uq_doc_sequence_counter", "document_sequences", ["company_id", "kind"], unique=True,
+        postgresql_where=sa.text("kind <> 'invoice'"),
+        sqlite_where=sa.text("kind <> 'invoice'"),
+    )
+
+    op.create_table(
+        "document_number_blocks",
+        sa.Column("company_id", sa.Integer(), nullable=False),
+        sa.Column("sequence_id", sa.Integer(), nullable=False),
+        sa.Column("holder", sa.String(length=100), nullable=False),
+        sa.Column("range_start", sa.Integer(), nullable=False),
+        sa.Column("range_end", sa.Integer(), nullable=False),
+        sa.Column("next_value", sa.Integer(), nullable=False),
+        sa.Column("released_at", sa.DateTime(), nullable=True),
+        *_base_columns(),
+        sa.CheckConstraint(
+            "range_end >= range_start AND next_value >= range_start AND next_value <= range_end + 1",
+            name="check_doc_number_block_range",
+        ),
+        sa.ForeignKeyConstraint(["company_id"], ["companies.id"]),
+        sa.ForeignKeyConstraint(["sequence_id"], ["document_sequences.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("document_number_blocks") as batch_op:
+        for column_name in ("company_id", "sequence_id", "holder", "released_at"):
+            batch_op.create_index(f"ix_document_number_blocks_{column_name}", [column_name])
+        batch_op.create_index("ix_doc_number_blocks_holder_open", ["sequence_id", "holder", "released_at"])
+
+    op.create_table(
+        "document_number_gaps",
+        sa.Column("company_id", sa.Integer(), nullable=False),
+        sa.Column("sequence_id", sa.Integer(), nullable=False),
+        sa.Column("number", sa.Integer(), nullable=False),
+        sa.Column("reason", sa.String(length=50), nullable=False),
+        sa.Column("released_at", sa.DateTime(), nullable=False),
+        *_base_columns(),
+        sa.ForeignKeyConstraint(["company_id"], ["companies.id"]),
+        sa.ForeignKeyConstraint(["sequence_id"], ["document_sequences.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("sequence_id", "number", name="uq_doc_number_gap"),
+    )
+    with op.batch_alter_table("document_number_gaps") as batch_op:
+        batch_op.create_index("ix_document_number_gaps_company_id", ["company_id"])
+        batch_op.create_index("ix_document_number_gaps_sequence_id", ["sequence_id"])
+
+
+def downgrade():
+    op.drop_table("document_number_gaps")
+    op.drop_table("document_number_blocks")
+    op.drop_index("uq_doc_sequence_counter", table_name="document_sequences")
+    op.execute("DELETE FROM document_sequences WHERE kind <> 'invoice'")
+    with op.batch_alter_table("document_sequences") as batch_op:
+        batch_op.drop_index("ix_document_sequences_kind")
+        batch_op.drop_constraint("check_doc_sequence_kind", type_="check")
+        batch_op.drop_constraint("check_doc_sequence_range", type_="check")
+        batch_op.create_check_constraint(
+            "check_doc_sequence_range", "range_start > 0 AND range_end > 0 AND current >= range_start",
+        )
+        batch_op.alter_column("expiration_date", existing_type=sa.Date(), nullable=False)
+        batch_op.alter_column("cai", existing_type=sa.String(length=50), nullable=False)
+        batch_op.drop_column("kind")
@@ -0,0 +1,34 @@
+"""Add composite and covering indexes for the hot company-scoped queries."""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "4a6f7dd1d1d8"
+down_revision = "a2b3c4d5e6f7"
+branch_labels = None
+depends_on = None
+
+# (table, index name, columns, PostgreSQL INCLUDE columns). Every ORM query
+# carries is_deleted = false, so it sits right after the equality columns.
+INDEXES = (
+    ("documents", "ix_documents_company_type_status_issued",
+     ["company_id", "type", "is_deleted", "status", "issued_date"], ["total_amount"]),
+    ("ledger_entries", "ix_ledger_entries_company_account_date",
+     ["company_id", "account_id", "date", "id"], ["debit", "credit"]),
+    ("stock_movements", "ix_stock_movements_company_date", ["company_id", "date"], []),
+    ("stock_movements", "ix_stock_movements_item_date", ["inventory_item_id", "date", "id"], []),
+    ("payments", "ix_payments_company_date", ["company_id", "payment_date"], ["amount"]),
+    ("notifications", "ix_notifications_user_status_sent", ["user_id", "status", "sent_at"], []),
+    ("audit_logs", "ix_audit_logs_table_record_created", ["table_name", "record_id", "created_at"], []),
+)
+
+
+def upgrade():
+    for table, name, columns, include in INDEXES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.create_index(name, columns, postgresql_include=include)
+
+
+def downgrade():
+    for table, name, _columns, _include in reversed(INDEXES):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_index(name)
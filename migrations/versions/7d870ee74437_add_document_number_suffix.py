@@ -0,0 +1,66 @@
+"""Store the numeric suffix of document numbers in an indexed column, backfilled from existing rows."""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "7d870ee74437"
+down_revision = "3341194eccb3"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+MAX_SUFFIX = 2_147_483_647
+
+
+def _suffix(document_number):
+    try:
+        value = int(str(document_number).rsplit("-", 1)[-1])
+    except (TypeError, ValueError):
+        return None
+    return value if 0 <= value <= MAX_SUFFIX else None
+
+
+def upgrade():
+    with op.batch_alter_table("documents") as batch_op:
+        batch_op.add_column(sa.Column("number_suffix", sa.Integer(), nullable=True))
+
+    bind = op.get_bind()
+    documents = sa.table(
+        "documents",
+        sa.column("id", sa.Integer),
+        sa.column("document_number", sa.String),
+        sa.column("number_suffix", sa.Integer),
+    )
+    update = (
+        documents.update()
+        .where(documents.c.id == sa.bindparam("row_id"))
+        .values(number_suffix=sa.bindparam("suffix"))
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(documents.c.id, documents.c.document_number)
+            .where(documents.c.id > last_id)
+            .order_by(documents.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        params = [
+            {"row_id": row.id, "suffix": suffix}
+            for row in rows
+            if (suffix := _suffix(row.document_number)) is not None
+        ]
+        if params:
+            bind.execute(update, params)
+
+    with op.batch_alter_table("documents") as batch_op:
+        batch_op.create_index(
+            "ix_documents_company_type_number_suffix", ["company_id", "type", "is_deleted", "number_suffix"],
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("documents") as batch_op:
+        batch_op.drop_index("ix_documents_company_type_number_suffix")
+        batch_op.drop_column("number_suffix")
@@ -0,0 +1,54 @@
+"""Make is_deleted NOT NULL and index (company_id, is_deleted) on hot tables."""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "a2b3c4d5e6f7"
+down_revision = "f1a2b3c4d5e6"
+branch_labels = None
+depends_on = None
+
+SOFT_DELETE_TABLES = (
+    "accounting_attachments", "accounts", "approval_requests", "audit_logs", "categories",
+    "companies", "contacts", "document_items", "document_sequences", "document_templates",
+    "documents", "employees", "expenses", "inventory_items", "inventory_stats",
+    "leave_requests", "ledger_entries", "notifications", "payments", "permissions",
+    "pos_cash_movements", "pos_register_sessions", "projects", "purchase_order_items",
+    "purchase_orders", "reports", "roles", "stock_movements", "stock_snapshots", "tags",
+    "tokens", "transactions", "users", "warehouse_items", "warehouses", "work_schedules",
+)
+
+COMPANY_INDEX_TABLES = (
+    "accounts", "contacts", "documents", "expenses", "inventory_items",
+    "ledger_entries", "payments", "purchase_orders", "stock_movements", "transactions",
+)
+
+
+def upgrade():
+    for table in SOFT_DELETE_TABLES:
+        op.execute(sa.text(f"UPDATE {table} SET is_deleted = :false WHERE is_deleted IS NULL").bindparams(false=False))
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                "is_deleted",
+                existing_type=sa.Boolean(),
+                nullable=False,
+                server_default=sa.false(),
+            )
+
+    for table in COMPANY_INDEX_TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.create_index(f"ix_{table}_company_id_is_deleted", ["company_id", "is_deleted"])
+
+
+def downgrade():
+    for table in COMPANY_INDEX_TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_index(f"ix_{table}_company_id_is_deleted")
+
+    for table in SOFT_DELETE_TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                "is_deleted",
+                existing_type=sa.Boolean(),
+                nullable=True,
+                server_default=None,
+            )
@@ -0,0 +1,37 @@
+"""Add per-contact stats cache."""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "a2e143b1b9f6"
+down_revision = "24b007b06ac3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "contact_stats",
+        sa.Column("contact_id", sa.Integer(), nullable=False),
+        sa.Column("company_id", sa.Integer(), nullable=False),
+        sa.Column("document_count", sa.Integer(), nullable=False),
+        sa.Column("total_billed", sa.Numeric(16, 2), nullable=False),
+        sa.Column("total_paid", sa.Numeric(16, 2), nullable=False),
+        sa.Column("product_count", sa.Integer(), nullable=False),
+        sa.Column("stock_value", sa.Numeric(16, 2), nullable=False),
+        sa.Column("low_stock_products", sa.Integer(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("is_deleted", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("deleted_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["contact_id"], ["contacts.id"]),
+        sa.ForeignKeyConstraint(["company_id"], ["companies.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("contact_stats") as batch_op:
+        batch_op.create_index("ix_contact_stats_contact_id", ["contact_id"], unique=True)
+        batch_op.create_index("ix_contact_stats_company_id", ["company_id"])
+
+
+def downgrade():
+    op.drop_table("contact_stats")
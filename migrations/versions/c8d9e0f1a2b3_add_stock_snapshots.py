@@ -0,0 +1,39 @@
+"""Add point-in-time stock snapshots."""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "c8d9e0f1a2b3"
+down_revision = "b7c8d9e0f1a2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "stock_snapshots",
+        sa.Column("company_id", sa.Integer(), nullable=False),
+        sa.Column("inventory_item_id", sa.Integer(), nullable=False),
+        sa.Column("warehouse_id", sa.Integer(), nullable=True),
+        sa.Column("snapshot_date", sa.DateTime(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("unit_cost", sa.Numeric(12, 2), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("is_deleted", sa.Boolean(), nullable=True),
+        sa.Column("deleted_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["company_id"], ["companies.id"]),
+        sa.ForeignKeyConstraint(["inventory_item_id"], ["inventory_items.id"]),
+        sa.ForeignKeyConstraint(["warehouse_id"], ["warehouses.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("stock_snapshots") as batch_op:
+        batch_op.create_index("ix_stock_snapshots_company_id", ["company_id"], unique=False)
+        batch_op.create_index("ix_stock_snapshots_inventory_item_id", ["inventory_item_id"], unique=False)
+        batch_op.create_index("ix_stock_snapshots_warehouse_id", ["warehouse_id"], unique=False)
+        batch_op.create_index("ix_stock_snapshots_snapshot_date", ["snapshot_date"], unique=False)
+        batch_op.create_index("ix_stock_snapshots_company_date", ["company_id", "snapshot_date"], unique=False)
+
+
+def downgrade():
+    op.drop_table("stock_snapshots")
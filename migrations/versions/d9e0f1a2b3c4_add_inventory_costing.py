@@ -0,0 +1,77 @@
+"""Add inventory costing method, FIFO layers and movement unit costs."""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "d9e0f1a2b3c4"
+down_revision = "c8d9e0f1a2b3"
+branch_labels = None
+depends_on = None
+
+costing_method = sa.Enum("average", "fifo", name="costingmethod")
+
+
+def upgrade():
+    costing_method.create(op.get_bind(), checkfirst=True)
+
+    with op.batch_alter_table("companies") as batch_op:
+        batch_op.add_column(sa.Column("costing_method", costing_method, nullable=False, server_default="average"))
+
+    with op.batch_alter_table("inventory_items") as batch_op:
+        batch_op.add_column(sa.Column("cost_layers", sa.JSON(), nullable=True))
+        batch_op.alter_column(
+            "cost_price",
+            existing_type=sa.Numeric(12, 2),
+            type_=sa.Numeric(12, 4),
+            existing_nullable=False,
+        )
+
+    with op.batch_alter_table("stock_movements") as batch_op:
+        batch_op.add_column(sa.Column("unit_cost", sa.Numeric(12, 4), nullable=True))
+
+    # Purchase receipts take their cost from the matching purchase order line.
+    op.execute(
+        """
+        UPDATE stock_movements
+        SET unit_cost = (
+            SELECT purchase_order_items.price
+            FROM purchase_order_items
+            JOIN purchase_orders ON purchase_orders.id = purchase_order_items.purchase_order_id
+            WHERE purchase_orders.company_id = stock_movements.company_id
+              AND 'PO ' || purchase_orders.order_number = stock_movements.reference
+              AND purchase_order_items.inventory_item_id = stock_movements.inventory_item_id
+            LIMIT 1
+        )
+        WHERE type = 'incoming' AND reference LIKE 'PO %'
+        """
+    )
+    # Every other receipt keeps the item cost known today, so recomputing is repeatable.
+    op.execute(
+        """
+        UPDATE stock_movements
+        SET unit_cost = (
+            SELECT inventory_items.cost_price
+            FROM inventory_items
+            WHERE inventory_items.id = stock_movements.inventory_item_id
+        )
+        WHERE type = 'incoming' AND unit_cost IS NULL
+        """
+    )
+
+
+def downgrade():
+    with op.batch_alter_table("stock_movements") as batch_op:
+        batch_op.drop_column("unit_cost")
+
+    with op.batch_alter_table("inventory_items") as batch_op:
+        batch_op.alter_column(
+            "cost_price",
+            existing_type=sa.Numeric(12, 4),
+            type_=sa.Numeric(12, 2),
+            existing_nullable=False,
+        )
+        batch_op.drop_column("cost_layers")
+
+    with op.batch_alter_table("companies") as batch_op:
+        batch_op.drop_column("costing_method")
+
+    costing_method.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,84 @@
+"""Add typed source keys to stock movements and backfill them from references."""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "e0f1a2b3c4d5"
+down_revision = "d9e0f1a2b3c4"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 10000
+
+movement_source = sa.Enum(
+    "document", "purchase_order", "transfer", "adjustment", "initial_stock",
+    name="stockmovementsource",
+)
+
+# (source_type, WHERE clause, source_id expression) applied per id range.
+BACKFILL_RULES = [
+    (
+        "document",
+        "reference LIKE 'INV %'",
+        """(
+            SELECT documents.id FROM documents
+            WHERE documents.company_id = stock_movements.company_id
+              AND documents.document_number = substr(stock_movements.reference, 5)
+        )""",
+    ),
+    (
+        "purchase_order",
+        "reference LIKE 'PO %'",
+        """(
+            SELECT purchase_orders.id FROM purchase_orders
+            WHERE purchase_orders.company_id = stock_movements.company_id
+              AND purchase_orders.order_number = substr(stock_movements.reference, 4)
+        )""",
+    ),
+    ("transfer", "destination_warehouse_id IS NOT NULL", "NULL"),
+    ("initial_stock", "reference = 'Initial Stock'", "NULL"),
+    ("adjustment", "type = 'adjustment'", "NULL"),
+]
+
+
+def upgrade():
+    movement_source.create(op.get_bind(), checkfirst=True)
+
+    with op.batch_alter_table("stock_movements") as batch_op:
+        batch_op.add_column(sa.Column("source_type", movement_source, nullable=True))
+        batch_op.add_column(sa.Column("source_id", sa.Integer(), nullable=True))
+        batch_op.create_index("ix_stock_movements_source", ["source_type", "source_id"], unique=False)
+
+    bind = op.get_bind()
+    min_id, max_id = bind.execute(sa.text("SELECT MIN(id), MAX(id) FROM stock_movements")).one()
+    if min_id is None:
+        return
+
+    source_value = (
+        "CAST(:source_type AS stockmovementsource)" if bind.dialect.name == "postgresql" else ":source_type"
+    )
+
+    # Walk the table in id ranges so each UPDATE touches a bounded number of rows.
+    for start in range(min_id, max_id + 1, BATCH_SIZE):
+        end = start + BATCH_SIZE - 1
+        for source_type, condition, source_id in BACKFILL_RULES:
+            if source_id != "NULL":
+                # References pointing at documents that no longer exist stay untyped.
+                condition = f"{condition} AND {source_id} IS NOT NULL"
+            bind.execute(sa.text(
+                f"""
+                UPDATE stock_movements
+                SET source_type = {source_value}, source_id = {source_id}
+                WHERE id BETWEEN :start AND :end
+                  AND source_type IS NULL
+                  AND {condition}
+                """
+            ), {"source_type": source_type, "start": start, "end": end})
+
+
+def downgrade():
+    with op.batch_alter_table("stock_movements") as batch_op:
+        batch_op.drop_index("ix_stock_movements_source")
+        batch_op.drop_column("source_id")
+        batch_op.drop_column("source_type")
+
+    movement_source.drop(op.get_bind(), checkfirst=True)
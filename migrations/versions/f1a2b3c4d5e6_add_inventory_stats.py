@@ -0,0 +1,32 @@
+"""Add per-company inventory stats cache."""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "f1a2b3c4d5e6"
+down_revision = "e0f1a2b3c4d5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "inventory_stats",
+        sa.Column("company_id", sa.Integer(), nullable=False),
+        sa.Column("total_items", sa.Integer(), nullable=False),
+        sa.Column("low_stock_items", sa.Integer(), nullable=False),
+        sa.Column("out_of_stock_items", sa.Integer(), nullable=False),
+        sa.Column("total_value", sa.Numeric(16, 4), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("is_deleted", sa.Boolean(), nullable=True),
+        sa.Column("deleted_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["company_id"], ["companies.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("inventory_stats") as batch_op:
+        batch_op.create_index("ix_inventory_stats_company_id", ["company_id"], unique=True)
+
+
+def downgrade():
+    op.drop_table("inventory_stats")
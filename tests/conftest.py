@@ -0,0 +1,29 @@
+import pytest
+
+from app import create_app
+from app.models import db
+from config import Config
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """Build an app on SQLite files in ``tmp_path``; keyword arguments override ``Config``."""
+    def factory(**overrides):
+        settings = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'primary.db'}",
+            'SQLALCHEMY_REPLICA_URI': None,
+            'STATE_STORAGE_URL': f"sqlite:///{tmp_path / 'state.db'}",
+            'INSTRUMENTATION_ENABLED': False,
+            'SESSION_COOKIE_SECURE': False,
+            'WTF_CSRF_ENABLED': False,
+            'TESTING': True,
+            **overrides,
+        }
+        for key, value in settings.items():
+            monkeypatch.setattr(Config, key, value, raising=False)
+        app = create_app()
+        with app.app_context():
+            db.create_all(bind_key=None)
+        return app
+
+    return factory
@@ -0,0 +1,99 @@
+"""Minimal threaded SMTP server on localhost for the email queue tests and benchmark."""
+import re
+import socketserver
+import threading
+import time
+
+_ADDRESS = re.compile(r'<([^>]*)>')
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    """Just enough of RFC 5321 for smtplib: EHLO, MAIL, RCPT, DATA, RSET, NOOP and QUIT."""
+
+    def _reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server
+        server.count_connection()
+        time.sleep(server.handshake_seconds)
+        self._reply('220 localhost stand-in ESMTP')
+        delivered = 0
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            text = line.decode('latin-1').strip()
+            command = text.upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self._reply('250 localhost')
+            elif command.startswith('MAIL'):
+                recipients = []
+                self._reply('250 OK')
+            elif command.startswith('RCPT'):
+                match = _ADDRESS.search(text)
+                address = match.group(1) if match else ''
+                reply = server.rejections.get(address)
+                if reply is None:
+                    recipients.append(address)
+                    reply = '250 OK'
+                self._reply(reply)
+            elif command.startswith('DATA'):
+                self._reply('354 end data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                delivered += 1
+                server.count_message(recipients)
+                self._reply('250 OK queued')
+                if server.drop_every and delivered % server.drop_every == 0:
+                    return
+            elif command.startswith('QUIT'):
+                self._reply('221 bye')
+                return
+            else:
+                self._reply('250 OK')
+
+
+class SmtpStandIn(socketserver.ThreadingTCPServer):
+    """Accepts every message, optionally after a delay and dropping the connection.
+
+    ``handshake_ms`` delays the greeting (standing in for TCP + TLS + AUTH to a
+    real relay), ``drop_every`` closes the connection after that many messages
+    and ``rejections`` maps recipient addresses to the reply their ``RCPT`` gets
+    (e.g. ``'451 4.3.0 try later'`` or ``'550 5.1.1 no such user'``).
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, handshake_ms=0, drop_every=0, rejections=None):
+        super().__init__(('127.0.0.1', 0), _SmtpHandler)
+        self.handshake_seconds = handshake_ms / 1000
+        self.drop_every = drop_every
+        self.rejections = dict(rejections or {})
+        self.messages = 0
+        self.connections = 0
+        self.recipients = []
+        self._lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def count_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def count_message(self, recipients=()):
+        with self._lock:
+            self.messages += 1
+            self.recipients.extend(recipients)
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
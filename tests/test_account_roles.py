@@ -0,0 +1,19 @@
+import pytest
+
+from app.accounting.services.account_service import AccountService
+from app.models.enums import AccountRole, AccountType
+
+
+@pytest.mark.parametrize('data, expected', [
+    ({}, AccountRole.cash),
+    ({'role': 'auto'}, AccountRole.cash),
+    ({'role': ''}, None),
+    ({'role': 'receivable'}, AccountRole.receivable),
+])
+def test_clean_role(data, expected):
+    assert AccountService._clean_role(AccountType.asset, 'Caja chica', data) == expected
+
+
+def test_clean_role_rejects_a_role_of_another_account_type():
+    with pytest.raises(ValueError):
+        AccountService._clean_role(AccountType.asset, 'Proveedores', {'role': 'payable'})
@@ -0,0 +1,47 @@
+from datetime import UTC, datetime
+
+import pytest
+
+from app.companies.services.company_stats import get_company_stats
+from app.models import Company, Role, User, db
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(COMPANY_STATS_CACHE_TTL=300)
+    with app.app_context():
+        company = Company(name='Acme', slug='acme', identifier='0801')
+        role = Role(name='staff')
+        db.session.add_all([company, role])
+        db.session.flush()
+        for name in ('Ana', 'Luis'):
+            user = User(name=name, email=f'{name.lower()}@example.com', role_id=role.id, password_hash='x')
+            user.companies.append(company)
+            db.session.add(user)
+        db.session.commit()
+    return app
+
+
+def test_soft_deleting_a_user_refreshes_the_cached_users_count(app):
+    with app.app_context():
+        company_id = Company.query.one().id
+        assert get_company_stats(company_id)['users_count'] == 2
+
+        user = User.query.filter_by(name='Luis').one()
+        user.is_deleted = True
+        user.deleted_at = datetime.now(UTC)
+        db.session.commit()
+
+        assert get_company_stats(company_id)['users_count'] == 1
+
+
+def test_removing_a_membership_refreshes_the_cached_users_count(app):
+    with app.app_context():
+        company = Company.query.one()
+        assert get_company_stats(company.id)['users_count'] == 2
+
+        user = User.query.filter_by(name='Ana').one()
+        user.companies.remove(company)
+        db.session.commit()
+
+        assert get_company_stats(company.id)['users_count'] == 1
@@ -0,0 +1,40 @@
+import pytest
+
+from app.contacts.services.contact_stats import get_contact_stats
+from app.models import Company, Contact, ContactStats, db
+from app.models.enums import ContactType
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(CONTACT_STATS_CACHE_ENABLED=True)
+    with app.app_context():
+        company = Company(name='Acme', slug='acme', identifier='0801')
+        db.session.add(company)
+        db.session.flush()
+        db.session.add(Contact(company_id=company.id, name='Client', type=ContactType.customer))
+        db.session.commit()
+    return app
+
+
+def test_building_a_missing_row_keeps_the_callers_session(app):
+    with app.app_context():
+        contact = Contact.query.filter_by(name='Client').one()
+        transaction = db.session().get_transaction()
+
+        stats = get_contact_stats(contact)
+
+        assert stats == {'total_revenue': 0.0, 'pending_payments': 0.0, 'total_invoices': 0}
+        assert db.session().get_transaction() is transaction
+        assert db.session.query(ContactStats).filter_by(contact_id=contact.id).count() == 1
+
+
+def test_read_does_not_commit_pending_changes(app):
+    with app.app_context():
+        contact = Contact.query.filter_by(name='Client').one()
+        db.session.add(Contact(company_id=contact.company_id, name='Draft', type=ContactType.lead))
+
+        get_contact_stats(contact)
+        db.session.rollback()
+
+        assert Contact.query.filter_by(name='Draft').count() == 0
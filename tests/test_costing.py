@@ -0,0 +1,76 @@
+import pytest
+
+from app.models import Company, Contact, InventoryItem, db
+from app.models.enums import ContactType, CostingMethod
+from app.orders.services.purchase_order_service import create_purchase_order, update_purchase_order
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+def _setup(method):
+    company = Company(name='Acme', slug='acme', identifier='0801', costing_method=method)
+    db.session.add(company)
+    db.session.flush()
+    supplier = Contact(company_id=company.id, name='Supplier', type=ContactType.supplier)
+    # Stock with no movement behind it, as left by a manual quantity edit.
+    item = InventoryItem(company_id=company.id, name='Widget', quantity=100, cost_price=10)
+    db.session.add_all([supplier, item])
+    db.session.commit()
+    return company, supplier, item
+
+
+def _form(supplier, item, quantity, price):
+    return {
+        'supplier_id': str(supplier.id),
+        'items[0][inventory_item_id]': str(item.id),
+        'items[0][quantity]': str(quantity),
+        'items[0][price]': str(price),
+    }
+
+
+def _cost(item):
+    db.session.refresh(item)
+    return float(item.cost_price)
+
+
+def test_editing_a_purchase_order_keeps_stock_without_movements(app):
+    with app.app_context():
+        company, supplier, item = _setup(CostingMethod.average)
+        order = create_purchase_order(company.id, _form(supplier, item, 10, 20))['order']
+        assert _cost(item) == pytest.approx(10.9091)
+
+        assert update_purchase_order(company.id, order.id, _form(supplier, item, 10, 20))['success']
+        assert _cost(item) == pytest.approx(10.9091)
+
+        assert update_purchase_order(company.id, order.id, _form(supplier, item, 20, 30))['success']
+        assert item.quantity == 120
+        assert _cost(item) == pytest.approx((100 * 10 + 20 * 30) / 120, abs=1e-4)
+
+
+def test_editing_a_purchase_order_keeps_a_manual_cost(app):
+    with app.app_context():
+        company, supplier, item = _setup(CostingMethod.average)
+        order = create_purchase_order(company.id, _form(supplier, item, 10, 20))['order']
+        item.cost_price = 12
+        db.session.commit()
+
+        assert update_purchase_order(company.id, order.id, _form(supplier, item, 10, 25))['success']
+        # The 10 units at 20 come out of the manual 12, the 10 at 25 go in.
+        assert _cost(item) == pytest.approx((110 * 12 - 200 + 250) / 110, abs=1e-4)
+
+
+def test_editing_a_fifo_receipt_replaces_its_layer(app):
+    with app.app_context():
+        company, supplier, item = _setup(CostingMethod.fifo)
+        order = create_purchase_order(company.id, _form(supplier, item, 10, 20))['order']
+        db.session.refresh(item)
+        assert item.cost_layers == [[100, 10.0], [10, 20.0]]
+
+        assert update_purchase_order(company.id, order.id, _form(supplier, item, 5, 30))['success']
+        db.session.refresh(item)
+        assert item.quantity == 105
+        assert item.cost_layers == [[100, 10.0], [5, 30.0]]
+
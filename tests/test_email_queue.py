@@ -0,0 +1,194 @@
+import time
+from datetime import timedelta
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.models import Company, db
+from app.models.outbound_email import EMAIL_STATUS_FAILED, EMAIL_STATUS_PENDING, EMAIL_STATUS_SENT, OutboundEmail
+from app.services import email_queue
+from app.services.email_queue import EmailDispatcher, EmailStats, claim_due_emails, deliver, send_pending_emails
+from app.services.email_service import EmailService
+from tests.smtp_stand_in import SmtpStandIn
+
+
+@pytest.fixture
+def smtp_server():
+    server = SmtpStandIn().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def app(make_app, smtp_server):
+    return make_app(
+        MAIL_SERVER='127.0.0.1', MAIL_PORT=smtp_server.port, MAIL_USE_TLS=False, MAIL_USE_SSL=False,
+        MAIL_SUPPRESS_SEND=False, MAIL_BATCH_SIZE=50, MAIL_RETRY_BACKOFF_SECONDS=60,
+        MAIL_WORKER_THREADS=0, MAIL_RETRY_INTERVAL=0.05,
+    )
+
+
+def _submit(dispatcher, *recipients):
+    for recipient in recipients:
+        dispatcher.submit('Hello', 'noreply@trackdesk.local', [recipient], 'Body')
+
+
+def _statuses():
+    db.session.expire_all()
+    return {row.recipients[0]: row for row in OutboundEmail.query.order_by(OutboundEmail.id)}
+
+
+def _draft():
+    return OutboundEmail(subject='Draft', recipients=['draft@example.com'], text_body='',
+                         next_attempt_at=email_queue._now())
+
+
+def test_submit_stores_pending_rows_before_queueing(app):
+    with app.app_context():
+        dispatcher = EmailDispatcher(app)
+        _submit(dispatcher, 'a@example.com', 'b@example.com')
+
+        rows = _statuses()
+        assert {row.status for row in rows.values()} == {EMAIL_STATUS_PENDING}
+        assert dispatcher.queue_depth() == 2
+
+
+def test_submit_does_not_commit_the_callers_session(app):
+    with app.app_context():
+        dispatcher = EmailDispatcher(app)
+        db.session.add(_draft())
+        _submit(dispatcher, 'a@example.com')
+        db.session.rollback()
+
+        assert set(_statuses()) == {'a@example.com'}
+
+
+def test_submit_joins_the_callers_transaction_while_it_holds_the_sqlite_lock(app):
+    with app.app_context():
+        dispatcher = EmailDispatcher(app)
+        db.session.add(_draft())
+        db.session.flush()
+        _submit(dispatcher, 'a@example.com')
+        db.session.commit()
+
+        assert set(_statuses()) == {'draft@example.com', 'a@example.com'}
+
+
+def test_error_notification_is_stored_after_a_failed_flush(app):
+    app.config['TRACKDESK_ADMIN'] = 'admin@example.com'
+    with app.app_context():
+        db.session.add(Company(name='Acme', slug='acme', identifier='0801'))
+        db.session.commit()
+        db.session.add(Company(name='Copy', slug='copy', identifier='0801'))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+
+        EmailService.notify_error('boom')
+        db.session.rollback()
+
+        assert set(_statuses()) == {'admin@example.com'}
+
+
+def test_batch_is_sent_over_one_connection(app, smtp_server):
+    recipients = [f'user{index}@example.com' for index in range(5)]
+    with app.app_context():
+        _submit(EmailDispatcher(app), *recipients)
+        stats = send_pending_emails()
+
+        assert {row.status for row in _statuses().values()} == {EMAIL_STATUS_SENT}
+    assert stats['sent'] == 5
+    assert stats['batches'] == 1
+    assert stats['connections'] == 1
+    assert smtp_server.connections == 1
+    assert sorted(smtp_server.recipients) == sorted(recipients)
+
+
+def test_dropped_connection_is_reopened_and_the_message_retried(app, smtp_server):
+    smtp_server.drop_every = 2
+    with app.app_context():
+        _submit(EmailDispatcher(app), *(f'user{index}@example.com' for index in range(5)))
+        stats = send_pending_emails()
+
+        rows = _statuses()
+    assert {row.status for row in rows.values()} == {EMAIL_STATUS_SENT}
+    assert all(row.attempts == 1 for row in rows.values())
+    assert stats['reconnects'] == 2
+    assert smtp_server.messages == 5
+
+
+def test_temporary_rejection_backs_off_and_permanent_rejection_fails(app, smtp_server, caplog):
+    smtp_server.rejections = {
+        'later@example.com': '451 4.3.0 try again later',
+        'unknown@example.com': '550 5.1.1 no such user',
+    }
+    with app.app_context():
+        _submit(EmailDispatcher(app), 'later@example.com', 'unknown@example.com', 'ok@example.com')
+        stats = EmailStats()
+        started = email_queue._now()
+        deliver(claim_due_emails('test', 50), stats)
+
+        rows = _statuses()
+    later, unknown, ok = rows['later@example.com'], rows['unknown@example.com'], rows['ok@example.com']
+    assert later.status == EMAIL_STATUS_PENDING
+    assert later.attempts == 1
+    assert later.locked_by is None
+    assert started + timedelta(seconds=59) <= later.next_attempt_at <= started + timedelta(seconds=61)
+    assert '451' in later.last_error
+    assert unknown.status == EMAIL_STATUS_FAILED
+    assert '550' in unknown.last_error
+    assert ok.status == EMAIL_STATUS_SENT
+    assert stats.snapshot()['connections'] == 1
+    assert 'SMTP rejected all recipients' in caplog.text
+    assert "'mail_server': '127.0.0.1'" in caplog.text
+
+
+def test_backoff_doubles_with_each_attempt(app, smtp_server):
+    smtp_server.rejections = {'later@example.com': '421 4.7.0 busy'}
+    with app.app_context():
+        _submit(EmailDispatcher(app), 'later@example.com')
+        row_id = _statuses()['later@example.com'].id
+        db.session.execute(db.update(OutboundEmail).where(OutboundEmail.id == row_id).values(attempts=2))
+        db.session.commit()
+        started = email_queue._now()
+        deliver(claim_due_emails('test', 50), EmailStats())
+
+        later = _statuses()['later@example.com']
+    assert later.attempts == 3
+    assert later.next_attempt_at >= started + timedelta(seconds=239)
+
+
+def test_restarted_dispatcher_sends_rows_left_pending(app, smtp_server):
+    with app.app_context():
+        # No sender threads: the ids queued in memory are lost with this dispatcher.
+        _submit(EmailDispatcher(app), 'a@example.com', 'b@example.com')
+
+    app.config['MAIL_WORKER_THREADS'] = 1
+    dispatcher = EmailDispatcher(app)
+    try:
+        deadline = time.monotonic() + 5
+        while smtp_server.messages < 2 and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        dispatcher.shutdown()
+
+    with app.app_context():
+        assert {row.status for row in _statuses().values()} == {EMAIL_STATUS_SENT}
+    assert sorted(smtp_server.recipients) == ['a@example.com', 'b@example.com']
+
+
+def test_queued_ids_are_claimed_and_sent_by_the_sender_threads(app, smtp_server):
+    app.config['MAIL_WORKER_THREADS'] = 2
+    app.config['MAIL_RETRY_INTERVAL'] = 30
+    dispatcher = EmailDispatcher(app)
+    try:
+        with app.app_context():
+            _submit(dispatcher, 'a@example.com', 'b@example.com', 'c@example.com')
+        deadline = time.monotonic() + 5
+        while smtp_server.messages < 3 and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        dispatcher.shutdown()
+
+    with app.app_context():
+        assert {row.status for row in _statuses().values()} == {EMAIL_STATUS_SENT}
+    assert smtp_server.messages == 3
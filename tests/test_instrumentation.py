@@ -0,0 +1,18 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.models import db
+
+
+def test_failed_statement_does_not_leave_its_timer_on_the_connection(make_app):
+    app = make_app(INSTRUMENTATION_ENABLED=True)
+    with app.app_context():
+        with db.engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    connection.execute(text('SELECT * FROM missing_table'))
+                connection.rollback()
+
+            assert connection.info.get('query_start_time') == []
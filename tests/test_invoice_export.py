@@ -0,0 +1,30 @@
+import openpyxl
+import pytest
+
+from app.invoices.services.invoice_query_service import export_invoice_report_xlsx
+from app.models import Company, Document, DocumentType, db
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+def test_subtotal_of_documents_without_cached_totals_excludes_tax(app):
+    with app.app_context():
+        company = Company(name='Acme', slug='acme', identifier='0801', tax_rate=15)
+        db.session.add(company)
+        db.session.flush()
+        db.session.add_all([
+            Document(company_id=company.id, document_number='F-1', type=DocumentType.invoice,
+                     total_amount=115, subtotal_cache=100, tax_cache=15),
+            Document(company_id=company.id, document_number='F-2', type=DocumentType.invoice, total_amount=230),
+        ])
+        db.session.commit()
+
+        out, _filename = export_invoice_report_xlsx(company.id, {})
+
+    sheet = openpyxl.load_workbook(out).active
+    rows = {row[0]: row[6:9] for row in sheet.iter_rows(min_row=2, values_only=True)}
+    assert rows['F-1'] == (100, 15, 115)
+    assert rows['F-2'] == (200, 30, 230)
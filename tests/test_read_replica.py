@@ -0,0 +1,72 @@
+from sqlalchemy import update
+
+from app.extensions import read_replica, reads_from_replica
+from app.models import Company, db
+
+
+def _seed(engine, name):
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(Company.__table__.insert().values(
+            name=name, slug='acme', identifier='0801', is_deleted=False,
+        ))
+
+
+def _company_name():
+    return Company.query.filter_by(slug='acme').one().name
+
+
+@reads_from_replica
+def _decorated_company_name():
+    return _company_name()
+
+
+def _replica_app(make_app, tmp_path):
+    app = make_app(SQLALCHEMY_REPLICA_URI=f"sqlite:///{tmp_path / 'replica.db'}")
+    with app.app_context():
+        _seed(db.engine, 'Primary')
+        _seed(db.engines['replica'], 'Replica')
+    return app
+
+
+def test_plain_reads_use_the_primary(make_app, tmp_path):
+    app = _replica_app(make_app, tmp_path)
+    with app.app_context():
+        assert _company_name() == 'Primary'
+
+
+def test_read_replica_block_and_decorator_use_the_replica(make_app, tmp_path):
+    app = _replica_app(make_app, tmp_path)
+    with app.app_context():
+        with read_replica():
+            assert _company_name() == 'Replica'
+        assert _decorated_company_name() == 'Replica'
+        assert _company_name() == 'Primary'
+
+
+def test_reads_after_a_flush_go_back_to_the_primary(make_app, tmp_path):
+    app = _replica_app(make_app, tmp_path)
+    with app.app_context():
+        with read_replica():
+            assert _company_name() == 'Replica'
+            db.session.add(Company(name='Other', slug='other', identifier='0802'))
+            db.session.flush()
+            assert _company_name() == 'Primary'
+
+
+def test_reads_after_dml_go_back_to_the_primary(make_app, tmp_path):
+    app = _replica_app(make_app, tmp_path)
+    with app.app_context():
+        with read_replica():
+            db.session.execute(update(Company).where(Company.slug == 'acme').values(name='Renamed'))
+            assert _company_name() == 'Renamed'
+
+
+def test_no_routing_without_a_replica(make_app):
+    app = make_app()
+    with app.app_context():
+        _seed(db.engine, 'Primary')
+        assert 'replica' not in db.engines
+        with read_replica():
+            assert _company_name() == 'Primary'
+        assert _decorated_company_name() == 'Primary'
@@ -0,0 +1,80 @@
+import re
+
+import pytest
+
+from app.extensions import bcrypt
+from app.models import Company, Role, User, db
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(SESSION_TYPE='filesystem')
+    with app.app_context():
+        company = Company(name='Acme', slug='acme', identifier='0801')
+        role = Role(name='superadmin')
+        db.session.add_all([company, role])
+        db.session.flush()
+        user = User(
+            name='Ana', email='ana@example.com', role_id=role.id,
+            password_hash=bcrypt.generate_password_hash('secret').decode(),
+        )
+        user.companies.append(company)
+        db.session.add(user)
+        db.session.commit()
+    return app
+
+
+def _session_cookie(client):
+    cookie = client.get_cookie('session')
+    return cookie.value if cookie else None
+
+
+def _login(client):
+    page = client.get('/login')
+    token = re.search(r'name="csrf_token" value="([^"]+)"', page.get_data(as_text=True)).group(1)
+    return client.post('/login', data={'email': 'ana@example.com', 'password': 'secret', 'csrf_token': token})
+
+
+def test_login_issues_a_new_session_id(app):
+    client = app.test_client()
+    client.get('/login')
+    anonymous_sid = _session_cookie(client)
+    assert anonymous_sid
+
+    response = _login(client)
+    assert response.status_code == 302
+    assert 'session=' in response.headers.get('Set-Cookie', '')
+    assert _session_cookie(client) != anonymous_sid
+
+    # The pre-login id is gone from the store, so planting it gains nothing.
+    attacker = app.test_client()
+    attacker.set_cookie('session', anonymous_sid)
+    assert attacker.get('/companies').status_code == 302
+
+
+def test_authenticated_session_keeps_working_and_logout_rotates(app):
+    client = app.test_client()
+    _login(client)
+    authenticated_sid = _session_cookie(client)
+    assert client.get('/companies').status_code == 200
+
+    client.get('/logout')
+    assert _session_cookie(client) != authenticated_sid
+
+    replay = app.test_client()
+    replay.set_cookie('session', authenticated_sid)
+    assert replay.get('/companies').status_code == 302
+
+
+def test_user_change_without_explicit_regenerate_rotates(app):
+    @app.route('/_test/impersonate/<user_id>')
+    def impersonate(user_id):
+        from flask import session
+        session['_user_id'] = user_id
+        return 'ok'
+
+    client = app.test_client()
+    client.get('/login')
+    before = _session_cookie(client)
+    client.get('/_test/impersonate/1')
+    assert _session_cookie(client) != before
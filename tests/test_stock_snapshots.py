@@ -0,0 +1,54 @@
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from app.inventory.services.stock_snapshots import inventory_value_as_of, stock_on_hand_as_of, take_stock_snapshot
+from app.models import Company, InventoryItem, StockMovement, Warehouse, WarehouseItem, db
+from app.models.enums import StockMovementType
+
+NOW = datetime.now(UTC).replace(tzinfo=None)
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def stock(app):
+    """100 units with no movement behind them, plus 20 received into a warehouse an hour ago."""
+    with app.app_context():
+        company = Company(name='Acme', slug='acme', identifier='0801')
+        db.session.add(company)
+        db.session.flush()
+        warehouse = Warehouse(company_id=company.id, name='Main')
+        item = InventoryItem(company_id=company.id, name='Widget', quantity=120, cost_price=20)
+        db.session.add_all([warehouse, item])
+        db.session.flush()
+        db.session.add_all([
+            WarehouseItem(warehouse_id=warehouse.id, inventory_item_id=item.id, quantity=20),
+            StockMovement(company_id=company.id, inventory_item_id=item.id, warehouse_id=warehouse.id,
+                          type=StockMovementType.incoming, quantity=20, unit_cost=20,
+                          date=NOW - timedelta(hours=1)),
+        ])
+        db.session.commit()
+        return company.id, item.id, warehouse.id
+
+
+def test_stock_without_movements_is_kept_before_the_first_snapshot(app, stock):
+    company_id, item_id, warehouse_id = stock
+    with app.app_context():
+        assert inventory_value_as_of(company_id, NOW) == 2400.0
+        assert inventory_value_as_of(company_id, NOW - timedelta(days=1)) == 2000.0
+        assert stock_on_hand_as_of(company_id, NOW - timedelta(days=1), by_warehouse=True) == {
+            (item_id, warehouse_id): 0, (item_id, None): 100,
+        }
+
+
+def test_first_snapshot_matches_the_current_stock(app, stock):
+    company_id, item_id, _warehouse_id = stock
+    with app.app_context():
+        take_stock_snapshot(company_id, as_of=NOW - timedelta(minutes=30))
+
+        assert stock_on_hand_as_of(company_id, NOW) == {item_id: 120}
+        assert inventory_value_as_of(company_id, NOW) == 2400.0